@@ -36,6 +36,7 @@ This file benchmarks isolated components in the scientific library.
 import sys
 import time
 import importlib
+import os
 import numpy
 
 # util {{{
@@ -88,6 +89,181 @@ def eps_for_Integrator(Integrator, n_node, time_limit=0.5):
     toc = time.time()
     return n_eval / (toc - tic)
 
+
+class CountingArray(numpy.ndarray):
+    "State array counting the new arrays which ufuncs return from it."
+    n_alloc = 0
+
+    def __array_wrap__(self, out, context=None):
+        # in place or out= results are among the ufunc's arguments
+        if context is None or all(out is not arg for arg in context[1]):
+            CountingArray.n_alloc += 1
+        return numpy.ndarray.__array_wrap__(self, out, context)
+
+
+# The fixed step schemes as they were before they reused work buffers, for
+# the allocation report to compare against.
+
+def _baseline_clamp_state(integ, X):
+    if integ.clamped_state_variable_values is not None:
+        X[integ.clamped_state_variable_indices] = integ.clamped_state_variable_values
+
+
+def _baseline_euler(integ, X, dfun, coupling, local_coupling, stimulus):
+    integ.dX = dfun(X, coupling, local_coupling)
+    X_next = X + integ.dt * (integ.dX + stimulus)
+    _baseline_clamp_state(integ, X_next)
+    return X_next
+
+
+def _baseline_euler_stochastic(integ, X, dfun, coupling, local_coupling, stimulus):
+    noise = integ.noise.generate(X.shape)
+    dX = dfun(X, coupling, local_coupling) * integ.dt
+    noise_gfun = integ.noise.gfun(X)
+    X_next = X + dX + noise_gfun * noise + integ.dt * stimulus
+    _baseline_clamp_state(integ, X_next)
+    return X_next
+
+
+def _baseline_heun(integ, X, dfun, coupling, local_coupling, stimulus):
+    m_dx_tn = dfun(X, coupling, local_coupling)
+    inter = X + integ.dt * (m_dx_tn + stimulus)
+    _baseline_clamp_state(integ, inter)
+    dX = (m_dx_tn + dfun(inter, coupling, local_coupling)) * integ.dt / 2.0
+    X_next = X + dX + integ.dt * stimulus
+    _baseline_clamp_state(integ, X_next)
+    return X_next
+
+
+def _baseline_heun_stochastic(integ, X, dfun, coupling, local_coupling, stimulus):
+    noise = integ.noise.generate(X.shape)
+    noise_gfun = integ.noise.gfun(X)
+    m_dx_tn = dfun(X, coupling, local_coupling)
+    noise *= noise_gfun
+    inter = X + integ.dt * m_dx_tn + noise + integ.dt * stimulus
+    _baseline_clamp_state(integ, inter)
+    dX = (m_dx_tn + dfun(inter, coupling, local_coupling)) * integ.dt / 2.0
+    X_next = X + dX + noise + integ.dt * stimulus
+    _baseline_clamp_state(integ, X_next)
+    return X_next
+
+
+def _baseline_rk4(integ, X, dfun, coupling, local_coupling, stimulus):
+    dt = integ.dt
+    dt2 = dt / 2.0
+    dt6 = dt / 6.0
+    k1 = dfun(X, coupling, local_coupling)
+    inter_k1 = X + dt2 * k1
+    _baseline_clamp_state(integ, inter_k1)
+    k2 = dfun(inter_k1, coupling, local_coupling)
+    inter_k2 = X + dt2 * k2
+    _baseline_clamp_state(integ, inter_k2)
+    k3 = dfun(inter_k2, coupling, local_coupling)
+    inter_k3 = X + dt * k3
+    _baseline_clamp_state(integ, inter_k3)
+    k4 = dfun(inter_k3, coupling, local_coupling)
+    dX = dt6 * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+    X_next = X + dX + integ.dt * stimulus
+    _baseline_clamp_state(integ, X_next)
+    return X_next
+
+
+BASELINE_SCHEMES = {
+    'EulerDeterministic': _baseline_euler,
+    'EulerStochastic': _baseline_euler_stochastic,
+    'HeunDeterministic': _baseline_heun,
+    'HeunStochastic': _baseline_heun_stochastic,
+    'RungeKutta4thOrderDeterministic': _baseline_rk4,
+}
+
+
+def allocs_for_Integrator(Integrator, n_node, n_step=100, baseline=False):
+    integ = Integrator()
+    integ.configure()
+    if 'Stochastic' in Integrator.__name__:
+        integ.noise.dt = integ.dt
+    if baseline:
+        scheme = lambda *args: BASELINE_SCHEMES[Integrator.__name__](integ, *args)
+    else:
+        scheme = integ.scheme
+    X = numpy.random.randn(n_node).view(CountingArray)
+    scheme(X, nop_dfun, None, None, 0.0)
+    CountingArray.n_alloc = 0
+    for _ in range(n_step):
+        scheme(X, nop_dfun, None, None, 0.0)
+    return CountingArray.n_alloc / float(n_step)
+
+
+def alloc_report(integs, n_node=1024):
+    """
+    State sized arrays allocated per step, including the returned state, with
+    the baseline schemes (before) where there is one, and the current ones (after).
+    """
+    print('%d nodes' % (n_node, ))
+    sys.stdout.write('%32s%8s%8s\n' % ('', 'before', 'after'))
+    for Integrator in integs:
+        if Integrator.__name__ in BASELINE_SCHEMES:
+            before = '%8.1f' % (allocs_for_Integrator(Integrator, n_node, baseline=True), )
+        else:
+            before = '%8s' % ('-', )
+        after = allocs_for_Integrator(Integrator, n_node)
+        sys.stdout.write('%32s%s%8.1f\n' % (Integrator.__name__, before, after))
+        sys.stdout.flush()
+
+# }}}
+
+# stochastic integrators {{{
+
+def stochastic_integrators():
+    from tvb.simulator.integrators import IntegratorStochastic
+    return [I for I in integrators() if issubclass(I, IntegratorStochastic)]
+
+
+def eps_for_stochastic(Integrator, Noise, n_node, time_limit=0.5, method='scheme'):
+    integ = Integrator(noise=Noise(nsig=numpy.array([1e-3])))
+    integ.configure()
+    X = numpy.random.randn(2, n_node, 1)
+    integ.noise.configure_white(integ.dt, X.shape)
+    scheme = getattr(integ, method)
+    return eps_for_thunk(lambda: scheme(X, nop_dfun, None, None, 0.0), time_limit)
+
+
+def noise_report():
+    "Stochastic integration steps with additive and multiplicative noise."
+    from tvb.simulator.noise import Additive, Multiplicative
+    n_nodes = [2 << i for i in range(14)]
+    sys.stdout.write('%30s' % ('n_node',))
+    [sys.stdout.write('%06s' % (n, )) for n in n_nodes]
+    sys.stdout.write('\n')
+    for Integrator in stochastic_integrators():
+        for Noise in (Additive, Multiplicative):
+            sys.stdout.write('%30s' % ('%s %s' % (Integrator.__name__, Noise.__name__), ))
+            for n_node in n_nodes:
+                sys.stdout.write('%06s' % ('%0.1f' % (eps_for_stochastic(Integrator, Noise, n_node) / 1e3, ), ))
+                sys.stdout.flush()
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+
+
+def fused_stochastic_report(n_nodes=(64, 1024, 16384)):
+    "Stochastic Heun and Euler-Maruyama steps, with the fused numba schemes and the NumPy ones."
+    from tvb.simulator.integrators import HeunStochastic, EulerStochastic
+    from tvb.simulator.noise import Additive, Multiplicative
+    sys.stdout.write('%46s' % ('n_node',))
+    [sys.stdout.write('%8s' % (n, )) for n in n_nodes]
+    sys.stdout.write('\n')
+    for Integrator in (HeunStochastic, EulerStochastic):
+        for Noise in (Additive, Multiplicative):
+            for method in ('scheme', '_numpy_scheme'):
+                name = '%s %s %s' % (Integrator.__name__, Noise.__name__, method)
+                sys.stdout.write('%46s' % (name, ))
+                for n_node in n_nodes:
+                    eps = eps_for_stochastic(Integrator, Noise, n_node, method=method)
+                    sys.stdout.write('%8s' % ('%0.2f' % (eps / 1e3, ), ))
+                    sys.stdout.flush()
+                sys.stdout.write('\n')
+                sys.stdout.flush()
+
 # }}}
 
 # models {{{ 
@@ -108,22 +284,172 @@ def zero_coupling_for_model(model, n_node):
     return coupling
 
 
-def eps_for_Model(Model, n_node, time_limit=0.5):
+def contrib_models():
+    "Contributed models keeping a NumPy reference dfun, imported as modules of their directory."
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contrib', 'simulator', 'models')
+    if path not in sys.path:
+        sys.path.append(path)
+    from tvb.simulator.models import Model
+    for name in sorted(os.listdir(path)):
+        # BrunelWang needs the nerf table of tvb_data
+        if not name.endswith('.py') or name == 'brunel_wang.py':
+            continue
+        mod = importlib.import_module(name[:-3])
+        for key in dir(mod):
+            attr = getattr(mod, key)
+            if isinstance(attr, type) and issubclass(attr, Model) and hasattr(attr, '_numpy_dfun'):
+                yield attr
+
+
+def eps_for_Model(Model, n_node, time_limit=0.5, method='dfun', configure=True):
     model = Model()
-    model.configure()
+    if configure:
+        model.configure()
+    else:
+        model.update_derived_parameters()
     state = randn_state_for_model(model, n_node)
     coupling = zero_coupling_for_model(model, n_node)
+    dfun = getattr(model, method)
     # throw one away in case of initialization
-    model.dfun(state, coupling)
+    dfun(state, coupling)
     # start timing
     tic = time.time()
     n_eval = 0
     while (time.time() - tic) < time_limit:
-        model.dfun(state, coupling)
+        dfun(state, coupling)
+        n_eval += 1
+    toc = time.time()
+    return n_eval / (toc - tic)
+
+
+def numba_dfun_report(n_nodes=(64, 1024, 16384)):
+    "Numba dfuns of the models keeping a NumPy reference, next to the NumPy ones."
+    sys.stdout.write('%50s' % ('n_node',))
+    [sys.stdout.write('%8s' % (n, )) for n in n_nodes]
+    sys.stdout.write('\n')
+    # the contributed models have no state variable names to configure with
+    Models = [(Model, Model.__name__, True) for Model in models() if hasattr(Model, '_numpy_dfun')]
+    Models += [(Model, 'contrib ' + Model.__name__, False) for Model in contrib_models()]
+    for Model, name, configure in Models:
+        for method in ('dfun', '_numpy_dfun'):
+            sys.stdout.write('%50s' % ('%s %s' % (name, method), ))
+            for n_node in n_nodes:
+                eps = eps_for_Model(Model, n_node, method=method, configure=configure)
+                sys.stdout.write('%8s' % ('%0.2f' % (eps / 1e3, ), ))
+                sys.stdout.flush()
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+
+# }}}
+
+# local coupling {{{
+
+def eps_for_thunk(thunk, time_limit=0.5):
+    thunk()
+    tic = time.time()
+    n_eval = 0
+    while (time.time() - tic) < time_limit:
+        thunk()
         n_eval += 1
     toc = time.time()
     return n_eval / (toc - tic)
 
+
+def local_coupling_report(n_svar=2):
+    "Local coupling of n_svar state variables on the default 16k cortex, per integration stage."
+    from tvb.datatypes.cortex import Cortex
+    from tvb.datatypes.local_connectivity import LocalConnectivity
+    from tvb.simulator.local_coupling import LocalCoupling
+    ctx = Cortex(load_default=True)
+    ctx.local_connectivity = LocalConnectivity(load_default=True)
+    ctx.configure()
+    matrix = ctx.local_connectivity.matrix
+    n_node = matrix.shape[0]
+    print('%d nodes, %d non-zeros, %d state variables' % (n_node, matrix.nnz, n_svar))
+    state = numpy.random.randn(n_svar, n_node, 1)
+
+    def scipy_per_svar():
+        for i in range(n_svar):
+            matrix * state[i]
+
+    def operator_staged(lc):
+        def thunk():
+            lc.stage(state)
+            for i in range(n_svar):
+                lc.product(state, i)
+            lc.unstage()
+        return thunk
+
+    thunks = [('scipy.sparse per svar', scipy_per_svar)]
+    for dtype in (numpy.float64, numpy.float32):
+        lc = LocalCoupling(matrix, n_node, dtype=dtype, coupled_state_variables=range(n_svar))
+        thunks.append(('LocalCoupling staged %s' % (numpy.dtype(dtype).name, ), operator_staged(lc)))
+    for name, thunk in thunks:
+        sys.stdout.write('%30s%06.1f\n' % (name, eps_for_thunk(thunk) / 1e3))
+        sys.stdout.flush()
+
+# }}}
+
+# adaptive integration {{{
+
+def simulate_region(model, integrator, length=100.0, period=1.0, dt_min=0.0025):
+    "Simulate the default connectivity, returning the subsampled states and the elapsed time."
+    from tvb.simulator.lab import connectivity, coupling, monitors, simulator
+    conn = connectivity.Connectivity(load_default=True)
+    # delays exact for all dt compared, and no zero delays, which restrict adaptive steps to dt
+    conn.speed = numpy.array([4.0])
+    conn.tract_lengths = numpy.round(conn.tract_lengths / 0.4) * 0.4
+    conn.weights[conn.tract_lengths == 0] = 0.0
+    conn.configure()
+    # constant initial history, with samples at the same times for all dt
+    n_time = int(round(period / dt_min)) * int(numpy.ceil(conn.delays.max() / period + 1)) + 1
+    init = numpy.array([numpy.mean(model.state_variable_range[name]) for name in model.state_variables])
+    init = numpy.tile(init.reshape((1, -1, 1, 1)), (n_time, 1, conn.number_of_regions, model.number_of_modes))
+    sim = simulator.Simulator(model=model, connectivity=conn, coupling=coupling.Linear(a=numpy.array([0.0152])),
+                              integrator=integrator, monitors=[monitors.SubSample(period=period)],
+                              simulation_length=length, initial_conditions=init).configure()
+    tic = time.time()
+    (_, states), = sim.run()
+    return states, time.time() - tic
+
+
+def adaptive_report(length=100.0):
+    "Error with respect to Heun at dt=0.0025 and simulated ms per second, for Heun and adaptive integrators."
+    from tvb.simulator.models import Generic2dOscillator, Epileptor
+    from tvb.simulator.integrators import HeunDeterministic, DormandPrinceDeterministic, Dopri5, VODE, SciPyIVP
+    integs = [(HeunDeterministic, 0.01), (HeunDeterministic, 0.05), (HeunDeterministic, 0.1),
+              (DormandPrinceDeterministic, 0.1), (Dopri5, 0.1), (VODE, 0.1), (SciPyIVP, 0.1)]
+    for Model in (Generic2dOscillator, Epileptor):
+        reference, _ = simulate_region(Model(), HeunDeterministic(dt=0.0025), length)
+        for Integrator, dt in integs:
+            states, elapsed = simulate_region(Model(), Integrator(dt=dt), length)
+            name = '%s %s dt=%g' % (Model.__name__, Integrator.__name__, dt)
+            sys.stdout.write('%60s%10.2e%10.1f\n' % (name, abs(states - reference).max(), length / elapsed))
+            sys.stdout.flush()
+
+
+def multi_rate_report(length=100.0, n_node=16384, slow_steps=(1, 10, 40)):
+    "Epileptor error with respect to Heun at dt=0.0025, and integration steps per second on many nodes."
+    from tvb.simulator.models import Epileptor
+    from tvb.simulator.integrators import HeunDeterministic, HeunMultiRate
+    model = Epileptor()
+    model.configure()
+    init = numpy.array([numpy.mean(model.state_variable_range[name]) for name in model.state_variables])
+    init = init.reshape((-1, 1, 1)) + 0.1 * numpy.random.randn(model.nvar, n_node, 1)
+    coupling = numpy.zeros((len(model.cvar), n_node, 1))
+    reference, _ = simulate_region(Epileptor(), HeunDeterministic(dt=0.0025), length)
+    integs = [HeunDeterministic(dt=0.05)] + [HeunMultiRate(dt=0.05, slow_steps=k) for k in slow_steps]
+    for integ in integs:
+        states, _ = simulate_region(Epileptor(), integ, length)
+        integ.slow_indices = model.slow_indices
+        integ.dfun_fast, integ.dfun_slow = model.dfun_fast, model.dfun_slow
+        state = [init]
+        def thunk():
+            state[0] = integ.scheme(state[0], model.dfun, coupling, 0.0, 0.0)
+        name = '%s slow_steps=%d' % (integ.__class__.__name__, getattr(integ, 'slow_steps', 1))
+        sys.stdout.write('%40s%10.2e%10.1f\n' % (name, abs(states - reference).max(), eps_for_thunk(thunk)))
+        sys.stdout.flush()
+
 # }}}
 
 def eps_report_for_components(comps, eps_func):
@@ -148,9 +474,23 @@ if __name__ == '__main__':
     print('units in kHz')
     print('benchmarking models')
     eps_report_for_components(models(), eps_for_Model)
+    print('benchmarking numba and NumPy model dfuns')
+    numba_dfun_report()
     print('benchmarking integrators')
     from tvb.simulator.integrators import RungeKutta4thOrderDeterministic
     integs = list(integrators()) + [RungeKutta4thOrderDeterministic]
     eps_report_for_components(integs, eps_for_Integrator)
+    print('arrays allocated per integration step')
+    alloc_report(integs)
+    print('benchmarking stochastic integrators with noise')
+    noise_report()
+    print('benchmarking fused stochastic schemes')
+    fused_stochastic_report()
+    print('benchmarking local coupling')
+    local_coupling_report()
+    print('benchmarking adaptive integration, max error and simulated ms per second')
+    adaptive_report()
+    print('benchmarking multi-rate integration, max error and steps per second on %d nodes' % (16384, ))
+    multi_rate_report()
 
 # vim: sw=4 sts=4 ai et foldmethod=marker
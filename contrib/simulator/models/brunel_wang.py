@@ -41,17 +41,20 @@ from tvb.basic.profile import TvbProfile
 TvbProfile.set_profile(TvbProfile.TEST_LIBRARY_PROFILE)
 
 import inspect
+import math
 import numpy
 import tvb.datatypes.arrays as arrays
 import tvb.datatypes.lookup_tables as lookup_tables
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64, njit
 from tvb.simulator.common import get_logger
 
 LOG = get_logger(__name__)
 
 
-class BrunelWang(models.Model):
+class BrunelWang(ModelNumbaDfun):
     """
     .. [DJ_2012] Deco G and Jirsa V. *Ongoing Cortical
         Activity at Rest: Criticality, Multistability, and Ghost Attractors*.
@@ -481,13 +484,13 @@ class BrunelWang(models.Model):
             if not k[0] == '_' and type(attr) in (numpy.ndarray, NoneType):
                 decl += '        %s = %r\n' % (k, attr)
 
-        decl += '\n'.join(inspect.getsource(self.dfun).split('\n')[1:]).replace("self.", "")
+        decl += '\n'.join(inspect.getsource(self._numpy_dfun).split('\n')[1:]).replace("self.", "")
         dikt = {'vint': self.vint, 'array': numpy.array, 'int32': numpy.int32, 'numpy': numpy}
         #print decl
         exec decl in dikt
         self.dfun = dikt[fnname]
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         """
         .. math::
              \tau_e*\\dot{\nu_e}(t) &= -\nu_e(t) + \\phi_e \\\\
@@ -619,6 +622,25 @@ class BrunelWang(models.Model):
         derivative = numpy.array([dE, dI])
         return derivative
 
+    # parameters of the kernel, which are more than a ufunc takes operands
+    _numba_parameters = ('wminus pool_fractions cgamma cbeta crho1_e crho1_i crho2_e crho2_i VE VI VL Text_e Text_i'
+                         ' nuext TAMPA_e TAMPA_i T_ei T_ii Cm_e Cm_i gm_e gm_i csigma_e csigma_i tauAMPA Vthr Vreset'
+                         ' taurp_e taurp_i').split()
+
+    def dfun(self, x, c, local_coupling=0.0):
+        # the NumPy dfun does not use the local coupling
+        # one vector of parameters per node
+        p = numpy.array(numpy.broadcast_arrays(*[getattr(self, name) for name in self._numba_parameters]))
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        table = self.nerf_table
+        deriv, ve, vi = _numba_dfun(x_, c_, p.T, numpy.ravel(self.ve), numpy.ravel(self.vi),
+                                    table.data, table.df, table.xmin, table.invdx, table.dx)
+        # the mean potentials carry over to the next call, as in the NumPy dfun
+        self.ve = ve.reshape(x.shape[1:])
+        self.vi = vi.reshape(x.shape[1:])
+        return deriv.T[..., numpy.newaxis]
+
     def update_derived_parameters(self):
         """
         Derived parameters
@@ -646,6 +668,96 @@ class BrunelWang(models.Model):
                         (self.gm_i * self.taum_i) ** 2
 
 
+@njit
+def _search_value(value, data, df, xmin, invdx, dx):
+    "Linear interpolation in a look up table, as LookUpTable.search_value."
+    y = value - xmin
+    ind = int(y * invdx)
+    if ind < 0 or ind >= df.size:
+        return numpy.nan
+    return data[ind] + df[ind] * (y - ind * dx)
+
+
+@guvectorize([(float64[:],) * 13], '(n),(m),(p),(),(),(t),(s),(),(),()->(n),(),()', nopython=True)
+def _numba_dfun(y, c, p, ve, vi, data, df, xmin, invdx, dx, ydot, ve_next, vi_next):
+    "Gufunc for the Brunel-Wang model equations."
+    wminus = p[0]
+    pool_fractions = p[1]
+    cgamma = p[2]
+    cbeta = p[3]
+    crho1_e = p[4]
+    crho1_i = p[5]
+    crho2_e = p[6]
+    crho2_i = p[7]
+    VE = p[8]
+    VI = p[9]
+    VL = p[10]
+    Text_e = p[11]
+    Text_i = p[12]
+    nuext = p[13]
+    TAMPA_e = p[14]
+    TAMPA_i = p[15]
+    T_ei = p[16]
+    T_ii = p[17]
+    Cm_e = p[18]
+    Cm_i = p[19]
+    gm_e = p[20]
+    gm_i = p[21]
+    csigma_e = p[22]
+    csigma_i = p[23]
+    tauAMPA = p[24]
+    Vthr = p[25]
+    Vreset = p[26]
+    taurp_e = p[27]
+    taurp_i = p[28]
+    E = y[0]
+    I = y[1]
+    # AMPA, NMDA and GABA (A) synapses
+    vn_e = c[0]
+    vn_i = E * wminus * pool_fractions
+    vN_e = c[1]
+    vN_i = E * wminus * pool_fractions
+    vni_e = wminus * I
+    vni_i = wminus * I
+    J_e = 1 + cgamma * math.exp(-cbeta * ve[0])
+    J_i = 1 + cgamma * math.exp(-cbeta * vi[0])
+    rho1_e = crho1_e / J_e
+    rho1_i = crho1_i / J_i
+    rho2_e = crho2_e * (ve[0] - VE) * (J_e - 1) / J_e ** 2
+    rho2_i = crho2_i * (vi[0] - VI) * (J_i - 1) / J_i ** 2
+    vS_e = 1 + Text_e * nuext + TAMPA_e * vn_e + (rho1_e + rho2_e) * vN_e + T_ei * vni_e
+    vS_i = 1 + Text_i * nuext + TAMPA_i * vn_i + (rho1_i + rho2_i) * vN_i + T_ii * vni_i
+    vtau_e = Cm_e / (gm_e * vS_e)
+    vtau_i = Cm_i / (gm_i * vS_i)
+    vmu_e = (rho2_e * vN_e * ve[0] + T_ei * vni_e * VI + VL) / vS_e
+    vmu_i = (rho2_i * vN_i * vi[0] + T_ii * vni_i * VI + VL) / vS_i
+    vsigma_e = math.sqrt((ve[0] - VE) ** 2 * vtau_e * csigma_e * nuext)
+    vsigma_i = math.sqrt((vi[0] - VE) ** 2 * vtau_i * csigma_i * nuext)
+    k_e = tauAMPA / vtau_e
+    k_i = tauAMPA / vtau_i
+    # integration limits
+    alpha_e = (Vthr - vmu_e) / vsigma_e * (1.0 + 0.5 * k_e) + 1.03 * math.sqrt(k_e) - 0.5 * k_e
+    if alpha_e > 19:
+        alpha_e = 19.0
+    alpha_i = (Vthr - vmu_i) / vsigma_i * (1.0 + 0.5 * k_i) + 1.03 * math.sqrt(k_i) - 0.5 * k_i
+    if alpha_i > 19:
+        alpha_i = 19.0
+    beta_e = (Vreset - vmu_e) / vsigma_e
+    if beta_e > 19:
+        beta_e = 19.0
+    v_ae = _search_value(alpha_e, data, df, xmin[0], invdx[0], dx[0])
+    v_ai = _search_value(alpha_i, data, df, xmin[0], invdx[0], dx[0])
+    v_be = _search_value(beta_e, data, df, xmin[0], invdx[0], dx[0])
+    # the NumPy dfun looks up beta_e for the inhibitory population as well
+    v_bi = v_be
+    Phi_e = 1 / (taurp_e + vtau_e * math.sqrt(math.pi) * (v_ae - v_be))
+    Phi_i = 1 / (taurp_i + vtau_i * math.sqrt(math.pi) * (v_ai - v_bi))
+    ve_next[0] = - (Vthr - Vreset) * E * vtau_e + vmu_e
+    vi_next[0] = - (Vthr - Vreset) * I * vtau_i + vmu_i
+    ydot[0] = (-E + Phi_e) / vtau_e
+    ydot[1] = (-I + Phi_i) / vtau_i
+
+
 if __name__ == "__main__":
     # Do some stuff that tests or makes use of this module...
     LOG.info("Testing %s module..." % __file__)
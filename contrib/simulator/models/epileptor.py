@@ -45,9 +45,11 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
 
-class HMJEpileptor(models.Model):
+class HMJEpileptor(ModelNumbaDfun):
     """
     The Epileptor is a composite neural mass model of six dimensions which 
     has be crafted to model the phenomenology of epileptic seizures.
@@ -204,7 +206,7 @@ class HMJEpileptor(models.Model):
 
         LOG.debug("%s: init'ed." % (repr(self),))
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0,
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0,
              array=numpy.array, where=numpy.where, concat=numpy.concatenate):
         """
         Computes the derivatives of the state variables of the Epileptor 
@@ -290,4 +292,35 @@ class HMJEpileptor(models.Model):
         # 
         # ydot = [ydot1;ydot2;ydot3;ydot4;ydot5;ydot6];
 
-        return concat((pop1, pop2, energy))
\ No newline at end of file
+        return concat((pop1, pop2, energy))
+
+    def dfun(self, x, c, local_coupling=0.0):
+        # as in the NumPy dfun, the local coupling is added to the external current of the first population
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self.a, self.b, self.c, self.d, self.r, self.s, self.x0, self.Iext,
+                            self.slope, self.Iext2, self.tau, self.aa, self.Kpop1, self.Kpop2, local_coupling)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 18], '(n),(m)' + ',()' * 15 + '->(n)', nopython=True)
+def _numba_dfun(y, coupling, a, b, c, d, r, s, x0, Iext, slope, Iext2, tau, aa, Kpop1, Kpop2, lc, ydot):
+    "Gufunc for the Epileptor model equations."
+    c_pop1 = coupling[0]
+    c_pop2 = coupling[1]
+    iext = Iext[0] + c_pop1 + lc[0]
+    # population 1
+    if y[0] < 0.0:
+        ydot[0] = y[1] - a[0] * y[0] ** 3 + b[0] * y[0] ** 2 - y[2] + iext
+    else:
+        ydot[0] = y[1] + (slope[0] - y[3] + 0.6 * (y[2] - 4.0) ** 2) * y[0] - y[2] + iext
+    ydot[1] = c[0] - d[0] * y[0] ** 2 - y[1]
+    ydot[2] = r[0] * (s[0] * (y[0] - x0[0]) - y[2] - Kpop1[0] * (c_pop1 - y[0]))
+    # population 2
+    ydot[3] = -y[4] + y[3] - y[3] ** 3 + Iext2[0] + 2 * y[5] - 0.3 * (y[2] - 3.5) + Kpop2[0] * (c_pop2 - y[3])
+    if y[3] < -0.25:
+        ydot[4] = -y[4] / tau[0]
+    else:
+        ydot[4] = (-y[4] + aa[0] * (y[3] + 0.25)) / tau[0]
+    # energy
+    ydot[5] = -0.01 * (y[5] - 0.1 * y[0])
@@ -45,10 +45,12 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
 
 
-class Generic2dOscillator(models.Model):
+class Generic2dOscillator(ModelNumbaDfun):
     """
     The Generic2dOscillator model is ...
     
@@ -85,7 +87,7 @@ class Generic2dOscillator(models.Model):
     tau = arrays.FloatArray(
         label = ":math:`\\tau`",
         default = numpy.array([1.25]),
-        range = Range(lo = 0.01, hi = 5.0, step = 0.01),
+        range = basic.Range(lo = 0.01, hi = 5.0, step = 0.01),
         doc = """A time-scale separation between the fast, :math:`V`, and slow,
             :math:`W`, state-variables of the model.""")
     
@@ -161,7 +163,7 @@ class Generic2dOscillator(models.Model):
         LOG.debug("%s: inited." % repr(self))
     
     
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         """
         The fast, :math:`V`, and slow, :math:`W`, state variables are typically
         considered to represent a membrane potential and recovery variable,
@@ -208,4 +210,18 @@ class Generic2dOscillator(models.Model):
         
         return derivative
 
+    def dfun(self, x, c, local_coupling=0.0):
+        lc_0 = local_coupling * x[0, :, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self.tau, self.a, self.b, self.omega, self.upsilon, self.gamma, self.eta, lc_0)
+        return deriv.T[..., numpy.newaxis]
 
+
+@guvectorize([(float64[:],) * 11], '(n),(m)' + ',()' * 8 + '->(n)', nopython=True)
+def _numba_dfun(y, c, tau, a, b, omega, upsilon, gamma, eta, lc_0, dx):
+    "Gufunc for the generic 2d oscillator equations."
+    V = y[0]
+    W = y[1]
+    dx[0] = tau[0] * (omega[0] * W + upsilon[0] * V - gamma[0] * V ** 3.0 / 3.0 + c[0] + lc_0[0])
+    dx[1] = (a[0] - eta[0] * V - b[0] * W) / tau[0]
@@ -48,9 +48,11 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
 
-class HindmarshRose(models.Model):
+class HindmarshRose(ModelNumbaDfun):
     """
     The Hindmarsh-Rose model is a mathematically simple model for repetitive
     bursting.
@@ -182,7 +184,7 @@ class HindmarshRose(models.Model):
         LOG.debug('%s: inited.' % repr(self))
     
     
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         """
         As in the FitzHugh-Nagumo model ([FH_1961]_), :math:`x` and :math:`y`
         signify the membrane potential and recovery variable respectively.
@@ -216,3 +218,18 @@ class HindmarshRose(models.Model):
         
         return derivative
 
+    def dfun(self, x, c, local_coupling=0.0):
+        lc_0 = local_coupling * x[0, :, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self.a, self.b, self.c, self.d, self.r, self.s, self.x_1, lc_0)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 11], '(n),(m)' + ',()' * 8 + '->(n)', nopython=True)
+def _numba_dfun(y, coupling, a, b, c, d, r, s, x_1, lc_0, dx):
+    "Gufunc for the Hindmarsh-Rose model equations."
+    x = y[0]
+    dx[0] = y[1] - a[0] * x ** 3 + b[0] * x ** 2 - y[2] + coupling[0] + lc_0[0]
+    dx[1] = c[0] - d[0] * x ** 2 - y[1]
+    dx[2] = r[0] * (s[0] * (x - x_1[0]) - y[2])
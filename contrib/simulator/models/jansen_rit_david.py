@@ -36,6 +36,7 @@ A contributed model: The Jansen and Rit model as presented in (David et al., 200
 """
 
 # Third party python libraries
+import math
 import numpy
 
 #The Virtual Brain
@@ -45,9 +46,11 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
 
-class JansenRitDavid(models.Model):
+class JansenRitDavid(ModelNumbaDfun):
     """
     The Jansen and Rit models as studied by David et al., 2005
     #TODO: finish this model
@@ -186,7 +189,7 @@ class JansenRitDavid(models.Model):
         LOG.debug('%s: inited.' % repr(self))
 
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
         The dynamic equations were taken from:
 
@@ -241,3 +244,36 @@ class JansenRitDavid(models.Model):
         derivative = numpy.array([dx0, dx1, dx2, dx3, dx4, dx5, dx6, dx7])
 
         return derivative
+
+    def dfun(self, x, c, local_coupling=0.0):
+        # the local coupling terms of the NumPy dfun do not enter its derivatives
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self.He, self.Hi, self.tau_e, self.tau_i, self.eo, self.r,
+                            self.gamma_1, self.gamma_2, self.gamma_3, self.gamma_4)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 13], '(n),(m)' + ',()' * 10 + '->(n)', nopython=True)
+def _numba_dfun(x, c, He, Hi, tau_e, tau_i, eo, r, gamma_1, gamma_2, gamma_3, gamma_4, dx):
+    "Gufunc for the Jansen-Rit-David model equations."
+    AF = 0.1
+    AB = 0.2
+    AL = 0.05
+    y = x[1] - x[2]
+    c_12 = c[0] - c[1]
+    S_c_12 = (2 * eo[0]) / (1 + math.exp(r[0] * c_12)) - eo[0]
+    c_12_f = AF * S_c_12
+    c_12_b = AB * S_c_12
+    c_12_l = AL * S_c_12
+    S_y = (2 * eo[0]) / (1 + math.exp(r[0] * y)) - eo[0]
+    S_x0 = (2 * eo[0]) / (1 + math.exp(r[0] * x[0])) - eo[0]
+    S_x6 = (2 * eo[0]) / (1 + math.exp(r[0] * x[6])) - eo[0]
+    dx[0] = x[3]
+    dx[1] = x[4]
+    dx[2] = x[5]
+    dx[3] = He[0] / tau_e[0] * (c_12_f + c_12_l + gamma_1[0] * S_y) - (2 * x[3]) / tau_e[0] - (x[0] / tau_e[0] ** 2)
+    dx[4] = He[0] / tau_e[0] * (c_12_b + c_12_l + gamma_2[0] * S_x0) - (2 * x[4]) / tau_e[0] - (x[1] / tau_e[0] ** 2)
+    dx[5] = Hi[0] / tau_i[0] * (gamma_4[0] * S_x6) - (2 * x[5]) / tau_i[0] - (x[2] / tau_i[0] ** 2)
+    dx[6] = x[7]
+    dx[7] = He[0] / tau_e[0] * (c_12_b + c_12_l + gamma_3[0] * S_y) - (2 * x[7]) / tau_e[0] - (x[6] / tau_e[0] ** 2)
@@ -39,6 +39,7 @@ A contributed model: Larter
 """
 
 # Third party python libraries
+import math
 import numpy
 
 #The Virtual Brain
@@ -48,10 +49,12 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
 
 
-class Larter(models.Model):
+class Larter(ModelNumbaDfun):
     """
     A modified Morris-Lecar model that includes a third equation which simulates
     the effect of a population of inhibitory interneurons synapsing on
@@ -280,7 +283,7 @@ class Larter(models.Model):
         LOG.debug('%s: inited.' % repr(self))
     
     
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         """
         .. math::
              \\dot{V} &= - g_L \\, (V - V_L) - g_K\\, Z \\, (V - V_K) -
@@ -322,3 +325,29 @@ class Larter(models.Model):
         
         return derivative
 
+    def dfun(self, x, c, local_coupling=0.0):
+        lc_0 = local_coupling * x[0, :, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self.V1, self.V2, self.V3, self.V4, self.V5, self.V6, self.V7,
+                            self.a_exc, self.a_inh, self.gL, self.VL, self.gCa, self.gK, self.VK,
+                            self.Iext, self.phi, self.b, self.c, lc_0)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 22], '(n),(m)' + ',()' * 19 + '->(n)', nopython=True)
+def _numba_dfun(y, coupling, V1, V2, V3, V4, V5, V6, V7, a_exc, a_inh, gL, VL, gCa, gK, VK, Iext, phi, b, c,
+                lc_0, dx):
+    "Gufunc for the Larter model equations."
+    V = y[0]
+    W = y[1]
+    Z = y[2]
+    M_inf = 0.5 * (1 + math.tanh((V - V1[0]) / V2[0]))
+    W_inf = 0.5 * (1 + math.tanh((V - V3[0]) / V4[0]))
+    tau_Winv = math.cosh((V - V3[0]) / (2 * V4[0]))
+    alpha_exc = a_exc[0] * (1 + math.tanh((V - V5[0]) / V6[0]))
+    alpha_inh = a_inh[0] * (1 + math.tanh((V - V7[0]) / V6[0]))
+    dx[0] = (lc_0[0] - alpha_inh * Z - gL[0] * (V - VL[0]) - gCa[0] * M_inf * (V - 1)
+             - gK[0] * W * (V - VK[0] + coupling[0]) + Iext[0])
+    dx[1] = phi[0] * tau_Winv * (W_inf - W)
+    dx[2] = b[0] * ((c[0] * Iext[0]) + (alpha_exc * V))
@@ -36,6 +36,7 @@ A contributed model: Larter model revisited by Breaskpear M.
 """
 
 # Third party python libraries
+import math
 import numpy
 
 #The Virtual Brain
@@ -45,8 +46,10 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
-class LarterBreakspear(models.Model):
+class LarterBreakspear(ModelNumbaDfun):
     """
     A modified Morris-Lecar model that includes a third equation which simulates
     the effect of a population of inhibitory interneurons synapsing on
@@ -399,7 +402,7 @@ class LarterBreakspear(models.Model):
         LOG.debug('%s: inited.' % repr(self))
     
     
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         """
         .. math::
              \\dot{V} &= - (g_{Ca} + (1 - C) \\, r_{NMDA} \\, a_{ee} Q_V^i +
@@ -447,6 +450,68 @@ class LarterBreakspear(models.Model):
         
         return derivative
 
+    # parameters of the kernel, which are more than a ufunc takes operands
+    _numba_parameters = ('TCa d_Ca TNa d_Na TK d_K QV_max VT d_V QZ_max ZT d_Z gCa C rNMDA aee VCa gK VK'
+                         ' gL VL gNa VNa aei ane Iext phi tau_K b ani').split()
+
+    def dfun(self, x, c, local_coupling=0.0):
+        # the NumPy dfun does not use the local coupling
+        # one vector of parameters per node
+        p = numpy.array(numpy.broadcast_arrays(*[getattr(self, name) for name in self._numba_parameters]))
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, p.T)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 4], '(n),(m),(p)->(n)', nopython=True)
+def _numba_dfun(y, c, p, dx):
+    "Gufunc for the Larter-Breakspear model equations."
+    TCa = p[0]
+    d_Ca = p[1]
+    TNa = p[2]
+    d_Na = p[3]
+    TK = p[4]
+    d_K = p[5]
+    QV_max = p[6]
+    VT = p[7]
+    d_V = p[8]
+    QZ_max = p[9]
+    ZT = p[10]
+    d_Z = p[11]
+    gCa = p[12]
+    C = p[13]
+    rNMDA = p[14]
+    aee = p[15]
+    VCa = p[16]
+    gK = p[17]
+    VK = p[18]
+    gL = p[19]
+    VL = p[20]
+    gNa = p[21]
+    VNa = p[22]
+    aei = p[23]
+    ane = p[24]
+    Iext = p[25]
+    phi = p[26]
+    tau_K = p[27]
+    b = p[28]
+    ani = p[29]
+    V = y[0]
+    W = y[1]
+    Z = y[2]
+    c_0 = c[0]
+    m_Ca = 0.5 * (1 + math.tanh((V - TCa) / d_Ca))
+    m_Na = 0.5 * (1 + math.tanh((V - TNa) / d_Na))
+    m_K = 0.5 * (1 + math.tanh((V - TK) / d_K))
+    QV = 0.5 * QV_max * (1 + math.tanh((V - VT) / d_V))
+    QZ = 0.5 * QZ_max * (1 + math.tanh((Z - ZT) / d_Z))
+    dx[0] = (- (gCa + (1.0 - C) * rNMDA * aee * QV + C * rNMDA * aee * c_0) * m_Ca * (V - VCa)
+             - gK * W * (V - VK) - gL * (V - VL)
+             - (gNa * m_Na + (1.0 - C) * aee * QV + C * aee * c_0) * (V - VNa) - aei * Z * QZ + ane * Iext)
+    dx[1] = phi * (m_K - W) / tau_K
+    dx[2] = b * (ani * Iext + aei * V * QV)
+
 
 if __name__ == "__main__":
     # Do some stuff that tests or makes use of this module...
@@ -36,6 +36,7 @@ A contributed model: The Liley model as presented in Steyn-Ross et al., 1999
 """
 
 # Third party python libraries
+import math
 import numpy
 
 #The Virtual Brain
@@ -45,9 +46,11 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
 
-class LileySteynRoss(models.Model):     
+class LileySteynRoss(ModelNumbaDfun):     
     """
     Liley lumped model as presented in Steyn-Ross et al 1999.
 
@@ -348,7 +351,7 @@ class LileySteynRoss(models.Model):
         LOG.debug('%s: inited.' % repr(self))
 
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
 
         TODO:  include equations here and see how to add the local connectivity or the 
@@ -391,4 +394,43 @@ class LileySteynRoss(models.Model):
 
         derivative = numpy.array([dhe, dhi])
 
-        return derivative
\ No newline at end of file
+        return derivative
+
+    def update_derived_parameters(self):
+        """
+        Combinations of the parameters taken by the numba dfun, one vector per
+        node, so that they are computed once rather than for every node.
+
+        """
+        w_e = self.G_e / self.gamma_e
+        w_i = self.G_i / self.gamma_i
+        self._dfun_parameters = numpy.array(numpy.broadcast_arrays(
+            self.h_e_rev, self.h_i_rev, self.h_e_rest, self.h_i_rest, self.g_e, self.theta_e, self.g_i, self.theta_i,
+            1.0 / abs(self.h_e_rev - self.h_e_rest), 1.0 / abs(self.h_e_rev - self.h_i_rest),
+            1.0 / abs(self.h_i_rev - self.h_e_rest), 1.0 / abs(self.h_i_rev - self.h_i_rest),
+            (self.N_a_ee + self.N_b_ee) * w_e, self.p_ee * w_e, self.lambd * self.N_b_ie * w_i,
+            self.lambd * self.p_ie * w_i, (self.N_a_ei + self.N_b_ei) * w_e, self.p_ei * w_e,
+            self.lambd * self.N_b_ii * w_i, self.lambd * self.p_ii * w_i, 1.0 / self.tau_e, 1.0 / self.tau_i)).T
+
+    def dfun(self, x, c, local_coupling=0.0):
+        # the NumPy dfun does not use the local coupling
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self._dfun_parameters)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 4], '(n),(m),(p)->(n)', nopython=True)
+def _numba_dfun(y, c, p, dx):
+    "Gufunc for the Liley-Steyn-Ross model equations, on the parameters combined in update_derived_parameters."
+    h_e_rev, h_i_rev, h_e_rest, h_i_rest, g_e, theta_e, g_i, theta_i = p[0], p[1], p[2], p[3], p[4], p[5], p[6], p[7]
+    he = y[0]
+    hi = y[1]
+    psi_ee = (h_e_rev - he) * p[8]
+    psi_ei = (h_e_rev - hi) * p[9]
+    psi_ie = (h_i_rev - he) * p[10]
+    psi_ii = (h_i_rev - hi) * p[11]
+    S_e = 1.0 / (1.0 + math.exp(-g_e * (he + c[0] - theta_e)))
+    S_i = 1.0 / (1.0 + math.exp(-g_i * (hi + c[0] - theta_i)))
+    dx[0] = ((h_e_rest - he) + psi_ee * (p[12] * S_e + p[13]) + psi_ie * (p[14] * S_i + p[15])) * p[20]
+    dx[1] = ((h_i_rest - hi) + psi_ei * (p[16] * S_e + p[17]) + psi_ii * (p[18] * S_i + p[19])) * p[21]
@@ -39,6 +39,7 @@ A contributed model: Morris-Lecar
 """
 
 # Third party python libraries
+import math
 import numpy
 
 #The Virtual Brain
@@ -48,10 +49,12 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
 
 
-class MorrisLecar(models.Model):
+class MorrisLecar(ModelNumbaDfun):
     """
     The Morris-Lecar model is a mathematically simple excitation model having
     two nonlinear, non-inactivating conductances.
@@ -217,7 +220,7 @@ class MorrisLecar(models.Model):
         LOG.debug('%s: inited.' % repr(self))
     
     
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         """
         The dynamics of the membrane potential :math:`V` rely on the fraction
         of Ca++ channels :math:`M` and K+ channels :math:`N` open at a given
@@ -260,3 +263,33 @@ class MorrisLecar(models.Model):
         
         return derivative
 
+    def update_derived_parameters(self):
+        """
+        Combinations of the parameters taken by the numba dfun, one vector per
+        node, so that they are computed once rather than for every node.
+
+        """
+        self._dfun_parameters = numpy.array(numpy.broadcast_arrays(
+            self.V1, 1.0 / self.V2, self.V3, 1.0 / self.V4, self.lambda_Nbar, 1.0 / (2.0 * self.V4), 1.0 / self.C,
+            self.gL, self.VL, self.gCa, self.VCa, self.gK, self.VK)).T
+
+    def dfun(self, x, c, local_coupling=0.0):
+        lc_0 = local_coupling * x[0, :, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self._dfun_parameters, lc_0)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 5], '(n),(m),(p),()->(n)', nopython=True)
+def _numba_dfun(y, c, p, lc_0, dx):
+    "Gufunc for the Morris-Lecar model equations, on the parameters combined in update_derived_parameters."
+    V1, inv_V2, V3, inv_V4, lambda_Nbar, inv_2V4, inv_C = p[0], p[1], p[2], p[3], p[4], p[5], p[6]
+    gL, VL, gCa, VCa, gK, VK = p[7], p[8], p[9], p[10], p[11], p[12]
+    V = y[0]
+    N = y[1]
+    M_inf = 0.5 * (1 + math.tanh((V - V1) * inv_V2))
+    N_inf = 0.5 * (1 + math.tanh((V - V3) * inv_V4))
+    lambda_N = lambda_Nbar * math.cosh((V - V3) * inv_2V4)
+    dx[0] = inv_C * (c[0] + lc_0[0] - gL * (V - VL) - gCa * M_inf * (V - VCa) - gK * N * (V - VK))
+    dx[1] = lambda_N * (N_inf - N)
@@ -39,6 +39,7 @@ The original Wong and Wang model
 
 
 # Third party python libraries
+import math
 import numpy
 
 #The Virtual Brain
@@ -48,8 +49,10 @@ LOG = get_logger(__name__)
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.types_basic as basic 
 import tvb.simulator.models as models
+from tvb.simulator.models.base import ModelNumbaDfun
+from numba import guvectorize, float64
 
-class WongWang(models.Model):
+class WongWang(ModelNumbaDfun):
     """
     .. [WW_2006] Kong-Fatt Wong and Xiao-Jing Wang,  *A Recurrent Network 
                 Mechanism of Time Integration in Perceptual Decisions*. 
@@ -238,7 +241,7 @@ class WongWang(models.Model):
         self.update_derived_parameters()
 
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
         The notation of those dynamic equations follows [WW_2007].
         Derivatives of s are multiplied by 0.001 constant to match ms time scale.
@@ -262,6 +265,17 @@ class WongWang(models.Model):
         derivative = numpy.array([ds1, ds2])
         return derivative
 
+    def dfun(self, x, c, local_coupling=0.0):
+        lc_0_l = local_coupling * x[0, :, 0]
+        lc_0_r = local_coupling * x[1, :, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        # the derived currents are expanded for broadcasting with the NumPy dfun
+        deriv = _numba_dfun(x_, c_, self.Jll, self.Jlr, self.Jrr, self.Jrl,
+                            self.I_mot_l.ravel(), self.I_mot_r.ravel(), self.I_o, self.J_N,
+                            self.a, self.b, self.d, self.tau_s, self.gamma, lc_0_l, lc_0_r)
+        return deriv.T[..., numpy.newaxis]
+
 
     def update_derived_parameters(self):
         """
@@ -275,6 +289,20 @@ class WongWang(models.Model):
             self.I_mot_r = numpy.expand_dims(self.I_mot_r, -1)
 
 
+@guvectorize([(float64[:],) * 18], '(n),(m)' + ',()' * 15 + '->(n)', nopython=True)
+def _numba_dfun(y, c, Jll, Jlr, Jrr, Jrl, I_mot_l, I_mot_r, I_o, J_N, a, b, d, tau_s, gamma, lc_0_l, lc_0_r, dx):
+    "Gufunc for the Wong-Wang model equations."
+    sl = y[0]
+    sr = y[1]
+    I_l = Jll[0] * sl - Jlr[0] * sr + I_mot_l[0] + I_o[0] + J_N[0] * c[0] + J_N[0] * lc_0_l[0]
+    I_r = Jrr[0] * sr - Jrl[0] * sl + I_mot_r[0] + I_o[0] + J_N[0] * c[0] + J_N[0] * lc_0_r[0]
+    x_l = a[0] * I_l - b[0]
+    x_r = a[0] * I_r - b[0]
+    r_l = x_l * 1. / (1 - math.exp(-d[0] * x_l))
+    r_r = x_r * 1. / (1 - math.exp(-d[0] * x_r))
+    dx[0] = -sl * 1. / tau_s[0] + (1 - sl) * gamma[0] * r_l * 0.001
+    dx[1] = -sr * 1. / tau_s[0] + (1 - sr) * gamma[0] * r_r * 0.001
+
 
 if __name__ == "__main__":
     # Do some stuff that tests or makes use of this module...
@@ -45,6 +45,7 @@ import tvb.datatypes.graph as graph
 import tvb.basic.traits.core as core
 import tvb.basic.traits.types_basic as basic
 import tvb.basic.traits.util as util
+from tvb.analyzers.node_covariance import second_moments
 from tvb.basic.logger.builder import get_logger
 
 LOG = get_logger(__name__)
@@ -100,22 +101,14 @@ class CorrelationCoefficient(core.Type):
         result_shape = self.result_shape(input_shape)
         LOG.info("result shape will be: %s" % str(result_shape))
 
-        result = numpy.zeros(result_shape)
-
-
         t_lo = int((1. / self.time_series.sample_period) * (self.t_start - self.time_series.sample_period))
         t_hi = int((1. / self.time_series.sample_period) * (self.t_end - self.time_series.sample_period))
         t_lo = max(t_lo, 0)
         t_hi = max(t_hi, input_shape[0])
 
         #One correlation coeff matrix, for each state-var & mode.
-        for mode in range(result_shape[3]):
-            for var in range(result_shape[2]):
-                current_slice = tuple([slice(t_lo, t_hi + 1), slice(var, var + 1),
-                                       slice(input_shape[2]), slice(mode, mode + 1)])
-                data = self.time_series.read_data_slice(current_slice).squeeze()
-                result[:, :, var, mode] = numpy.corrcoef(data.T)
-
+        moments = second_moments(self.time_series, slice(t_lo, t_hi + 1))
+        result = numpy.ascontiguousarray(moments.correlation().transpose((2, 3, 0, 1)))
 
         util.log_debug_array(LOG, result, "result")
 
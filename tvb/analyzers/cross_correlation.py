@@ -40,12 +40,51 @@ import numpy
 import tvb.datatypes.time_series as time_series
 import tvb.datatypes.temporal_correlations as temporal_correlations
 import tvb.basic.traits.core as core
+import tvb.basic.traits.types_basic as basic
 import tvb.basic.traits.util as util
-from scipy.signal.signaltools import correlate
+from scipy.fftpack import next_fast_len
 from tvb.basic.logger.builder import get_logger
 
 LOG = get_logger(__name__)
 
+# Upper bound, in bytes, for the cross-spectra held in memory at once.
+BLOCK_MEMORY = 2 ** 26
+
+
+
+def cross_correlate(data, lags, block_memory=BLOCK_MEMORY):
+    """
+    Cross-correlate all pairs of columns of a 2D (time, node) array, through FFT.
+
+    Each node is transformed once; the cross spectra are then formed for blocks of
+    node pairs and transformed back. Only pairs with i <= j are computed, the others
+    follow from C_ji(tau) = C_ij(-tau).
+
+    :param data: array of shape (tpts, nodes)
+    :param lags: integer lags (in time points) to keep, each with abs(lag) < tpts
+    :param block_memory: bound in bytes for the intermediate arrays of one block
+    :return: array of shape (len(lags), nodes, nodes), where
+             result[k, i, j] = sum_n data[n + lags[k], i] * data[n, j]
+    """
+    tpts, nodes = data.shape
+    lags = numpy.asarray(lags, dtype=numpy.intp)
+    # pad enough to avoid circular wrap-around for the requested lags
+    nfft = next_fast_len(tpts + int(numpy.abs(lags).max()))
+    lag_index, reverse_index = lags % nfft, -lags % nfft
+
+    spectra = numpy.fft.rfft(data.T, n=nfft, axis=-1)
+    result = numpy.empty((len(lags), nodes, nodes))
+
+    # one row of a block holds a complex cross spectrum and a real correlation per pair
+    row_bytes = nodes * (spectra.shape[-1] * 16 + nfft * 8)
+    block = int(max(1, block_memory // row_bytes))
+    for start in range(0, nodes, block):
+        stop = min(start + block, nodes)
+        cross = spectra[start:stop, numpy.newaxis] * spectra[numpy.newaxis, start:].conj()
+        corr = numpy.fft.irfft(cross, n=nfft, axis=-1)
+        result[:, start:stop, start:] = corr[..., lag_index].transpose((2, 0, 1))
+        result[:, start:, start:stop] = corr[..., reverse_index].transpose((2, 1, 0))
+    return result
 
 
 
@@ -63,6 +102,14 @@ class CrossCorrelate(core.Type):
         label="Time Series",
         required=True,
         doc="""The time-series for which the cross correlation sequences are calculated.""")
+
+    max_lag = basic.Float(
+        label="Maximum lag (ms)",
+        default=None,
+        required=False,
+        doc="""When given, only offsets within +/- max_lag are kept in the result,
+        which reduces its size accordingly. By default all offsets are kept, as for
+        scipy.signal.correlate with mode="same".""")
     
     
     def evaluate(self):
@@ -77,23 +124,18 @@ class CrossCorrelate(core.Type):
         LOG.info("result shape will be: %s" % str(result_shape))
         
         result = numpy.zeros(result_shape)
-        
-        #TODO: For region level, 4s, 2000Hz, this takes ~3hours...(which makes node_coherence seem positively speedy...)
-        # Probably best to add a keyword for offsets, so we just compute +- some "small" range...
+        lags = self._lags(self.time_series.data.shape[0])
+
         # One inter-node correlation, across offsets, for each state-var & mode.
         for mode in range(result_shape[4]):
             for var in range(result_shape[3]):
                 data = self.time_series.data[:, var, :, mode]
                 data = data - data.mean(axis=0)[numpy.newaxis, :]
-                #TODO: Work out a way around the 4 level loop:
-                for n1 in range(result_shape[1]):
-                    for n2 in range(result_shape[2]):
-                        result[:, n1, n2, var, mode] = correlate(data[:, n1], data[:, n2], mode="same")
+                result[:, :, :, var, mode] = cross_correlate(data, lags)
         
         util.log_debug_array(LOG, result, "result")
         
-        offset = (self.time_series.sample_period *
-                  numpy.arange(-numpy.floor(result_shape[0] / 2.0), numpy.ceil(result_shape[0] / 2.0)))
+        offset = self.time_series.sample_period * lags
 
         cross_corr = temporal_correlations.CrossCorrelation(
             source=self.time_series,
@@ -102,11 +144,20 @@ class CrossCorrelate(core.Type):
             use_storage=False)
         
         return cross_corr
+
+
+    def _lags(self, tpts):
+        """Offsets, in time points, kept in the result."""
+        lags = numpy.arange(-(tpts // 2), tpts - tpts // 2)
+        if self.max_lag is not None:
+            max_lag = int(round(self.max_lag / self.time_series.sample_period))
+            lags = lags[numpy.abs(lags) <= max_lag]
+        return lags
     
     
     def result_shape(self, input_shape):
         """Returns the shape of the main result of ...."""
-        result_shape = (input_shape[0], input_shape[2], input_shape[2], input_shape[1], input_shape[3])
+        result_shape = (len(self._lags(input_shape[0])), input_shape[2], input_shape[2], input_shape[1], input_shape[3])
         return result_shape
     
     
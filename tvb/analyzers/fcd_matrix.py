@@ -35,6 +35,9 @@ Adapter that uses the traits module to generate interfaces for ... Analyzer.
 .. moduleauthor:: Marmaduke Woodman <mmwoodman@gmail.com>
 
 """
+import os
+import shutil
+import tempfile
 import numpy as np
 import tvb.datatypes.time_series as time_series
 from tvb.basic.traits import core, types_basic, util
@@ -47,6 +50,9 @@ from numpy import linalg
 
 LOG = get_logger(__name__)
 
+# Upper bound, in bytes, for the FC stream held in memory; larger streams are kept in a temporary memmap.
+FC_STREAM_MEMORY = 2 ** 30
+
 
 class FcdCalculator(core.Type):
     """
@@ -114,27 +120,28 @@ class FcdCalculator(core.Type):
         result_shape = self.result_shape(input_shape)
 
         fcd = np.zeros(result_shape)
-        fc_stream = {}  # dict where the fc calculated over the sliding window will be stored
+        n_pairs = input_shape[2] * (input_shape[2] - 1) // 2
         for mode in range(result_shape[3]):
             for var in range(result_shape[2]):
-                start = -sp  # in order to well initialize the first starting point of the FC stream
-                for nfcd in range(result_shape[0]):
-                    start += sp
-                    current_slice = tuple([slice(int(start), int(start + sw) + 1), slice(var, var + 1),
-                                           slice(input_shape[2]), slice(mode, mode + 1)])
-                    data = self.time_series.read_data_slice(current_slice).squeeze()
-                    fc = np.corrcoef(data.T)
-                    # the triangular part of the fc is organized as a vector, excluding the diagonal (always ones)
-                    triangular = np.triu_indices(len(fc), 1)
-                    fc_stream[nfcd] = fc[triangular]
-                for i in range(result_shape[0]):
-                    j = i
-                    while j < result_shape[0]:
-                        fci = fc_stream[i]
-                        fcj = fc_stream[j]
-                        fcd[i, j, var, mode] = np.corrcoef(fci, fcj)[0, 1]
-                        fcd[j, i, var, mode] = fcd[i, j, var, mode]
-                        j += 1
+                current_slice = tuple([slice(input_shape[0]), slice(var, var + 1),
+                                       slice(input_shape[2]), slice(mode, mode + 1)])
+                data = self.time_series.read_data_slice(current_slice)[:, 0, :, 0]
+                # the FC stream may be too large for memory with long recordings; keep it on disk then
+                if result_shape[0] * n_pairs * 8 > FC_STREAM_MEMORY:
+                    # a file of our own in a private directory, as an open temporary file can not
+                    # be opened a second time by name on every platform
+                    stream_dir = tempfile.mkdtemp()
+                    try:
+                        fc_stream = np.lib.format.open_memmap(os.path.join(stream_dir, 'fc_stream.npy'),
+                                                              mode='w+', dtype=np.float64,
+                                                              shape=(result_shape[0], n_pairs))
+                        sliding_fc_stream(data, sp, sw, out=fc_stream)
+                        fcd[:, :, var, mode] = fcd_from_stream(fc_stream)
+                        del fc_stream
+                    finally:
+                        shutil.rmtree(stream_dir, ignore_errors=True)
+                else:
+                    fcd[:, :, var, mode] = fcd_from_stream(sliding_fc_stream(data, sp, sw, result_shape[0]))
 
         util.log_debug_array(LOG, fcd, "FCD")
 
@@ -211,6 +218,56 @@ class FcdCalculator(core.Type):
 
 
 # Methods:
+def sliding_fc_stream(data, sp, sw, n_windows=None, out=None):
+    """
+    Pearson correlation (FC) over sliding windows of a (time, node) array, as upper triangle vectors.
+
+    Window i covers the time points int(i * sp) to int(i * sp + sw) inclusive. Instead of
+    recomputing each window from scratch, the sums and cross products of the window are
+    updated with the time points which enter and leave it, as the window advances.
+
+    :param n_windows: number of windows; taken from out when given
+    :param out: optional (n_windows, n_pairs) array (e.g. a memmap) to store the stream into
+    :return: the FC stream, one row per window
+    """
+    n_nodes = data.shape[1]
+    n_windows = out.shape[0] if out is not None else n_windows
+    triangular = np.triu_indices(n_nodes, 1)
+    if out is None:
+        out = np.empty((n_windows, len(triangular[0])))
+    # correlation does not depend on the offset, centre to limit cancellation in the running sums
+    data = data - data.mean(axis=0)
+
+    start = stop = 0
+    sums = np.zeros(n_nodes)
+    cross = np.zeros((n_nodes, n_nodes))
+    for i in range(n_windows):
+        new_start, new_stop = int(i * sp), min(int(i * sp + sw) + 1, len(data))
+        if new_start >= stop:
+            # no overlap with the previous window
+            window = data[new_start:new_stop]
+            sums, cross = window.sum(axis=0), window.T.dot(window)
+        else:
+            entering, leaving = data[stop:new_stop], data[start:new_start]
+            sums += entering.sum(axis=0) - leaving.sum(axis=0)
+            cross += entering.T.dot(entering) - leaving.T.dot(leaving)
+        start, stop = new_start, new_stop
+        cov = cross - np.outer(sums, sums) / (stop - start)
+        std = np.sqrt(np.diag(cov))
+        out[i] = (cov / np.outer(std, std))[triangular]
+    return out
+
+
+def fcd_from_stream(fc_stream):
+    """
+    Pearson correlation between all pairs of rows (FC vectors) of the FC stream, as one matrix product.
+    The rows are standardized in place, which is why a (disk backed) stream is not copied.
+    """
+    fc_stream -= fc_stream.mean(axis=1)[:, np.newaxis]
+    fc_stream /= np.sqrt(np.einsum('ij,ij->i', fc_stream, fc_stream))[:, np.newaxis]
+    return np.clip(np.dot(fc_stream, fc_stream.T), -1.0, 1.0)
+
+
 def spectral_dbscan(fcd, n_dim=2, eps=0.3, min_samples=50):
     fcd = fcd - fcd.min()
     se = SpectralEmbedding(n_dim, affinity="precomputed")
@@ -36,7 +36,7 @@ Calculate an FFT on a TimeSeries DataType and return a FourierSpectrum DataType.
 """
 
 import numpy
-from scipy import signal as sp_signal
+from numpy.lib.stride_tricks import as_strided
 from tvb.basic.logger.builder import get_logger
 import tvb.datatypes.time_series as time_series
 import tvb.datatypes.spectral as spectral
@@ -45,12 +45,36 @@ import tvb.basic.traits.types_basic as basic
 import tvb.basic.traits.util as util
 
 
+try:
+    # Since SciPy 1.4 the real FFT can use several threads.
+    from scipy.fft import rfft
+    RFFT_KWARGS = dict(workers=-1)
+except ImportError:
+    from numpy.fft import rfft
+    RFFT_KWARGS = dict()
+
+
 LOG = get_logger(__name__)
 SUPPORTED_WINDOWING_FUNCTIONS = dict(hamming = numpy.hamming,
                                      bartlett = numpy.bartlett,
                                      blackman = numpy.blackman,
                                      hanning = numpy.hanning)
 
+# Upper bound, in bytes, for the segments of the nodes transformed at once
+FFT_CHUNK_MEMORY = 2 ** 27
+
+
+
+def detrend_linear(segments):
+    """
+    Remove, in place, the least-squares linear trend along the second (time) axis of segments,
+    which is what scipy.signal.detrend does on a copy.
+    """
+    time = numpy.arange(segments.shape[1], dtype=numpy.float64)
+    time -= time.mean()
+    slope = numpy.tensordot(segments, time, axes=([1], [0])) / numpy.dot(time, time)
+    segments -= segments.mean(axis=1)[:, numpy.newaxis]
+    segments -= slope[:, numpy.newaxis] * time.reshape((1, -1) + (1, ) * (segments.ndim - 2))
 
 
 
@@ -106,7 +130,8 @@ class FFT(core.Type):
         cls_attr_name = self.__class__.__name__ + ".time_series"
         self.time_series.trait["data"].log_debug(owner=cls_attr_name)
         
-        tpts = self.time_series.data.shape[0]
+        input_shape = self.time_series.read_data_shape()
+        tpts = input_shape[0]
         time_series_length = tpts * self.time_series.sample_period
         
         #Segment time-series, overlapping if necessary
@@ -114,37 +139,49 @@ class FFT(core.Type):
         if nseg > 1:
             seg_tpts = numpy.ceil(self.segment_length / self.time_series.sample_period)
             overlap = (seg_tpts * nseg - tpts) / (nseg - 1.0)
-            starts = [max(seg * (seg_tpts - overlap), 0) for seg in range(nseg)]
-            segments = [self.time_series.data[int(start):int(start) + int(seg_tpts)]
-                        for start in starts]
-            segments = [segment[:, :, :, :, numpy.newaxis] for segment in segments]
-            time_series = numpy.concatenate(segments, axis=4)
+            starts = [int(max(seg * (seg_tpts - overlap), 0)) for seg in range(nseg)]
+            seg_tpts = int(seg_tpts)
         else:
             self.segment_length = time_series_length
-            time_series = self.time_series.data[:, :, :, :, numpy.newaxis]
-            seg_tpts = time_series.shape[0]
+            starts = [0]
+            seg_tpts = tpts
         
         LOG.debug("Segment length being used is: %s" % self.segment_length)
         
-        #Base-line correct the segmented time-series
-        if self.detrend:
-            time_series = sp_signal.detrend(time_series, axis=0)
-            util.log_debug_array(LOG, time_series, "time_series")
-        
-        #Apply windowing function
         #Enumerate basic type wraps single values into a list
+        window_mask = None
         if self.window_function != [None]:
             window_function = SUPPORTED_WINDOWING_FUNCTIONS[self.window_function[0]]
-            window_mask = numpy.reshape(window_function(int(seg_tpts)),
-                                            (int(seg_tpts), 1, 1, 1, 1))
-            time_series = time_series * window_mask
-
-        #Calculate the FFT
-        result = numpy.fft.fft(time_series, axis=0)
-        nfreq = result.shape[0] / 2
-        result = result[1:nfreq + 1, :]
+            window_mask = numpy.reshape(window_function(seg_tpts), (1, seg_tpts, 1, 1, 1))
+        
+        result = numpy.empty((seg_tpts // 2, ) + tuple(input_shape[1:]) + (nseg, ), dtype=numpy.complex128)
+        
+        #Process the nodes in chunks, so that long time-series need not be held in memory at once
+        node_bytes = nseg * seg_tpts * input_shape[1] * input_shape[3] * (8 + 16)
+        chunk = int(max(1, FFT_CHUNK_MEMORY // node_bytes))
+        for node in range(0, input_shape[2], chunk):
+            nodes = slice(node, min(node + chunk, input_shape[2]))
+            data = self.time_series.read_data_slice((slice(None), slice(None), nodes, slice(None)))
+            data = numpy.asarray(data, dtype=numpy.float64)
+            #All the (overlapping) segments of the chunk are views on its data; only the used ones are copied
+            segments = as_strided(data, (tpts - seg_tpts + 1, seg_tpts) + data.shape[1:],
+                                  data.strides[:1] + data.strides)[starts]
+            
+            #Base-line correct the segmented time-series
+            if self.detrend:
+                detrend_linear(segments)
+                util.log_debug_array(LOG, segments, "time_series")
+            
+            #Apply windowing function
+            if window_mask is not None:
+                segments *= window_mask
+            
+            #Calculate the FFT, dropping the DC component
+            spectrum = rfft(segments, axis=1, **RFFT_KWARGS)[:, 1:]
+            result[:, :, nodes] = numpy.rollaxis(spectrum, 0, 5)
+        
         util.log_debug_array(LOG, result, "result")
-
+        
         spectra = spectral.FourierSpectrum(source=self.time_series,
                                            segment_length=self.segment_length,
                                            array_data=result,
@@ -56,6 +56,7 @@ References:
 """
 
 import numpy
+import numba
 import tvb.datatypes.time_series as time_series
 import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.core as core
@@ -66,6 +67,40 @@ from tvb.basic.logger.builder import get_logger
 LOG = get_logger(__name__)
 
 
+@numba.njit
+def _balloon_bold(x, dt, heun, tau_s, tau_f, tau_o, alpha, E0, V0, k1, k2, k3, linear, bold):
+    """
+    Compiled integration of the balloon model followed by the BOLD equations, one node
+    (column of x) at a time, with the same arithmetic as BalloonModel.balloon_dfun and
+    the deterministic Heun (heun=True) or Euler schemes. Only the current s, f, v, q
+    are kept; bold[t] is written as soon as step t is done.
+    """
+    for j in range(x.shape[1]):
+        s, f, v, q = 0.0, 1.0, 1.0, 1.0
+        for t in range(x.shape[0]):
+            if t > 0:
+                xt = x[t, j]
+                ds = xt - (1. / tau_s) * s - (1. / tau_f) * (f - 1)
+                df = s
+                dv = (1. / tau_o) * (f - v ** (1. / alpha))
+                dq = (1. / tau_o) * ((f * (1. - (1. - E0) ** (1. / f)) / E0) - (v ** (1. / alpha)) * (q / v))
+                if heun:
+                    s_, f_, v_, q_ = s + dt * ds, f + dt * df, v + dt * dv, q + dt * dq
+                    ds_ = xt - (1. / tau_s) * s_ - (1. / tau_f) * (f_ - 1)
+                    df_ = s_
+                    dv_ = (1. / tau_o) * (f_ - v_ ** (1. / alpha))
+                    dq_ = (1. / tau_o) * ((f_ * (1. - (1. - E0) ** (1. / f_)) / E0) -
+                                          (v_ ** (1. / alpha)) * (q_ / v_))
+                    s, f, v, q = (s + (ds + ds_) * dt / 2.0, f + (df + df_) * dt / 2.0,
+                                  v + (dv + dv_) * dt / 2.0, q + (dq + dq_) * dt / 2.0)
+                else:
+                    s, f, v, q = s + dt * ds, f + dt * df, v + dt * dv, q + dt * dq
+            if linear:
+                bold[t, j] = V0 * ((k1 + k2[j]) * (1. - q) + (k3[j] - k2[j]) * (1. - v))
+            else:
+                bold[t, j] = V0 * (k1 * (1. - q) + k2[j] * (1. - q / v) + k3[j] * (1. - v))
+
+
 class BalloonModel(core.Type):
     """
 
@@ -239,13 +274,7 @@ class BalloonModel(core.Type):
             msg = "Integration time step shouldn't be smaller than the sampling period of the input signal." 
             LOG.error(msg)
 
-        balloon_nvar = 4           
-
-        #NOTE: hard coded initial conditions
-        state = numpy.zeros((input_shape[0], balloon_nvar, input_shape[2], input_shape[3]))  # s
-        state[0, 1, :] = 1.  # f
-        state[0, 2, :] = 1.  # v
-        state[0, 3, :] = 1.  # q
+        balloon_nvar = 4
 
         # BOLD model coefficients
         k = self.compute_derived_parameters()
@@ -256,53 +285,73 @@ class BalloonModel(core.Type):
         self.integrator.configure()
         LOG.debug("Integration time step size will be: %s seconds" % str(self.integrator.dt))
 
-        scheme = self.integrator.scheme
-
-        # NOTE: the following variables are not used in this integration but
-        # required due to the way integrators scheme has been defined.
-
-        local_coupling = 0.0
-        stimulus = 0.0
-
         # Do some checks:
         if numpy.isnan(neural_activity).any():
             LOG.warning("NaNs detected in the neural activity!!")
 
         # normalise the time-series.
         neural_activity = neural_activity - neural_activity.mean(axis=0)[numpy.newaxis, :]
-
-        # solve equations
-        for step in range(1, t_int.shape[0]):
-            state[step, :] = scheme(state[step - 1, :], self.balloon_dfun,
-                                    neural_activity[step, :], local_coupling, stimulus)
-            if numpy.isnan(state[step, :]).any():
-                LOG.warning("NaNs detected...")
-
-        # NOTE: just for the sake of clarity, define the variables used in the BOLD model
-        s = state[:, 0, :]
-        f = state[:, 1, :]
-        v = state[:, 2, :]
-        q = state[:, 3, :]
-
-        #import pdb; pdb.set_trace()
-
-        # BOLD models
-        if self.bold_model == "nonlinear":
-            """
-            Non-linear BOLD model equations.
-            Page 391. Eq. (13) top in [Stephan2007]_
-            """
-            y_bold = numpy.array(self.V0 * (k1 * (1. - q) + k2 * (1. - q / v) + k3 * (1. - v)))
-            y_b = y_bold[:, numpy.newaxis, :, :]
-            LOG.debug("Max value: %s" % str(y_b.max()))
+        n_step = t_int.shape[0]
+        linear = not (self.bold_model == "nonlinear")
+
+        if (type(self.integrator) in (integrators_module.HeunDeterministic, integrators_module.EulerDeterministic)
+                and self.integrator.clamped_state_variable_values is None):
+            # all nodes and modes in one compiled loop
+            x = numpy.ascontiguousarray(neural_activity[:n_step, 0].reshape((n_step, -1)))
+            node_shape = input_shape[2:]
+            y_bold = numpy.empty((n_step, ) + tuple(node_shape))
+            _balloon_bold(x, float(self.integrator.dt),
+                          type(self.integrator) is integrators_module.HeunDeterministic,
+                          self.tau_s, self.tau_f, self.tau_o, self.alpha, self.E0, self.V0, float(k1),
+                          numpy.broadcast_to(k2, node_shape).astype(numpy.float64).ravel(),
+                          numpy.broadcast_to(k3, node_shape).astype(numpy.float64).ravel(),
+                          linear, y_bold.reshape((n_step, -1)))
 
         else:
-            """
-            Linear BOLD model equations.
-            Page 391. Eq. (13) bottom in [Stephan2007]_ 
-            """
-            y_bold = numpy.array(self.V0 * ((k1 + k2) * (1. - q) + (k3 - k2) * (1. - v)))
-            y_b = y_bold[:, numpy.newaxis, :, :]
+            #NOTE: hard coded initial conditions
+            state = numpy.zeros((balloon_nvar, input_shape[2], input_shape[3]))  # s
+            state[1, :] = 1.  # f
+            state[2, :] = 1.  # v
+            state[3, :] = 1.  # q
+
+            scheme = self.integrator.scheme
+
+            # NOTE: the following variables are not used in this integration but
+            # required due to the way integrators scheme has been defined.
+
+            local_coupling = 0.0
+            stimulus = 0.0
+
+            # only v and q are needed for the BOLD signal
+            v = numpy.empty((n_step, input_shape[2], input_shape[3]))
+            q = numpy.empty((n_step, input_shape[2], input_shape[3]))
+            v[0], q[0] = state[2], state[3]
+
+            # solve equations
+            for step in range(1, n_step):
+                state = scheme(state, self.balloon_dfun, neural_activity[step, :], local_coupling, stimulus)
+                v[step], q[step] = state[2], state[3]
+
+            # BOLD models
+            if not linear:
+                """
+                Non-linear BOLD model equations.
+                Page 391. Eq. (13) top in [Stephan2007]_
+                """
+                y_bold = numpy.array(self.V0 * (k1 * (1. - q) + k2 * (1. - q / v) + k3 * (1. - v)))
+
+            else:
+                """
+                Linear BOLD model equations.
+                Page 391. Eq. (13) bottom in [Stephan2007]_ 
+                """
+                y_bold = numpy.array(self.V0 * ((k1 + k2) * (1. - q) + (k3 - k2) * (1. - v)))
+
+        if numpy.isnan(y_bold).any():
+            LOG.warning("NaNs detected...")
+
+        y_b = y_bold[:, numpy.newaxis, :, :]
+        LOG.debug("Max value: %s" % str(y_b.max()))
 
         sample_period = 1. / self.dt
 
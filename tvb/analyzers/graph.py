@@ -31,12 +31,129 @@
 """
 Useful graph analyses.
 
+The metrics work on dense arrays as well as on ``scipy.sparse`` matrices, so
+that region level (e.g. ``Connectivity.weights``, ``Connectivity.tract_lengths``)
+and voxel level graphs can be characterised with the same code. Shortest paths
+are found with breadth-first search (binary graphs) or Dijkstra's algorithm
+(weighted graphs) over the sparse row structure, never with dense matrix powers.
+
 .. moduleauthor:: Paula Sanz Leon <pau.sleon@gmail.com>
 
 """
 
+import heapq
 import numpy
-import networkx
+import numba
+import scipy.sparse
+from scipy.sparse import csgraph
+
+
+def _csr(A):
+    """
+    Compressed sparse row copy of the (dense or sparse) connection matrix A,
+    holding only its non-zero entries: an entry A[i, j] is an edge i -> j.
+    """
+    if A.shape[0] != A.shape[1]:
+        raise ValueError('The input matrix is not square')
+    G = scipy.sparse.csr_matrix(A, dtype=numpy.float64, copy=True)
+    G.eliminate_zeros()
+    return G
+
+
+def _binarize(A):
+    "Binary sparse copy of the connection matrix A."
+    G = _csr(A)
+    G.data[:] = 1.0
+    return G
+
+
+def _without_loops(G):
+    "Copy of the sparse connection matrix G without its self-connections."
+    G = (G - scipy.sparse.diags(G.diagonal())).tocsr()
+    G.eliminate_zeros()
+    return G
+
+
+@numba.njit
+def _brandes_bfs(indptr, indices, n):
+    "Brandes' accumulation of pair dependencies over breadth-first searches."
+    bc = numpy.zeros(n)
+    dist = numpy.empty(n, numpy.int64)
+    sigma = numpy.empty(n)
+    delta = numpy.empty(n)
+    queue = numpy.empty(n, numpy.int64)
+    for s in range(n):
+        dist[:] = -1
+        sigma[:] = 0.0
+        delta[:] = 0.0
+        dist[s] = 0
+        sigma[s] = 1.0
+        queue[0] = s
+        head, tail = 0, 1
+        while head < tail:
+            v = queue[head]
+            head += 1
+            for k in range(indptr[v], indptr[v + 1]):
+                w = indices[k]
+                if dist[w] < 0:
+                    dist[w] = dist[v] + 1
+                    queue[tail] = w
+                    tail += 1
+                if dist[w] == dist[v] + 1:
+                    sigma[w] += sigma[v]
+        # nodes in order of non-increasing distance from the source
+        for i in range(tail - 1, 0, -1):
+            v = queue[i]
+            for k in range(indptr[v], indptr[v + 1]):
+                w = indices[k]
+                if dist[w] == dist[v] + 1:
+                    delta[v] += sigma[v] / sigma[w] * (1.0 + delta[w])
+            bc[v] += delta[v]
+    return bc
+
+
+@numba.njit
+def _brandes_dijkstra(indptr, indices, lengths, n):
+    "Brandes' accumulation of pair dependencies over Dijkstra searches."
+    bc = numpy.zeros(n)
+    dist = numpy.empty(n)
+    sigma = numpy.empty(n)
+    delta = numpy.empty(n)
+    settled = numpy.empty(n, numpy.bool_)
+    order = numpy.empty(n, numpy.int64)
+    for s in range(n):
+        dist[:] = numpy.inf
+        sigma[:] = 0.0
+        delta[:] = 0.0
+        settled[:] = False
+        dist[s] = 0.0
+        sigma[s] = 1.0
+        heap = [(0.0, s)]
+        count = 0
+        while len(heap) > 0:
+            _, v = heapq.heappop(heap)
+            if settled[v]:
+                continue
+            settled[v] = True
+            order[count] = v
+            count += 1
+            for k in range(indptr[v], indptr[v + 1]):
+                w = indices[k]
+                dw = dist[v] + lengths[k]
+                if dw < dist[w]:
+                    dist[w] = dw
+                    sigma[w] = sigma[v]
+                    heapq.heappush(heap, (dw, w))
+                elif dw == dist[w] and not settled[w]:
+                    sigma[w] += sigma[v]
+        for i in range(count - 1, 0, -1):
+            v = order[i]
+            for k in range(indptr[v], indptr[v + 1]):
+                w = indices[k]
+                if dist[v] + lengths[k] == dist[w]:
+                    delta[v] += sigma[v] / sigma[w] * (1.0 + delta[w])
+            bc[v] += delta[v]
+    return bc
 
 
 def betweenness_bin(A):
@@ -46,7 +163,8 @@ def betweenness_bin(A):
     the network that contain a given node. Nodes with high values of 
     betweenness centrality participate in a large number of shortest paths.
     
-    :param A: binary (directed/undirected) connection matrix (array)
+    :param A: binary (directed/undirected) connection matrix (array or
+              sparse matrix); non-zero entries are taken as edges.
             
     :returns: BC: a vector representing node between centrality vector.
 
@@ -56,49 +174,44 @@ def betweenness_bin(A):
     Betweenness centrality may be normalised to the range [0,1] as
     BC/[(N-1)(N-2)], where N is the number of nodes in the network.
     
+    .. note:: Algorithm: Brandes' dependency accumulation over one
+              breadth-first search per source node, O(N*E).
+    
     Original Mika Rubinov, UNSW/U Cambridge, 2007-2012 - From BCT 2012-12-04
 
 
     **Reference:**    [1] Kintali (2008) arXiv:0809.1906v2 [cs.DS] (generalization to directed and disconnected graphs)
+                      [2] Brandes (2001) J Math Sociol 25:163-177.
     
     **Author:**        Paula Sanz Leon
     
     """
-    
-    n   = len(A)
-    I   = numpy.eye(n)        # logical ID matrix                                        
-    d   = 1                   # path length
-    number_of_paths_d         = A.copy()           # number of paths of length |d|
-    number_of_shortest_paths_d= A.copy()           # number of shortest paths of length |d|
-    number_of_shortest_paths  = A.copy()           # number of shortest paths of any length
-    length_of_shortest_paths  = A.copy()           # length of shortest paths
-        
-    number_of_shortest_paths[numpy.where(I)] = 1
-    length_of_shortest_paths[numpy.where(I)] = 1
+    G = _binarize(A)
+    return _brandes_bfs(G.indptr, G.indices, G.shape[0])
 
-    #compute the number of shortest paths and their lengths
-    while numpy.any(number_of_shortest_paths_d):
-        d += 1
-        number_of_paths_d          = numpy.dot(number_of_paths_d, A)
-        number_of_shortest_paths_d = number_of_paths_d * (length_of_shortest_paths == 0)
-        number_of_shortest_paths  += number_of_shortest_paths_d
-        length_of_shortest_paths   = length_of_shortest_paths + d * (number_of_shortest_paths_d != 0)
 
-    length_of_shortest_paths[length_of_shortest_paths == 0] = numpy.inf       # length for disconnected vertices is inf
-    length_of_shortest_paths[numpy.where(I)] = 0.0
-    number_of_shortest_paths[number_of_shortest_paths == 0] = 1.0  # number of shortest paths for disconn vertices is 1
 
-    dependency = numpy.zeros((n, n))  # node on node dependency
-    diam = d - 1                      # graph diameter
-    
-    #calculate dependency
-    for d in range(diam, 1, -1):
-        temp = (numpy.dot(((length_of_shortest_paths == d) * (1 + dependency) / number_of_shortest_paths), A.T)
-                * ((length_of_shortest_paths == (d - 1)) * number_of_shortest_paths))
-                #temp: dependencies on vertices |d-1| from source
-        dependency += temp
-                
-    return dependency.sum(axis=0)
+def betweenness_wei(L):
+    """
+
+    Node betweenness centrality of a weighted graph, where shortest paths
+    minimise the sum of the edge lengths along them.
+
+    :param L: directed/undirected connection-length matrix (array or sparse
+              matrix), e.g. the tract lengths of a connectivity restricted to
+              its non-zero weights, or the inverse of the weights. Zero entries
+              are missing edges, all other lengths must be positive.
+
+    :returns: BC: a vector representing node between centrality vector.
+
+    **Reference:**    Brandes (2001) J Math Sociol 25:163-177.
+
+    """
+    G = _csr(L)
+    if numpy.any(G.data < 0.0):
+        raise ValueError('Connection lengths must be positive')
+    indices = G.indices.astype(numpy.int64)
+    return _brandes_dijkstra(G.indptr, indices, G.data, G.shape[0])
 
 
 
@@ -112,7 +225,7 @@ def efficiency_bin(A, compute_local_efficiency=False):
     The local efficiency is the global efficiency computed on the
     neighborhood of the node, and is related to the clustering coefficient.
     
-    :param A: array; binary undirected connectivity matrix.
+    :param A: array or sparse matrix; binary undirected connectivity matrix.
     
     :param compute_local_efficiency: bool, optional
         flag to compute either local or global efficiency of the network.
@@ -126,11 +239,8 @@ def efficiency_bin(A, compute_local_efficiency=False):
     **References:** [1] Latora and Marchiori (2001) Phys Rev Lett 87:198701.
     
     
-    .. note:: Algorithm: algebraic path count
+    .. note:: Algorithm: breadth-first search
     .. note:: Original: Mika Rubinov, UNSW, 2008-2010 - From BCT 2012-12-04
-    .. note:: Tested with  Numpy 1.7
-    
-    .. warning:: tested against Matlab version... needs indexing improvement
     
     
     **Example:**
@@ -153,18 +263,18 @@ def efficiency_bin(A, compute_local_efficiency=False):
     """
     
     # Binarize without modifying the original matrix (in case A is weighted)
-    G = A.copy()
-    G[G > 0] = 1.0 
+    G = _csr(A)
+    G.data = (G.data > 0).astype(numpy.float64)
+    G.eliminate_zeros()
 
     number_of_nodes = G.shape[0]     
     if compute_local_efficiency:
         E = numpy.zeros((number_of_nodes,1))  
-        k = G.sum(axis=1)   # degree
-        for u in range(number_of_nodes):
-            indices = (G[u, :] > 0)
-            if k[u] >= 2:   # degree must be at least two
-                e = distance_inv(G[numpy.ix_(indices,indices)])
-                E[u,:] = e.sum() / (k[u] ** 2 - k[u])     # local efficiency
+        k = numpy.asarray(G.sum(axis=1)).ravel()   # degree
+        for u in numpy.flatnonzero(k >= 2):   # degree must be at least two
+            indices = G.indices[G.indptr[u]:G.indptr[u + 1]]
+            e = distance_inv(G[indices][:, indices])
+            E[u,:] = e.sum() / (k[u] ** 2 - k[u])     # local efficiency
         return E
     else:
         e = distance_inv(G)
@@ -174,29 +284,87 @@ def efficiency_bin(A, compute_local_efficiency=False):
 
 
 
-def distance_inv(G):
+def efficiency_wei(W):
+    """
+
+    Computes the global efficiency of a weighted connectivity matrix, the
+    average of inverse shortest path lengths where the length of an edge is
+    the inverse of its weight.
+
+    :param W: array or sparse matrix; weighted undirected connectivity matrix
+              with positive weights.
+
+    :returns: global efficiency (float)
+
+    **References:** [1] Latora and Marchiori (2001) Phys Rev Lett 87:198701.
+                    [2] Rubinov and Sporns (2010) NeuroImage 52:1059-1069.
+
+    """
+    L = _csr(W)
+    L.data = 1.0 / L.data
+    e = distance_inv(L, weighted=True)
+    number_of_nodes = L.shape[0]
+    return e.sum() / (number_of_nodes ** 2 - number_of_nodes)
+
+
+
+def distance_inv(G, weighted=False):
     """
     Compute the inverse shortest path lengths of G.
 
-    :param G: binary undirected connection matrix
+    :param G: binary undirected connection matrix, or a matrix of connection
+              lengths if ``weighted`` is True
+    :param weighted: use Dijkstra's algorithm on the connection lengths in G
+              instead of a breadth-first search on its edges
     :returns: D: matrix of inverse distances
     """
-    L = numpy.zeros(G.shape)
-    D = numpy.eye(G.shape[0])
-    n = 1
-    nPATH = G.copy()                     # n-path matrix
-    L[nPATH != 0] = 1.                   # shortest n-path matrix
+    D = csgraph.shortest_path(_csr(G), method='D', unweighted=not weighted)
+    numpy.fill_diagonal(D, numpy.inf)
+    return 1.0 / D                      # invert distance; zero if unreachable
+
+
+
+def clustering_coef_bu(G):
+    """
+    Clustering coefficient of every node, the fraction of a node's neighbours
+    that are neighbours of each other.
 
-    while L.sum() != 0:
-        D += n * L
-        n += 1
-        nPATH = numpy.dot(nPATH, G)
-        L = (nPATH > 0) * (D == 0)
+    :param G: array or sparse matrix; binary undirected connection matrix.
+    :returns: C: clustering coefficient vector
 
-    D[D == 0] = numpy.inf
-    D = 1 / D                                # invert distance
-    D = D - numpy.eye(G.shape[0])
-    return D
+    **References:** Watts and Strogatz (1998) Nature 393:440-442.
+    """
+    A = _without_loops(_binarize(G))
+    k = numpy.asarray(A.sum(axis=1)).ravel()
+    cyc3 = numpy.asarray(A.dot(A).multiply(A).sum(axis=1)).ravel()
+    C = numpy.zeros(A.shape[0])
+    mask = k > 1
+    C[mask] = cyc3[mask] / (k[mask] * (k[mask] - 1))
+    return C
+
+
+
+def clustering_coef_wu(W):
+    """
+    Weighted clustering coefficient of every node, the geometric mean of the
+    weights of the triangles around the node, relative to its degree.
+
+    :param W: array or sparse matrix; weighted undirected connection matrix
+              with non-negative weights. The weights are scaled by their
+              maximum, so that they lie in the range [0, 1].
+    :returns: C: weighted clustering coefficient vector
+
+    **References:** Onnela et al. (2005) Phys Rev E 71:065103
+    """
+    A = _without_loops(_csr(W))
+    k = numpy.diff(A.indptr).astype(numpy.float64)
+    if A.nnz:
+        A.data = numpy.cbrt(A.data / A.data.max())
+    cyc3 = numpy.asarray(A.dot(A).multiply(A).sum(axis=1)).ravel()
+    C = numpy.zeros(A.shape[0])
+    mask = k > 1
+    C[mask] = cyc3[mask] / (k[mask] * (k[mask] - 1))
+    return C
 
 
 
@@ -207,7 +375,7 @@ def get_components_sizes(A):
     *undirected* connection matrix A.
     
     
-    :param A: array
+    :param A: array or sparse matrix
         - binary undirected (BU) connectivity matrix.
     
     :returns:
@@ -216,36 +384,82 @@ def get_components_sizes(A):
     
     :raises: Value Error - If A is not square.
               
-    .. warning::       Requires NetworkX
-
     **Author:**        Paula Sanz Leon
     
     """
+    _, labels = csgraph.connected_components(_csr(A), directed=True, connection='weak')
+    return numpy.bincount(labels).max()
+
+
+
+@numba.njit
+def _find(parent, i):
+    "Root of i in the disjoint-set forest, halving the path on the way."
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+@numba.njit
+def _attach(v, indptr, indices, alive, parent, size):
+    "Add node v to the forest, joining it to its present neighbours."
+    alive[v] = True
+    for k in range(indptr[v], indptr[v + 1]):
+        w = indices[k]
+        if alive[w]:
+            rv, rw = _find(parent, v), _find(parent, w)
+            if rv != rw:
+                if size[rv] < size[rw]:
+                    rv, rw = rw, rv
+                parent[rw] = rv
+                size[rv] += size[rw]
+    return size[_find(parent, v)]
+
+
+@numba.njit
+def _largest_components(indptr, indices, sequence, n):
+    "Union-find over the nodes of a deletion sequence, added back in reverse."
+    steps = sequence.shape[0]
+    first = numpy.full(n, steps, numpy.int64)     # step a node is deleted at
+    for i in range(steps - 1, -1, -1):
+        first[sequence[i]] = i
+    parent = numpy.arange(n)
+    size = numpy.ones(n, numpy.int64)
+    alive = numpy.zeros(n, numpy.bool_)
+    largest = 1                                   # deleted nodes are isolated
+    for v in range(n):
+        if first[v] == steps:
+            largest = max(largest, _attach(v, indptr, indices, alive, parent, size))
+    sizes = numpy.empty(steps, numpy.int64)
+    for i in range(steps - 1, -1, -1):
+        sizes[i] = largest
+        v = sequence[i]
+        if first[v] == i:
+            largest = max(largest, _attach(v, indptr, indices, alive, parent, size))
+    return sizes
+
+
+
+def largest_component_sizes(A, sequence):
+    """
+    Size of the largest connected component left after each step of a node
+    deletion sequence, where deleting a node removes all of its connections.
 
+    The components are tracked incrementally with a union-find structure, by
+    adding the deleted nodes back in reverse order, so the whole sequence
+    costs about as much as a single call to :func:`get_components_sizes`.
 
-    # Just to preserve the original code. Check if the input matrix is square.
-    # Further checks should include: check if it's binary for the functions that require so
-    # and check that is undirected. 
-
-    # Check if it is square
-    if A.shape[0] != A.shape[1]:
-        raise ValueError('The input matrix is not square')
-    else:
-        pass
-
-    # Binarize without modifying the original matrix (in case A is weighted)
-    temp_A = A.copy()
-    temp_A[temp_A > 0] = 1.0    
+    :param A: array or sparse matrix; connectivity matrix, whose non-zero
+              entries are taken as undirected edges.
+    :param sequence: int array; the node deleted at each step.
 
-    # Set diagonal elements to one
-    if numpy.diag(A).sum() != A.shape[0]:
-       numpy.fill_diagonal(temp_A, 1.0)
-    
-    # build a networkX graph to get largest connected component.
-    components = networkx.connected_components(networkx.from_numpy_matrix(numpy.matrix(temp_A)))
-    # For the time being returns the size of the largest component
-    component_sizes = [len(x) for x in components][0]
-    return component_sizes
+    :returns: largest component size after each step (len(sequence), ) array
+    """
+    G = _binarize(A)
+    G = (G + G.T).tocsr()
+    sequence = numpy.asarray(sequence, dtype=numpy.int64)
+    return _largest_components(G.indptr, G.indices, sequence, G.shape[0])
 
 
 
@@ -306,9 +520,10 @@ def sequential_random_deletion(white_matter, random_sequence, nor):
         
             # efficiency
             global_efficieny[i] = efficiency_bin(temp_degree)
-        
-            # largest connected component
-            largest_component[i] = get_components_sizes(temp_degree)
+
+    # largest connected component
+    steps = len(random_sequence)
+    largest_component[:steps] = largest_component_sizes(white_matter.weights > 0.0, random_sequence)
             
     return node_strength, node_degree, global_efficieny, largest_component
 
@@ -351,6 +566,7 @@ def sequential_targeted_deletion(white_matter, nor):
     node_betweenness_centrality = numpy.zeros((nor, nor - 2))
     global_efficiency = numpy.zeros((nor - 2, 3))
     largest_component = numpy.zeros((nor - 2, 3))
+    targets = numpy.zeros((nor - 2, 3), dtype=numpy.int64)
     temp_strength = white_matter.weights.copy()
     temp_degree   = white_matter.weights.copy()
     temp_bc       = white_matter.weights.copy()
@@ -373,29 +589,22 @@ def sequential_targeted_deletion(white_matter, nor):
             node_betweenness_centrality[:, idx] = betweenness_bin(temp_bc)
             
             # define target index
-            sorted_strength_indices    = numpy.argsort(node_strength[:, idx])
-            sorted_degree_indices      = numpy.argsort(node_degree[:, idx])
-            sorted_bc_indices          = numpy.argsort(node_betweenness_centrality[:, idx])
+            targets[idx, 0] = numpy.argsort(node_strength[:, idx])[-1]
+            targets[idx, 1] = numpy.argsort(node_degree[:, idx])[-1]
+            targets[idx, 2] = numpy.argsort(node_betweenness_centrality[:, idx])[-1]
             
             # lesion
-            temp_strength[sorted_strength_indices[-1], :] = 0.0
-            temp_strength[:, sorted_strength_indices[-1]] = 0.0
-
-            temp_degree[sorted_degree_indices[-1], :] = 0.0
-            temp_degree[:, sorted_degree_indices[-1]] = 0.0
-            
-            temp_bc[sorted_bc_indices[-1], :] = 0.0
-            temp_bc[:, sorted_bc_indices[-1]] = 0.0
+            for temp, target in zip((temp_strength, temp_degree, temp_bc), targets[idx]):
+                temp[target, :] = 0.0
+                temp[:, target] = 0.0
             
             # global efficiency (BU)
             global_efficiency[idx, 0] = efficiency_bin(temp_strength)  # compute the global eff of the binary matrix ver
             global_efficiency[idx, 1] = efficiency_bin(temp_degree)
             global_efficiency[idx, 2] = efficiency_bin(temp_bc)
         
-            # largest connected component (BU)
-            largest_component[idx, 0] = get_components_sizes(temp_strength)
-            largest_component[idx, 1] = get_components_sizes(temp_degree)
-            largest_component[idx, 2] = get_components_sizes(temp_bc)
+    # largest connected component (BU)
+    for j in range(3):
+        largest_component[:, j] = largest_component_sizes(white_matter.weights > 0.0, targets[:, j])
             
     return node_strength, node_degree, node_betweenness_centrality, global_efficiency, largest_component
-
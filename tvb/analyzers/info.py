@@ -38,12 +38,33 @@ TODO: Convert sampen to a traited class
 
 """
 import numpy
+from numpy.lib.stride_tricks import as_strided
+from scipy.spatial import cKDTree
 
 
 
-def sampen(y, m=2, r=None, qse=False, taus=1, info=False,
-           tile=numpy.tile, na=numpy.newaxis, abs=numpy.abs,
-           log=numpy.log, r_=numpy.r_):
+def _count_pairs(y, n, r):
+    """
+    Number of pairs of distinct templates y[i:i + n] which are closer than r,
+    in Chebyshev (maximum) distance, counted through a KD-tree.
+    """
+    templates = as_strided(y, (y.size - n + 1, n), y.strides * 2)
+    tree = cKDTree(templates)
+    # the tree counts pairs at distance <= r, in both orders, and each template with itself
+    count = tree.count_neighbors(tree, numpy.nextafter(r, 0), p=numpy.inf)
+    return (count - templates.shape[0]) // 2
+
+
+def _count_matches(channels, m, r):
+    """
+    Numbers of matching templates of m and m + 1 points, for each of the columns of
+    channels, with the tolerance of the same index in r.
+    """
+    return numpy.array([(_count_pairs(y, m, r_y), _count_pairs(y, m + 1, r_y))
+                        for y, r_y in zip(numpy.ascontiguousarray(channels.T), r)]).T
+
+
+def sampen(y, m=2, r=None, qse=False, taus=1, info=False):
     """
     Computes (quadratic) sample entropy of a given input signal y, with
     embedding dimension n, and a match tolerance of r (ref 2). If an array
@@ -58,6 +79,13 @@ def sampen(y, m=2, r=None, qse=False, taus=1, info=False,
     of r, giving the quadratic sample entropy, such that results from different
     values of r can be meaningfully compared (ref 2).
 
+    If y is 2D (time, nodes), the entropy of each node is computed, each with its
+    own default r, and the node dimension comes last in the result.
+
+    The coarse grained series of all nodes are built at once for each scale, and
+    template matches are counted with a KD-tree in Chebyshev distance, so that long
+    signals and whole brain multiscale maps remain practical.
+
     ref 1: Costa, M., Goldberger, A. L., and Peng C.-K. (2002) Multiscale Entropy
             Analysis of Complex Physiologic Time Series. Phys Rev Lett 89 (6).
 
@@ -71,43 +99,30 @@ def sampen(y, m=2, r=None, qse=False, taus=1, info=False,
 
     """
 
-    # if multiple scales given, run on each
-    if type(taus) in (list, numpy.ndarray):
-        return numpy.array([sampen(y, m=m, r=r, qse=qse, taus=int(tau)) for tau in taus])
+    y = numpy.asarray(y, dtype=numpy.float64)
+    nodes = y.reshape((y.shape[0], -1))
+    scales = [int(tau) for tau in taus] if type(taus) in (list, numpy.ndarray) else [int(taus)]
 
-    # helper function to reformat arrays for matching
-    subseq = lambda y, n: y[tile(r_[0:n], (y.size - n + 1, 1)) + r_[0:y.size - n + 1][:, na]]
-
-    # default value of r
+    # default value of r, for each node, from the signal before any coarsening
     if r is None:
-        r = 0.15 * y.std()
-
-    # if we have a scale factor, coarsen time series 
-    if taus > 1:
-        y = y[:y.shape[0] / taus * taus].reshape((-1, taus)).mean(axis=1)
+        r = 0.15 * nodes.std(axis=0)
+    r = numpy.broadcast_to(r, nodes.shape[1:]).astype(numpy.float64)
 
-    # compute embedding of signal dims m, m+1, initialize match counts to 0
-    Y1 = subseq(y, m)
-    Y2 = subseq(y, m + 1)
-    c1 = 0
-    c2 = 0
-
-    # check for matches
-    for i in range(Y1.shape[0] - 1):
-        c1 += (abs(tile(Y1[i], (Y1.shape[0] - i - 1, 1)) - Y1[i + 1:]) < r).all(axis=1).sum()
-
-    for i in range(Y2.shape[0] - 1):
-        c2 += (abs(tile(Y2[i], (Y2.shape[0] - i - 1, 1)) - Y2[i + 1:]) < r).all(axis=1).sum()
+    # coarse grain all nodes at once, for each scale factor
+    coarse = [nodes[:nodes.shape[0] // tau * tau].reshape((-1, tau, nodes.shape[1])).mean(axis=1) for tau in scales]
+    c1, c2 = numpy.array([_count_matches(series, m, r) for series in coarse]).transpose((1, 0, 2))
 
     # ref 2, last paragraph of methods, warn inaccurate estimate
-    if c2 < 5:
-        print("m+1 template match count is low, %d < 5" % c2)
+    for count in c2[c2 < 5]:
+        print("m+1 template match count is low, %d < 5" % count)
 
     p = c2 * 1.0 / c1
-    e = -log(p / (2 * r) if qse else p)
-
-    if info:
-        return e, p, c2, c1
-    else:
-        return e
-
+    e = -numpy.log(p / (2 * r) if qse else p)
+
+    # (scale, [4,] node) for several nodes and scales, dropping the axes not asked for
+    result = numpy.array([e, p, c2, c1]).transpose((1, 0, 2)) if info else e
+    if y.ndim == 1:
+        result = result[..., 0]
+    if len(scales) == 1 and type(taus) not in (list, numpy.ndarray):
+        result = result[0]
+    return tuple(result) if info and result.ndim == 1 else result
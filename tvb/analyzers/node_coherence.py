@@ -39,6 +39,7 @@ Compute cross coherence between all nodes in a time series.
 import numpy
 import matplotlib.mlab as mlab
 from matplotlib.pylab import detrend_linear
+from numpy.lib.stride_tricks import as_strided
 #TODO: Currently built around the Simulator's 4D timeseries -- generalise...
 import tvb.datatypes.time_series as time_series
 import tvb.datatypes.spectral as spectral
@@ -49,6 +50,9 @@ from tvb.basic.logger.builder import get_logger
 
 LOG = get_logger(__name__)
 
+# Upper bound, in bytes, for the cross spectra tile held in memory by coherence()
+COHERENCE_MEMORY = 2 ** 27
+
 #TODO: Make an appropriate spectral datatype for the output
 #TODO: Should do this properly, ie not with mlab, returning both coherence and
 #      the complex coherence spectra, then supporting magnitude squared
@@ -95,31 +99,54 @@ def coherence_mlab(data, sample_rate, nfft=256):
     return coh, freq
 
 
-def coherence(data, sample_rate, nfft=256, imag=False):
-    "Vectorized coherence calculation by windowed FFT"
+def coherence(data, sample_rate, nfft=256, imag=False, noverlap=0, max_memory=COHERENCE_MEMORY):
+    """
+    Coherence between all pairs of nodes, by Welch's method: the cross spectra of
+    Hamming windowed (possibly overlapping) segments are averaged over segments,
+    then normalised by the averaged auto spectra.
+
+    The cross spectral density is computed in tiles of node pairs, each holding
+    at most about `max_memory` bytes, so that the intermediate arrays stay bounded
+    for large numbers of nodes; only tiles on or above the diagonal are computed.
+
+    :returns: coherence of shape (frequency, nodes, nodes, state-variables, modes),
+              and the corresponding positive frequencies.
+    """
+    data = numpy.asarray(data)
     nt, ns, nn, nm = data.shape
-    nwin = nt / nfft
-    if nwin < 1:
+    step = nfft - noverlap
+    if not 0 < step <= nfft:
+        raise ValueError("noverlap={0} must be in [0, nfft={1}).".format(noverlap, nfft))
+    if nt < nfft:
         raise ValueError(
             "Not enough time points ({0}) to compute an FFT, given a "
             "window size of nfft={1}.".format(nt, nfft))
-    # ignore leftover data; need shape (nn, ... , nwin, nfft)
-    wins = data[:nwin * nfft]\
-        .copy()\
-        .transpose((2, 1, 3, 0))\
-        .reshape((nn, ns, nm, nwin, nfft))
-    wins *= hamming(nfft)
-    F = numpy.fft.fft(wins)
+    nwin = (nt - nfft) // step + 1
+    # (window, time, state-variable, node, mode) view on data, without copy
+    wins = as_strided(data, (nwin, nfft) + data.shape[1:], (step * data.strides[0], ) + data.strides)
+    wins = wins * hamming(nfft)[:, numpy.newaxis, numpy.newaxis, numpy.newaxis]
     fs = numpy.fft.fftfreq(nfft, 1e3 / sample_rate)
-    # broadcasts to [node_i, node_j, ..., window, time]
-    G = F[:, numpy.newaxis] * F.conj()
-    if imag:
-        G = G.imag
-    dG = numpy.array([G[i, i] for i in range(nn)])
-    C = (numpy.abs(G)**2 / (dG[:, numpy.newaxis] * dG)).mean(axis=-2)
-    mask = fs > 0.0
-    # C_ = numpy.abs(C.mean(axis=0).mean(axis=0))
-    return numpy.transpose(C[..., mask], (4, 0, 1, 2, 3)), fs[mask]
+    # positive frequencies only, i.e. where fs > 0
+    positive = slice(1, (nfft + 1) // 2)
+    F = numpy.fft.rfft(wins, axis=1)[:, positive]
+    del wins
+    # (state-variable, mode, frequency, node, window), to average windows by matrix products
+    F = numpy.ascontiguousarray(F.transpose((2, 4, 1, 3, 0)))
+    nf = F.shape[2]
+    P = (F.real ** 2 + F.imag ** 2).mean(axis=-1)
+
+    C = numpy.empty((nf, nn, nn, ns, nm))
+    # a tile holds complex cross spectra plus their real coherence
+    block = int(max(1, numpy.sqrt(max_memory / (ns * nm * nf * 24.0))))
+    for i in range(0, nn, block):
+        Fi = F[..., i:i + block, :]
+        for j in range(i, nn, block):
+            G = numpy.matmul(Fi, F[..., j:j + block, :].conj().swapaxes(-1, -2)) / nwin
+            G = G.imag ** 2 if imag else G.real ** 2 + G.imag ** 2
+            G /= P[..., i:i + block, numpy.newaxis] * P[..., numpy.newaxis, j:j + block]
+            C[:, i:i + block, j:j + block] = G.transpose((2, 3, 4, 0, 1))
+            C[:, j:j + block, i:i + block] = G.transpose((2, 4, 3, 0, 1))
+    return C, fs[positive]
 
 
 class NodeCoherence(core.Type):
@@ -135,12 +162,19 @@ class NodeCoherence(core.Type):
         default=256,
         doc="""Should be a power of 2...""")
 
+    noverlap = basic.Integer(
+        label="Overlapping data-points",
+        default=0,
+        required=False,
+        doc="""Number of data-points shared by consecutive blocks (Welch's
+        method); must be smaller than nfft.""")
+
     def evaluate(self):
         "Evaluate coherence on time series."
         cls_attr_name = self.__class__.__name__+".time_series"
         self.time_series.trait["data"].log_debug(owner=cls_attr_name)
         srate = self.time_series.sample_rate
-        coh, freq = coherence(self.time_series.data, srate, nfft=self.nfft)
+        coh, freq = coherence(self.time_series.data, srate, nfft=self.nfft, noverlap=self.noverlap)
         util.log_debug_array(LOG, coh, "coherence")
         util.log_debug_array(LOG, freq, "freq")
         spec = spectral.CoherenceSpectrum(
@@ -153,7 +187,7 @@ class NodeCoherence(core.Type):
 
     def result_shape(self, input_shape):
         """Returns the shape of the main result of NodeCoherence."""
-        freq_len = self.nfft/2 + 1
+        freq_len = (self.nfft + 1) // 2 - 1
         freq_shape = (freq_len,)
         result_shape = (freq_len, input_shape[2], input_shape[2], input_shape[1], input_shape[3])
         return [result_shape, freq_shape]
@@ -36,11 +36,13 @@ return a ComplexCoherence datatype.
 
 """
 
+import multiprocessing
 import numpy
 import tvb.datatypes.spectral as spectral
 import tvb.basic.traits.core as core
 import tvb.basic.traits.types_basic as basic
 import tvb.basic.traits.util as util
+from numpy.lib.stride_tricks import as_strided
 from scipy import signal as sp_signal
 from tvb.datatypes.time_series import TimeSeries
 from tvb.basic.logger.builder import get_logger
@@ -49,12 +51,6 @@ LOG = get_logger(__name__)
 SUPPORTED_WINDOWING_FUNCTIONS = ("hamming", "bartlett", "blackman", "hanning")
 
 
-# NOTE: Work only with 2D TimeSeries -- otherwise a MemoryError will raise
-# My first attempts made use of itertools on the 4D TimeSeries but they were
-# fruitless.
-# Nested `for` loops seem a 'good' solution instead of creating enormous ndarrays
-# to compute the FFT and derived complex spectra at once
-
 class NodeComplexCoherence(core.Type):
     """
     A class for calculating the FFT of a TimeSeries and returning
@@ -169,6 +165,16 @@ class NodeComplexCoherence(core.Type):
         order=-1,
         doc="""This attribute appears to be related to an input projection matrix... Which is not yet implemented""")
 
+    n_jobs = basic.Integer(
+        label="Worker processes",
+        default=1,
+        required=False,
+        order=-1,
+        doc="""Number of worker processes among which the epochs are split. With the default, 1, 
+        everything is computed in the calling process. Each worker receives a copy of its epochs and 
+        holds its own sums of the cross spectra, so this pays off for many long epochs on a machine 
+        with several cores and memory to spare.""")
+
 
     def evaluate(self):
         """
@@ -183,6 +189,8 @@ class NodeComplexCoherence(core.Type):
 
         if len(self.time_series.data.shape) > 2:
             time_series_data = numpy.squeeze((self.time_series.data.mean(axis=-1)).mean(axis=1))
+        else:
+            time_series_data = self.time_series.data
 
         # Divide time-series into epochs, no overlapping
         if self.epoch_length > 0.0:
@@ -193,6 +201,7 @@ class NodeComplexCoherence(core.Type):
         else:
             self.epoch_length = time_series_length
             nepochs = int(numpy.ceil(time_series_length / self.epoch_length))
+            epoch_tpts = tpts
 
         # Segment time-series, overlapping if necessary
         nseg = int(numpy.floor(time_series_length / self.segment_length))
@@ -202,102 +211,61 @@ class NodeComplexCoherence(core.Type):
             nseg = int(numpy.floor((tpts - seg_tpts) / seg_shift_tpts) + 1)
         else:
             self.segment_length = time_series_length
-            seg_tpts = time_series_data.shape[0]
+            seg_tpts = seg_shift_tpts = tpts
+            nseg = 1
 
         # Frequency
         nfreq = int(numpy.min([self.max_freq, numpy.floor((seg_tpts + self.zeropad) / 2.0) + 1]))
 
-        result_shape, av_result_shape = self.result_shape(self.time_series.data.shape, self.max_freq, self.epoch_length,
-                                                          self.segment_length, self.segment_shift,
-                                                          self.time_series.sample_period, self.zeropad,
-                                                          self.average_segments)
-        cs = numpy.zeros(result_shape, dtype=numpy.complex128)
-        av = numpy.matrix(numpy.zeros(av_result_shape, dtype=numpy.complex128))
-        coh = numpy.zeros(result_shape, dtype=numpy.complex128)
+        # (epoch, segment, time, channel) view on the data, without copy
+        data = numpy.asarray(time_series_data)
+        segments = as_strided(data, (nepochs, nseg, seg_tpts, data.shape[1]),
+                              (epoch_tpts * data.strides[0], seg_shift_tpts * data.strides[0]) + data.strides)
 
         # Apply windowing function
+        window = None
         if self.window_function is not None:
             if self.window_function not in SUPPORTED_WINDOWING_FUNCTIONS:
                 LOG.error("Windowing function is: %s" % self.window_function)
                 LOG.error("Must be in: %s" % str(SUPPORTED_WINDOWING_FUNCTIONS))
 
             window_function = eval("".join(("numpy.", self.window_function)))
-            win = window_function(seg_tpts)
-            window_mask = (numpy.kron(numpy.ones((time_series_data.shape[1], 1)), win)).T
-
-        nave = 0
-
-        for j in numpy.arange(nepochs):
-            data = time_series_data[j * epoch_tpts:(j + 1) * epoch_tpts, :]
-
-            for i in numpy.arange(nseg):  # average over all segments;
-                time_series = data[i * seg_shift_tpts: i * seg_shift_tpts + seg_tpts, :]
-
-                if self.detrend_ts:
-                    time_series = sp_signal.detrend(time_series, axis=0)
-
-                datalocfft = numpy.fft.fft(time_series * window_mask, axis=0)
-                datalocfft = numpy.matrix(datalocfft)
-
-                for f in numpy.arange(nfreq):  # for all frequencies
-                    if self.npat == 1:
-                        if not self.average_segments:
-                            cs[:, :, f, i] += numpy.conjugate(datalocfft[f, :].conj().T * datalocfft[f, :])
-                            av[:, f, i] += numpy.conjugate(datalocfft[f, :].conj().T)
-                        else:
-                            cs[:, :, f] += numpy.conjugate(datalocfft[f, :].conj().T * datalocfft[f, :])
-                            av[:, f] += numpy.conjugate(datalocfft[f, :].conj().T)
-                    else:
-                        if not self.average_segments:
-                            cs[:, :, f, j, i] = numpy.conjugate(datalocfft[f, :].conj().T * datalocfft[f, :])
-                            av[:, f, j, i] = numpy.conjugate(datalocfft[f, :].conj().T)
-                        else:
-                            cs[:, :, f, j] += numpy.conjugate(datalocfft[f, :].conj().T * datalocfft[f, :])
-                            av[:, f, j] += numpy.conjugate(datalocfft[f, :].conj().T)
-                del datalocfft
-
-            nave += 1.0
-
-        # End of FORs
-        if not self.average_segments:
-            cs = cs / nave
-            av = av / nave
+            window = window_function(seg_tpts)
+
+        # sums over the epochs are split among the workers, if any, then added up
+        options = window, nfreq, self.detrend_ts, self.average_segments
+        n_jobs = min(self.n_jobs, nepochs)
+        if n_jobs > 1:
+            pool = multiprocessing.Pool(n_jobs)
+            try:
+                sums = pool.map(_cross_spectra_sums, [(segments[epochs],) + options
+                                                      for epochs in numpy.array_split(numpy.arange(nepochs), n_jobs)])
+            finally:
+                pool.close()
+                pool.join()
+            cs = sum(cs_sum for cs_sum, _ in sums)
+            av = sum(av_sum for _, av_sum in sums)
         else:
-            nave = nave * nseg
-            cs = cs / nave
-            av = av / nave
+            cs, av = _cross_spectra_sums((segments,) + options)
+        del segments
+
+        # cs[..., a, b] = <X_a conj(X_b)> and av[..., a] = <X_a>
+        nave = float(nepochs * nseg if self.average_segments else nepochs)
+        cs /= nave
+        av /= nave
 
         # Subtract average
-        for f in numpy.arange(nfreq):
-            if self.subtract_epoch_average:
-                if self.npat == 1:
-                    if not self.average_segments:
-                        for i in numpy.arange(nseg):
-                            cs[:, :, f, i] = cs[:, :, f, i] - av[:, f, i] * av[:, f, i].conj().T
-                    else:
-                        cs[:, :, f] = cs[:, :, f] - av[:, f] * av[:, f].conj().T
-                else:
-                    if not self.average_segments:
-                        for i in numpy.arange(nseg):
-                            for j in numpy.arange(nepochs):
-                                cs[:, :, f, j, i] = cs[:, :, f, j, i] - av[:, f, j, i] * av[:, f, j, i].conj().T
-
-                    else:
-                        for j in numpy.arange(nepochs):
-                            cs[:, :, f, j] = cs[:, :, f, j] - av[:, f, j] * av[:, f, j].conj().T
+        if self.subtract_epoch_average:
+            cs -= av[..., :, numpy.newaxis] * av[..., numpy.newaxis, :].conj()
 
         # Compute Complex Coherence
-        ndim = len(cs.shape)
-        if ndim == 3:
-            for i in numpy.arange(cs.shape[2]):
-                temp = numpy.matrix(cs[:, :, i])
-                coh[:, :, i] = cs[:, :, i] / numpy.sqrt(temp.diagonal().conj().T * temp.diagonal())
-
-        elif ndim == 4:
-            for i in numpy.arange(cs.shape[2]):
-                for j in numpy.arange(cs.shape[3]):
-                    temp = numpy.matrix(numpy.squeeze(cs[:, :, i, j]))
-                    coh[:, :, i, j] = temp / numpy.sqrt(temp.diagonal().conj().T * temp.diagonal().T)
+        diagonal = numpy.diagonal(cs, axis1=-2, axis2=-1)
+        coh = cs / numpy.sqrt(diagonal.conj()[..., :, numpy.newaxis] * diagonal[..., numpy.newaxis, :])
+
+        # back to (channel, channel, frequency [, segment])
+        axes = (1, 2, 0) if self.average_segments else (2, 3, 0, 1)
+        cs = cs.transpose(axes)
+        coh = coh.transpose(axes)
 
         util.log_debug_array(LOG, cs, "result")
         spectra = spectral.ComplexCoherenceSpectrum(source=self.time_series,
@@ -365,3 +333,34 @@ class NodeComplexCoherence(core.Type):
         extend_size = extend_size + 8.0  # Epoch length
         extend_size = extend_size + 8.0  # Segment length
         return extend_size
+
+
+
+def _cross_spectra_sums(args):
+    """
+    Sums over epochs [and segments] of the cross spectra and of the spectra of an
+    (epoch, segment, time, channel) array, as (frequency, [segment,] channel, channel)
+    and (frequency, [segment,] channel) arrays. Takes its arguments as a tuple, to be
+    mapped over chunks of epochs by a process pool.
+    """
+    segments, window, nfreq, detrend, average_segments = args
+    nepochs, nseg, seg_tpts = segments.shape[:3]
+    if detrend:
+        segments = sp_signal.detrend(segments, axis=2)
+    if window is not None:
+        segments = segments * window[:, numpy.newaxis]
+
+    if nfreq <= seg_tpts // 2 + 1:
+        datalocfft = numpy.fft.rfft(segments, axis=2)[:, :, :nfreq]
+    else:
+        datalocfft = numpy.fft.fft(segments, axis=2)[:, :, :nfreq]
+    del segments
+
+    # (frequency, [segment,] channel, epoch [x segment]), to reduce over the last axis by matrix products
+    if average_segments:
+        fft_stack = datalocfft.transpose((2, 3, 0, 1)).reshape((nfreq, -1, nepochs * nseg))
+    else:
+        fft_stack = datalocfft.transpose((2, 1, 3, 0))
+    del datalocfft
+
+    return numpy.matmul(fft_stack, fft_stack.conj().swapaxes(-1, -2)), fft_stack.sum(axis=-1)
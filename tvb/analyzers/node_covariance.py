@@ -45,6 +45,110 @@ from tvb.basic.logger.builder import get_logger
 
 LOG = get_logger(__name__)
 
+# Upper bound, in bytes, for the time points read from a time-series at once
+COVARIANCE_CHUNK_MEMORY = 2 ** 27
+
+
+
+def time_chunks(time_series, time_slice=slice(None)):
+    """
+    Read consecutive time points of a 4D time_series in chunks of at most
+    COVARIANCE_CHUNK_MEMORY bytes, yielding each one as a float64 array with
+    shape (state-variables, modes, time-points, nodes).
+    """
+    input_shape = time_series.read_data_shape()
+    start, stop, _ = time_slice.indices(input_shape[0])
+    step = int(max(1, COVARIANCE_CHUNK_MEMORY // (8 * numpy.prod(input_shape[1:]))))
+    for lo in range(start, stop, step):
+        data = time_series.read_data_slice((slice(lo, min(lo + step, stop)), slice(None),
+                                            slice(None), slice(None)))
+        yield numpy.asarray(data, dtype=numpy.float64).transpose((1, 3, 0, 2))
+
+
+
+class SecondMoments(object):
+    """
+    Streaming accumulator of the means and the co-moments (sums of products
+    of deviations from the mean) between nodes, for all state-variables and
+    modes at once. Chunks are merged with the pairwise update of Chan et al.
+    (1979), so only the current chunk of data is held in memory. With
+    full=False only the variances are kept, for node counts whose covariance
+    matrices would not fit in memory.
+    """
+
+    def __init__(self, full=True):
+        self.full = full
+        self.count = 0
+        self.mean = None
+        self.comoment = None
+
+
+    def update(self, chunk):
+        """
+        Add a (state-variables, modes, time-points, nodes) chunk of data.
+        """
+        count = chunk.shape[2]
+        if count == 0:
+            return
+        mean = chunk.mean(axis=2)
+        centred = chunk - mean[:, :, numpy.newaxis]
+        if self.full:
+            comoment = numpy.matmul(centred.transpose((0, 1, 3, 2)), centred)
+        else:
+            comoment = numpy.einsum('vmti,vmti->vmi', centred, centred)
+        if self.count == 0:
+            self.count, self.mean, self.comoment = count, mean, comoment
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        if self.full:
+            comoment += numpy.einsum('vmi,vmj->vmij', delta, delta) * (self.count * count / float(total))
+        else:
+            comoment += delta ** 2 * (self.count * count / float(total))
+        self.comoment += comoment
+        self.mean += delta * (count / float(total))
+        self.count = total
+
+
+    @property
+    def variance(self):
+        """
+        Per node (state-variables, modes, nodes) variance, normalised by N - 1.
+        """
+        comoment = numpy.diagonal(self.comoment, axis1=2, axis2=3) if self.full else self.comoment
+        return comoment / (self.count - 1.0)
+
+
+    def covariance(self):
+        """
+        (state-variables, modes, nodes, nodes) covariance, normalised by N - 1
+        as numpy.cov does.
+        """
+        return self.comoment / (self.count - 1.0)
+
+
+    def correlation(self):
+        """
+        (state-variables, modes, nodes, nodes) Pearson correlation coefficients,
+        clipped to [-1, 1] as numpy.corrcoef does.
+        """
+        std = numpy.sqrt(numpy.diagonal(self.comoment, axis1=2, axis2=3))
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            correlation = self.comoment / std[:, :, :, numpy.newaxis] / std[:, :, numpy.newaxis, :]
+        return numpy.clip(correlation, -1.0, 1.0, out=correlation)
+
+
+
+def second_moments(time_series, time_slice=slice(None), full=True):
+    """
+    Accumulate the SecondMoments of a 4D time_series in a single pass over its
+    time points, reading them in chunks through read_data_slice.
+    """
+    moments = SecondMoments(full)
+    for chunk in time_chunks(time_series, time_slice):
+        moments.update(chunk)
+    return moments
+
 
 
 
@@ -67,20 +171,15 @@ class NodeCovariance(core.Type):
         cls_attr_name = self.__class__.__name__ + ".time_series"
         self.time_series.trait["data"].log_debug(owner=cls_attr_name)
         
-        data_shape = self.time_series.data.shape
+        data_shape = self.time_series.read_data_shape()
         
         #(nodes, nodes, state-variables, modes)
-        result_shape = (data_shape[2], data_shape[2], data_shape[1], data_shape[3])
+        result_shape = self.result_shape(data_shape)
         LOG.info("result shape will be: %s" % str(result_shape))
         
-        result = numpy.zeros(result_shape)
-        
         #One inter-node temporal covariance matrix for each state-var & mode.
-        for mode in range(data_shape[3]):
-            for var in range(data_shape[1]):
-                data = self.time_series.data[:, var, :, mode]
-                data = data - data.mean(axis=0)[numpy.newaxis, 0]
-                result[:, :, var, mode] = numpy.cov(data.T)
+        moments = second_moments(self.time_series)
+        result = numpy.ascontiguousarray(moments.covariance().transpose((2, 3, 0, 1)))
 
         util.log_debug_array(LOG, result, "result")
 
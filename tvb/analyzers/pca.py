@@ -40,18 +40,56 @@ a PrincipalComponents datatype.
 #      project source timesereis to component timeserries, etc
 
 import numpy
-import matplotlib.mlab as mlab
 #TODO: Currently built around the Simulator's 4D timeseries -- generalise...
 import tvb.datatypes.time_series as time_series
 import tvb.datatypes.mode_decompositions as mode_decompositions
 import tvb.basic.traits.core as core
+import tvb.basic.traits.types_basic as basic
 import tvb.basic.traits.util as util
+from tvb.analyzers.node_covariance import second_moments, time_chunks
 from tvb.basic.logger.builder import get_logger
 
 LOG = get_logger(__name__)
 
 
 
+def randomized_eigh(time_series, n_components, oversamples=10, n_iter=4, seed=42):
+    """
+    Leading eigenvalues and eigenvectors of the inter-node correlation matrix
+    of each (state-variable, mode) of a 4D time_series, by randomized subspace
+    iteration (Halko, Martinsson and Tropp, 2011). The correlation matrices are
+    never formed: each iteration streams the standardised time-series and
+    multiplies it with a (nodes, n_components + oversamples) basis, so memory
+    grows linearly with the number of nodes.
+
+    Returns (state-variables, modes, n_components) eigenvalues, in descending
+    order, and (state-variables, modes, nodes, n_components) eigenvectors.
+    """
+    moments = second_moments(time_series, full=False)
+    mean = moments.mean[:, :, numpy.newaxis]
+    scale = numpy.sqrt(moments.comoment)[:, :, numpy.newaxis]
+
+    def correlate(basis):
+        product = numpy.zeros_like(basis)
+        for chunk in time_chunks(time_series):
+            chunk = (chunk - mean) / scale
+            product += numpy.matmul(chunk.transpose((0, 1, 3, 2)), numpy.matmul(chunk, basis))
+        return product
+
+    shape = moments.mean.shape + (min(n_components + oversamples, moments.mean.shape[2]),)
+    basis = numpy.random.RandomState(seed).randn(*shape)
+    for _ in range(n_iter + 1):
+        basis = correlate(basis)
+        for index in numpy.ndindex(*shape[:2]):
+            basis[index] = numpy.linalg.qr(basis[index])[0]
+
+    eigenvalues, eigenvectors = numpy.linalg.eigh(numpy.matmul(basis.transpose((0, 1, 3, 2)), correlate(basis)))
+    eigenvalues = eigenvalues[:, :, :-n_components - 1:-1]
+    eigenvectors = numpy.matmul(basis, eigenvectors[:, :, :, :-n_components - 1:-1])
+    return eigenvalues, eigenvectors
+
+
+
 class PCA(core.Type):
     """
     Return principal component weights and the fraction of the variance that 
@@ -59,9 +97,10 @@ class PCA(core.Type):
     
     PCA takes time-points as observations and nodes as variables.
     
-    NOTE: The TimeSeries must be longer(more time-points) than the number of
-          nodes -- Mostly a problem for TimeSeriesSurface datatypes, which, if 
-          sampled at 1024Hz, would need to be greater than 16 seconds long.
+    NOTE: Unless fewer n_components than nodes are requested, the TimeSeries
+          must be longer(more time-points) than the number of nodes -- Mostly
+          a problem for TimeSeriesSurface datatypes, which, if sampled at
+          1024Hz, would need to be greater than 16 seconds long.
     """
     
     time_series = time_series.TimeSeries(
@@ -72,9 +111,16 @@ class PCA(core.Type):
             -- Mostly a problem for surface times-series, which, if sampled at
             1024Hz, would need to be greater than 16 seconds long.""")
     
-    #TODO: Maybe should support first N components or neccessary components to
-    #      explain X% of the variance. NOTE: For default surface the weights
-    #      matrix has a size ~ 2GB * modes * vars...
+    n_components = basic.Integer(
+        label = "Number of principal components",
+        required = False,
+        default = None,
+        doc = """When fewer than the number of nodes, only the leading components
+            are computed, by a randomized SVD that streams the time-series and
+            never forms the nodes x nodes correlation matrix. This is what makes
+            PCA of surface time-series practical, for which the full weights
+            matrix has a size ~ 2GB * modes * vars. By default all components
+            are computed exactly.""")
     
     def evaluate(self):
         """
@@ -83,31 +129,33 @@ class PCA(core.Type):
         cls_attr_name = self.__class__.__name__+".time_series"
         self.time_series.trait["data"].log_debug(owner = cls_attr_name)
         
-        ts_shape = self.time_series.data.shape
-        
-        #Need more measurements than variables
-        if ts_shape[0] < ts_shape[2]:
-            msg = "PCA requires a longer timeseries (tpts > number of nodes)."
-            LOG.error(msg)
-            raise Exception(msg)
+        ts_shape = self.time_series.read_data_shape()
+        n_components = min(self.n_components or ts_shape[2], ts_shape[2])
         
-        #(nodes, nodes, state-variables, modes)
-        weights_shape = (ts_shape[2], ts_shape[2], ts_shape[1], ts_shape[3])
-        LOG.info("weights shape will be: %s" % str(weights_shape))
+        if n_components < ts_shape[2]:
+            eigenvalues, eigenvectors = randomized_eigh(self.time_series, n_components)
+        else:
+            #Need more measurements than variables
+            if ts_shape[0] < ts_shape[2]:
+                msg = "PCA requires a longer timeseries (tpts > number of nodes)."
+                LOG.error(msg)
+                raise Exception(msg)
+            
+            #One inter-node correlation matrix for each state-var & mode, all decomposed at once.
+            eigenvalues, eigenvectors = numpy.linalg.eigh(second_moments(self.time_series).correlation())
+            eigenvalues, eigenvectors = eigenvalues[:, :, ::-1], eigenvectors[:, :, :, ::-1]
         
-        fractions_shape = (ts_shape[2], ts_shape[1], ts_shape[3])
-        LOG.info("fractions shape will be: %s" % str(fractions_shape))
+        #The sign of a component is arbitrary: make its largest weight positive
+        largest = numpy.abs(eigenvectors).argmax(axis=2)[:, :, numpy.newaxis]
+        eigenvectors *= numpy.sign(numpy.take_along_axis(eigenvectors, largest, axis=2))
         
-        weights = numpy.zeros(weights_shape)
-        fractions = numpy.zeros(fractions_shape)
+        #(components, nodes, state-variables, modes)
+        weights = numpy.ascontiguousarray(eigenvectors.transpose((3, 2, 0, 1)))
+        LOG.info("weights shape will be: %s" % str(weights.shape))
         
-        #One inter-node temporal covariance matrix for each state-var & mode.
-        for mode in range(ts_shape[3]):
-            for var in range(ts_shape[1]):
-                data = self.time_series.data[:, var, :, mode]
-                data_pca = mlab.PCA(data)
-                fractions[:, var, mode ] = data_pca.fracs
-                weights[:, :, var, mode] = data_pca.Wt
+        #Fraction of the total variance, the trace of the correlation matrix
+        fractions = numpy.ascontiguousarray(eigenvalues.transpose((2, 0, 1))) / ts_shape[2]
+        LOG.info("fractions shape will be: %s" % str(fractions.shape))
         
         util.log_debug_array(LOG, fractions, "fractions")
         util.log_debug_array(LOG, weights, "weights")
@@ -126,9 +174,10 @@ class PCA(core.Type):
         Returns the shape of the main result of the PCA analysis -- compnnent 
         weights matrix and a vector of fractions.
         """
-        weights_shape = (input_shape[2], input_shape[2], input_shape[1],
+        n_components = min(self.n_components or input_shape[2], input_shape[2])
+        weights_shape = (n_components, input_shape[2], input_shape[1],
                          input_shape[3])
-        fractions_shape = (input_shape[2], input_shape[1], input_shape[3])
+        fractions_shape = (n_components, input_shape[1], input_shape[3])
         return [weights_shape, fractions_shape]
     
     
@@ -39,8 +39,9 @@ WaveletSpectrum datatype.
 
 """
 
+import multiprocessing
 import numpy
-import scipy.signal as signal
+from scipy.fftpack import next_fast_len
 import tvb.datatypes.time_series as time_series
 import tvb.datatypes.spectral as spectral
 import tvb.basic.traits.core as core
@@ -112,6 +113,16 @@ class ContinuousWaveletTransform(core.Type):
         required = True,
         doc = """NFC. Must be greater than 5. Ratios of the center frequencies to bandwidths.""")
     
+    n_jobs = basic.Integer(
+        label = "Worker processes",
+        default = 1,
+        required = False,
+        order = -1,
+        doc = """Number of worker processes among which the frequency bands are split. With the
+            default, 1, all bands are computed in the calling process. Each worker receives a copy
+            of the transformed time series, so this pays off for many bands of long recordings
+            on a machine with several cores.""")
+    
     
     
     def evaluate(self):
@@ -175,27 +186,34 @@ class ContinuousWaveletTransform(core.Type):
         
         coef = numpy.zeros(coef_shape, dtype = numpy.complex128)
         util.log_debug_array(LOG, coef, "coef")
-        scales = numpy.arange(0, nf, 1)
-        for i in scales:
-            f0 = freqs[i]
-            SDt = sigma_t[(0, i)]
-            A = Amp[(0, i)]
-            x = numpy.arange(0, 4.0 * SDt * sample_rate, 1) / sample_rate
-            wvlt = A * numpy.exp(-x**2 / (2.0 * SDt**2) ) * numpy.exp(2j * numpy.pi * f0 * x )
-            wvlt = numpy.hstack((numpy.conjugate(wvlt[-1:0:-1]), wvlt))
-            #util.log_debug_array(LOG, wvlt, "wvlt")
-            
-            for var in range(ts_shape[1]):
-                for node in range(ts_shape[2]):
-                    for mode in range(ts_shape[3]):
-                        data = self.time_series.data[:, var, node, mode]
-                        wt = signal.convolve(data, wvlt, 'same')
-                        #util.log_debug_array(LOG, wt, "wt")
-                        res = wt[0::temporal_step]
-                        #NOTE: this is a horrible horrible quick hack (alas, a solution) to avoid broadcasting errors
-                        # when using dt and sample periods which are not powers of 2.
-                        coef[i, :, var, node, mode] = res if len(res) == nt else res[:coef.shape[1]] 
-                        
+        
+        # Each wavelet has 2 * half_len - 1 points, centred on its middle one;
+        # the longest belongs to the lowest frequency.
+        half_lens = [len(numpy.arange(0, 4.0 * sigma_t[(0, i)] * sample_rate, 1)) for i in range(nf)]
+        # Circular convolution matches signal.convolve(..., 'same') when the FFT is long
+        # enough to avoid wrap-around; a multiple of temporal_step allows decimation in
+        # the frequency domain.
+        nfft = temporal_step * next_fast_len(-(-(ts_shape[0] + max(half_lens) - 1) // temporal_step))
+        
+        # All channels are transformed only once.
+        data = self.time_series.data.reshape((ts_shape[0], -1))
+        data_fft = numpy.fft.fft(data, n = nfft, axis = 0)
+        
+        bands = numpy.array([freqs, sigma_t[0], Amp[0]]).T
+        n_jobs = min(self.n_jobs, nf)
+        if n_jobs > 1:
+            chunks = numpy.array_split(numpy.arange(nf), n_jobs)
+            pool = multiprocessing.Pool(n_jobs)
+            try:
+                results = pool.map(_transform_bands, [(data_fft, bands[chunk], sample_rate, temporal_step, nt)
+                                                      for chunk in chunks])
+            finally:
+                pool.close()
+                pool.join()
+            for chunk, res in zip(chunks, results):
+                coef[chunk] = res.reshape((len(chunk), nt) + ts_shape[1:])
+        else:
+            coef[:] = _transform_bands((data_fft, bands, sample_rate, temporal_step, nt)).reshape(coef_shape)
         
         util.log_debug_array(LOG, coef, "coef")
         
@@ -250,3 +268,29 @@ class ContinuousWaveletTransform(core.Type):
         return extend_size
 
 
+
+def _transform_bands(args):
+    """
+    Wavelet coefficients, as a (band, time, channel) array, of the signals whose FFT
+    is given as a (frequency, channel) array, for bands given by rows of centre
+    frequency, temporal standard deviation and amplitude. Takes its arguments as a
+    tuple, to be mapped over chunks of bands by a process pool.
+    """
+    data_fft, bands, sample_rate, temporal_step, nt = args
+    nfft = data_fft.shape[0]
+    nfold = nfft // temporal_step
+    coef = numpy.empty((len(bands), nt, data_fft.shape[1]), dtype = numpy.complex128)
+    for i, (f0, SDt, A) in enumerate(bands):
+        x = numpy.arange(0, 4.0 * SDt * sample_rate, 1) / sample_rate
+        wvlt = A * numpy.exp(-x**2 / (2.0 * SDt**2) ) * numpy.exp(2j * numpy.pi * f0 * x )
+        # wrap the negative times at the end, so that the wavelet is centred on index 0
+        wvlt_circ = numpy.zeros(nfft, dtype = numpy.complex128)
+        wvlt_circ[:len(x)] = wvlt
+        wvlt_circ[nfft - len(x) + 1:] = numpy.conjugate(wvlt[-1:0:-1])
+        
+        wt_fft = data_fft * numpy.fft.fft(wvlt_circ)[:, numpy.newaxis]
+        # Every temporal_step-th point of the inverse transform is the inverse transform
+        # of the spectrum folded onto nfft / temporal_step frequencies.
+        wt_fft = wt_fft.reshape((temporal_step, nfold, -1)).sum(axis = 0)
+        coef[i] = numpy.fft.ifft(wt_fft, axis = 0)[:nt] / temporal_step
+    return coef
@@ -44,7 +44,8 @@ import os
 import numpy
 import zipfile
 import uuid
-from tempfile import gettempdir
+import hashlib
+from tempfile import gettempdir, mkstemp
 from scipy import io as scipy_io
 from tvb.basic.logger.builder import get_logger
 
@@ -82,20 +83,138 @@ class H5Reader(object):
 
 
 
+class ArrayCache(object):
+    """
+    Keep arrays parsed from text/bz2/Matlab sources as .npy files under a user folder, so that later
+    reads of the same unchanged source are served from a memory-mapped file instead of being parsed again.
+
+    Entries are keyed by the absolute source path, its modification time and size, plus the read arguments,
+    thus editing or replacing a source file simply leads to a new entry.
+    """
+
+    CACHED_SUFFIXES = ('.txt', '.bz2', '.mat', '.mtx')
+
+
+    def __init__(self, folder):
+
+        self.logger = get_logger(__name__)
+        self.folder = folder
+
+
+    @property
+    def enabled(self):
+        return bool(self.folder)
+
+
+    def can_cache(self, file_name):
+        return self.enabled and file_name.endswith(self.CACHED_SUFFIXES)
+
+
+    def key(self, source_path, *read_args):
+        """
+        :param source_path: file on disk from which the array is read (for a ZIP, the archive itself)
+        :param read_args: anything else which influences the parsed result (ZIP entry, dtype, columns, ...)
+        :return: a hex digest, or None when the source can not be found on disk
+        """
+        try:
+            source_path = os.path.abspath(source_path)
+            source_stat = os.stat(source_path)
+        except (OSError, TypeError):
+            return None
+        key_parts = (source_path, source_stat.st_mtime, source_stat.st_size) + read_args
+        return hashlib.sha1(repr(key_parts)).hexdigest()
+
+
+    def _entry_path(self, key):
+        return os.path.join(self.folder, key + '.npy')
+
+
+    def load(self, key):
+        """
+        :return: the cached array (copy-on-write memory-mapped, so it can be changed in place),
+                 or None for a cache miss
+        """
+        if key is None:
+            return None
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            return numpy.asarray(numpy.load(entry_path, mmap_mode='c'))
+        except Exception, e:
+            self.logger.debug("Ignoring unreadable cache entry %s: %s" % (entry_path, e))
+            return None
+
+
+    def store(self, key, array):
+        """
+        Write the array as a new cache entry. Sparse matrices, object and empty arrays are not cached.
+        Failures are only logged, as the cache is never required for reading.
+        """
+        if (key is None or not isinstance(array, numpy.ndarray)
+                or array.dtype.hasobject or array.size == 0):
+            return
+        try:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder)
+            # Write under a temporary name first, so that concurrent readers never see a partial entry
+            temp_handle, temp_path = mkstemp(suffix='.npy', dir=self.folder)
+            with os.fdopen(temp_handle, 'wb') as temp_file:
+                numpy.save(temp_file, array)
+            os.rename(temp_path, self._entry_path(key))
+        except (IOError, OSError), e:
+            self.logger.debug("Could not write cache entry in %s: %s" % (self.folder, e))
+
+
+    def clear(self):
+        """
+        Remove all entries from the cache folder.
+        """
+        if not self.enabled or not os.path.isdir(self.folder):
+            return
+        for file_name in os.listdir(self.folder):
+            if file_name.endswith('.npy'):
+                os.remove(os.path.join(self.folder, file_name))
+
+
+
+# Set TVB_READERS_CACHE to an empty value to disable caching.
+READERS_CACHE = ArrayCache(os.environ.get('TVB_READERS_CACHE', os.path.expanduser(
+    os.path.join(os.environ.get('TVB_USER_HOME', '~'), '.tvb-cache', 'readers'))))
+
+
+
 class FileReader(object):
     """
     Read one or multiple numpy arrays from a text/bz2 file.
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache=READERS_CACHE):
 
         self.logger = get_logger(__name__)
         self.file_path = file_path
         self.file_stream = file_path
+        self.cache = cache
 
 
     def read_array(self, dtype=numpy.float64, skip_rows=0, use_cols=None, matlab_data_name=None):
 
+        cache_key = None
+        if self.cache is not None and self.file_stream is self.file_path and self.cache.can_cache(self.file_path):
+            cache_key = self.cache.key(self.file_path, numpy.dtype(dtype).str, skip_rows, use_cols, matlab_data_name)
+            result = self.cache.load(cache_key)
+            if result is not None:
+                self.logger.debug("Read from cache: " + str(self.file_path))
+                return result
+
+        result = self._read_array(dtype, skip_rows, use_cols, matlab_data_name)
+        if cache_key is not None:
+            self.cache.store(cache_key, result)
+        return result
+
+
+    def _read_array(self, dtype, skip_rows, use_cols, matlab_data_name):
+
         self.logger.debug("Starting to read from: " + str(self.file_path))
 
         try:
@@ -158,10 +277,12 @@ class ZipReader(object):
     Read one or many numpy arrays from a ZIP archive.
     """
 
-    def __init__(self, zip_path):
+    def __init__(self, zip_path, cache=READERS_CACHE):
 
         self.logger = get_logger(__name__)
+        self.zip_path = zip_path
         self.zip_archive = zipfile.ZipFile(zip_path)
+        self.cache = cache
 
     def has_file_like(self, file_name):
         for actual_name in self.zip_archive.namelist():
@@ -181,18 +302,32 @@ class ZipReader(object):
             self.logger.warning("File %r not found in ZIP." % file_name)
             raise ReaderException("File %r not found in ZIP." % file_name)
 
+        cache_key = None
+        if self.cache is not None and self.cache.can_cache(matching_file_name):
+            cache_key = self.cache.key(self.zip_path, matching_file_name, numpy.dtype(dtype).str,
+                                       skip_rows, use_cols, matlab_data_name)
+            result = self.cache.load(cache_key)
+            if result is not None:
+                self.logger.debug("Read %s from cache" % matching_file_name)
+                return result
+
         zip_entry = self.zip_archive.open(matching_file_name, 'rU')
 
         if matching_file_name.endswith(".bz2"):
             temp_file = copy_zip_entry_into_temp(zip_entry, matching_file_name)
-            file_reader = FileReader(temp_file)
+            file_reader = FileReader(temp_file, cache=None)
+            try:
+                result = file_reader.read_array(dtype, skip_rows, use_cols, matlab_data_name)
+            finally:
+                os.remove(temp_file)
+        else:
+            file_reader = FileReader(matching_file_name, cache=None)
+            file_reader.file_stream = zip_entry
             result = file_reader.read_array(dtype, skip_rows, use_cols, matlab_data_name)
-            os.remove(temp_file)
-            return result
 
-        file_reader = FileReader(matching_file_name)
-        file_reader.file_stream = zip_entry
-        return file_reader.read_array(dtype, skip_rows, use_cols, matlab_data_name)
+        if cache_key is not None:
+            self.cache.store(cache_key, result)
+        return result
 
 
     def read_optional_array_from_file(self, file_name, dtype=numpy.float64, skip_rows=0,
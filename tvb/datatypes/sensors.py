@@ -39,6 +39,8 @@ methods that are associated with the sensor dataTypes.
 """
 
 import numpy
+import scipy.sparse
+import scipy.spatial
 from tvb.datatypes import arrays
 from tvb.basic.logger.builder import get_logger
 from tvb.basic.traits import types_basic
@@ -130,66 +132,82 @@ class Sensors(MappedType):
         Assumes coordinate systems are aligned, i.e. common x,y,z and origin.
 
         """
+        vertices = surface_to_map.vertices
+        triangles = surface_to_map.triangles
+        number_of_triangles = triangles.shape[0]
+
         # Normalize sensor and vertex locations to unit vectors
         norm_sensors = numpy.sqrt(numpy.sum(self.locations ** 2, axis=1))
         unit_sensors = self.locations / norm_sensors[:, numpy.newaxis]
-        norm_verts = numpy.sqrt(numpy.sum(surface_to_map.vertices ** 2, axis=1))
-        unit_vertices = surface_to_map.vertices / norm_verts[:, numpy.newaxis]
-
-        sensor_locations = numpy.zeros((self.number_of_sensors, 3))
-        for k in range(self.number_of_sensors):
-            # Find the surface vertex most closely aligned with current sensor.
-            current_sensor = unit_sensors[k]
-            alignment = numpy.dot(current_sensor, unit_vertices.T)
-            one_ring = []
-
-            while not one_ring:
-                closest_vertex = alignment.argmax()
-                # Get the set of triangles in the neighbourhood of that vertex.
-                # NOTE: Intersection doesn't always fall within the 1-ring, so, all
-                #      triangles contained in the 2-ring are considered.
-                one_ring = surface_to_map.vertex_neighbours[closest_vertex]
-                if not one_ring:
-                    alignment[closest_vertex] = min(alignment)
-
-            local_tri = [surface_to_map.vertex_triangles[v] for v in one_ring]
-            local_tri = list(set([tri for subar in local_tri for tri in subar]))
-
-            # Calculate a parametrized plane line intersection [t,u,v] for the
-            # set of local triangles, which are considered as defining a plane.
-            tuv = numpy.zeros((len(local_tri), 3))
-            for i, tri in enumerate(local_tri):
-                edge_01 = (surface_to_map.vertices[surface_to_map.triangles[tri, 0]] -
-                           surface_to_map.vertices[surface_to_map.triangles[tri, 1]])
-                edge_02 = (surface_to_map.vertices[surface_to_map.triangles[tri, 0]] -
-                           surface_to_map.vertices[surface_to_map.triangles[tri, 2]])
-                see_mat = numpy.vstack((current_sensor, edge_01, edge_02))
-
-                tuv[i] = numpy.linalg.solve(see_mat.T, surface_to_map.vertices[surface_to_map.triangles[tri, 0].T])
-
-            # Find  which line-plane intersection falls within its triangle
-            # by imposing the condition that u, v, & u+v are contained in [0 1]
-            local_triangle_index = ((0 <= tuv[:, 1]) * (tuv[:, 1] < 1) *
-                                    (0 <= tuv[:, 2]) * (tuv[:, 2] < 1) *
-                                    (0 <= (tuv[:, 1] + tuv[:, 2])) * ((tuv[:, 1] + tuv[:, 2]) < 2)).nonzero()[0]
-
-            if len(local_triangle_index) == 1:
-                # Scale sensor unit vector by t so that it lies on the surface.
-                sensor_locations[k] = current_sensor * tuv[local_triangle_index[0], 0]
-
-            elif len(local_triangle_index) < 1:
-                # No triangle was found in proximity. Draw the sensor somehow in the surface extension area
-                LOG.warning("Could not find a proper position on the given surface for sensor %d:%s. "
-                            "with direction %s" % (k, self.labels[k], str(self.locations[k])))
-                distances = (abs(tuv[:, 1] + tuv[:, 2]))
-                local_triangle_index = distances.argmin()
-                # Scale sensor unit vector by t so that it lies on the surface.
-                sensor_locations[k] = current_sensor * tuv[local_triangle_index, 0]
-
-            else:
-                # More than one triangle was found in proximity. Pick the first.
-                # Scale sensor unit vector by t so that it lies on the surface.
-                sensor_locations[k] = current_sensor * tuv[local_triangle_index[0], 0]
+        norm_verts = numpy.sqrt(numpy.sum(vertices ** 2, axis=1))
+        unit_vertices = vertices / norm_verts[:, numpy.newaxis]
+
+        # Sparse vertex-triangle incidence, used to gather the local triangles of all sensors at once.
+        incidence = scipy.sparse.csr_matrix(
+            (numpy.ones(3 * number_of_triangles), (triangles.ravel(), numpy.repeat(numpy.arange(number_of_triangles), 3))),
+            shape=(vertices.shape[0], number_of_triangles))
+
+        # Find the surface vertex most closely aligned with each sensor. On the unit sphere the nearest
+        # direction is the one with the largest dot product, so a KD-tree over the unit vertex directions
+        # is used. Vertices not belonging to any triangle have no neighbourhood and are skipped.
+        candidate_vertices = numpy.nonzero(numpy.diff(incidence.indptr) *
+                                           numpy.isfinite(unit_vertices).all(axis=1))[0]
+        _, nearest = scipy.spatial.cKDTree(unit_vertices[candidate_vertices]).query(unit_sensors)
+        closest_vertex = candidate_vertices[nearest]
+
+        # Get the set of triangles in the neighbourhood of those vertices.
+        # NOTE: Intersection doesn't always fall within the 1-ring, so, all
+        #      triangles contained in the 2-ring are considered.
+        one_ring = incidence[closest_vertex].dot(incidence.T)
+        local_tri = one_ring.dot(incidence).tocoo()
+        order = numpy.lexsort((local_tri.col, local_tri.row))
+        sensor_idx, tri_idx = local_tri.row[order], local_tri.col[order]
+
+        # Calculate a parametrized plane line intersection [t,u,v] for every (sensor, local triangle) pair
+        # at once (Moller-Trumbore), the triangles being considered as defining a plane.
+        direction = unit_sensors[sensor_idx]
+        vertex_0 = vertices[triangles[tri_idx, 0]]
+        edge_01 = vertices[triangles[tri_idx, 1]] - vertex_0
+        edge_02 = vertices[triangles[tri_idx, 2]] - vertex_0
+        p_vec = numpy.cross(direction, edge_02)
+        determinant = numpy.sum(edge_01 * p_vec, axis=1)
+        if not determinant.all():
+            raise numpy.linalg.LinAlgError("Degenerate triangles found in the neighbourhood of sensors %s."
+                                           % str(numpy.unique(sensor_idx[determinant == 0])))
+        q_vec = numpy.cross(-vertex_0, edge_01)
+        tuv = numpy.empty((len(tri_idx), 3))
+        tuv[:, 0] = numpy.sum(edge_02 * q_vec, axis=1)
+        tuv[:, 1] = numpy.sum(-vertex_0 * p_vec, axis=1)
+        tuv[:, 2] = numpy.sum(direction * q_vec, axis=1)
+        tuv /= determinant[:, numpy.newaxis]
+
+        # Find  which line-plane intersection falls within its triangle
+        # by imposing the condition that u, v, & u+v are contained in [0 1]
+        within = ((0 <= tuv[:, 1]) * (tuv[:, 1] < 1) *
+                  (0 <= tuv[:, 2]) * (tuv[:, 2] < 1) *
+                  (0 <= (tuv[:, 1] + tuv[:, 2])) * ((tuv[:, 1] + tuv[:, 2]) < 2))
+
+        # When no triangle was found in proximity, draw the sensor somehow in the surface extension area,
+        # using the triangle closest to the intersection.
+        distances = abs(tuv[:, 1] + tuv[:, 2])
+        by_distance = numpy.lexsort((distances, sensor_idx))
+        _, first = numpy.unique(sensor_idx[by_distance], return_index=True)
+        chosen = by_distance[first]
+
+        # When more than one triangle was found in proximity, prefer the one actually containing
+        # the intersection (u + v <= 1, ahead of the sensor), then the first one.
+        within_idx = numpy.nonzero(within)[0]
+        contained = (distances[within_idx] <= 1) * (tuv[within_idx, 0] > 0)
+        within_idx = within_idx[numpy.lexsort((~contained, sensor_idx[within_idx]))]
+        found, first = numpy.unique(sensor_idx[within_idx], return_index=True)
+        chosen[found] = within_idx[first]
+
+        for k in numpy.setdiff1d(numpy.arange(self.number_of_sensors), found):
+            LOG.warning("Could not find a proper position on the given surface for sensor %d:%s. "
+                        "with direction %s" % (k, self.labels[k], str(self.locations[k])))
+
+        # Scale sensor unit vectors by t so that they lie on the surface.
+        sensor_locations = unit_sensors * tuv[chosen, 0][:, numpy.newaxis]
 
         return sensor_locations
 
@@ -1086,109 +1086,72 @@ class Surface(MappedType):
             slice_triangles = self.get_triangles_slice(slice_idx)
             slice_vertices = self.get_vertices_slice(slice_idx)
             slice_normals = self.get_vertex_normals_slice(slice_idx)
-            first_index_in_slice = self.split_slices[str(slice_idx)][KEY_VERTICES][KEY_START]
-            # These will keep track of the vertices / triangles / normals for this slice that have
-            # been processed and were found as a part of the boundary
-            processed_vertices = []
-            processed_triangles = []
-            processed_normals = []
-            for triangle in slice_triangles:
-                triangle += first_index_in_slice
-                # Check if there are two points from a triangles that are in separate regions
-                # then send this to further processing that will generate the corresponding
-                # region separation lines depending on the 3rd point from the triangle
-                rt0, rt1, rt2 = array_data[triangle]
-                if rt0 - rt1:
-                    reg_idx1, reg_idx2, dangling_idx = 0, 1, 2
-                elif rt1 - rt2:
-                    reg_idx1, reg_idx2, dangling_idx = 1, 2, 0
-                elif rt2 - rt0:
-                    reg_idx1, reg_idx2, dangling_idx = 2, 0, 1
-                else:
-                    continue
-
-                lines_vert, lines_ind, lines_norm = self._process_triangle(triangle, reg_idx1, reg_idx2, dangling_idx,
-                                                                           first_index_in_slice, array_data,
-                                                                           slice_vertices, slice_normals)
-                ind_offset = len(processed_vertices) / 3
-                processed_vertices.extend(lines_vert)
-                processed_normals.extend(lines_norm)
-                processed_triangles.extend([ind + ind_offset for ind in lines_ind])
-            boundary_vertices.append(processed_vertices)
-            boundary_lines.append(processed_triangles)
-            boundary_normals.append(processed_normals)
+            first_index_in_slice, _ = self._get_slice_vertex_boundaries(slice_idx)
+            slice_regions = array_data[slice_triangles + first_index_in_slice]
+            lines_vert, lines_ind, lines_norm = self._process_triangles(slice_triangles, slice_regions,
+                                                                        slice_vertices, slice_normals)
+            boundary_vertices.append(lines_vert.ravel().tolist())
+            boundary_lines.append(lines_ind.tolist())
+            boundary_normals.append(lines_norm.ravel().tolist())
         return numpy.array([boundary_vertices, boundary_lines, boundary_normals])
 
     @staticmethod
-    def _process_triangle(triangle, reg_idx1, reg_idx2, dangling_idx, indices_offset,
-                          region_mapping_array, vertices, normals):
-        """
-        Process a triangle and generate the required data for a region separation.
-        :param triangle: the actual triangle as a 3 element vector
-        :param reg_idx1: the first vertex that is in a 'conflicting' region
-        :param reg_idx2: the second vertex that is in a 'conflicting' region
-        :param dangling_idx: the third vector for which we know nothing yet.
-                    Depending on this we might generate a line, or a 3 star centered in the triangle
-        :param indices_offset: to take into account the slicing
-        :param region_mapping_array: the region mapping raw array for which the regions are computed
+    def _process_triangles(triangles, triangle_regions, vertices, normals):
+        """
+        Process all the triangles of a slice at once and generate the required data for region separations.
+        A triangle with its three vertices in distinct regions gets a 3-way star centered in the triangle,
+        connecting to the middle of each edge; a triangle spanning only 2 regions gets a line cutting through
+        the middle of the two edges which separate them. Triangles inside a single region are skipped.
+        :param triangles: the triangles of the current slice, indexing into the slice vertices
+        :param triangle_regions: the region of each vertex of those triangles, same shape as triangles
         :param vertices: the current vertex slice
         :param normals: the current normals slice
-        """
-
-        def _star_triangle(point0, point1, point2, result_array):
-            """
-            Helper function that for a given triangle generates a 3-way star centered in the triangle center
-            """
-            center_vertex = [(point0[i] + point1[i] + point2[i]) / 3 for i in range(3)]
-            mid_line1 = [(point0[i] + point1[i]) / 2 for i in range(3)]
-            mid_line2 = [(point1[i] + point2[i]) / 2 for i in range(3)]
-            mid_line3 = [(point2[i] + point0[i]) / 2 for i in range(3)]
-            result_array.extend(center_vertex)
-            result_array.extend(mid_line1)
-            result_array.extend(mid_line2)
-            result_array.extend(mid_line3)
-
-        def _slice_triangle(point0, point1, point2, result_array):
-            """
-            Helper function that for a given triangle generates a line cutting thtough the middle of two edges.
-            """
-            mid_line1 = [(point0[i] + point1[i]) / 2 for i in range(3)]
-            mid_line2 = [(point0[i] + point2[i]) / 2 for i in range(3)]
-            result_array.extend(mid_line1)
-            result_array.extend(mid_line2)
-
-        # performance opportunity: we are computing some values available in caller
-
-        p0 = vertices[triangle[reg_idx1] - indices_offset]
-        p1 = vertices[triangle[reg_idx2] - indices_offset]
-        p2 = vertices[triangle[dangling_idx] - indices_offset]
-        n0 = normals[triangle[reg_idx1] - indices_offset]
-        n1 = normals[triangle[reg_idx2] - indices_offset]
-        n2 = normals[triangle[dangling_idx] - indices_offset]
-        result_vertices = []
-        result_normals = []
-
-        dangling_reg = region_mapping_array[triangle[dangling_idx]]
-        reg_1 = region_mapping_array[triangle[reg_idx1]]
-        reg_2 = region_mapping_array[triangle[reg_idx2]]
-
-        if dangling_reg != reg_1 and dangling_reg != reg_2:
-            # Triangle is actually spanning 3 regions. Create a vertex in the center of the triangle, which connects to
-            # the middle of each edge
-            _star_triangle(p0, p1, p2, result_vertices)
-            _star_triangle(n0, n1, n2, result_normals)
-            result_lines = [0, 1, 0, 2, 0, 3]
-        elif dangling_reg == reg_1:
-            # Triangle spanning only 2 regions, draw a line through the middle of the triangle
-            _slice_triangle(p1, p0, p2, result_vertices)
-            _slice_triangle(n1, n0, n2, result_normals)
-            result_lines = [0, 1]
-        else:
-            # Triangle spanning only 2 regions, draw a line through the middle of the triangle
-            _slice_triangle(p0, p1, p2, result_vertices)
-            _slice_triangle(n0, n1, n2, result_normals)
-            result_lines = [0, 1]
-        return result_vertices, result_lines, result_normals
+        :returns: boundary vertices, flat line indices and boundary normals, with triangles kept in order
+        """
+        rt0, rt1, rt2 = triangle_regions.T
+        boundary = (rt0 != rt1) | (rt1 != rt2)
+        triangles = triangles[boundary]
+        triangle_regions = triangle_regions[boundary]
+
+        # Order each triangle vertices as: two vertices in 'conflicting' regions, then the dangling one
+        # for which we know nothing yet.
+        order = numpy.where((triangle_regions[:, 0] != triangle_regions[:, 1])[:, numpy.newaxis], [0, 1, 2], [1, 2, 0])
+        rows = numpy.arange(len(triangles))[:, numpy.newaxis]
+        triangles = triangles[rows, order]
+        reg_1, reg_2, dangling_reg = triangle_regions[rows, order].T
+
+        star = (dangling_reg != reg_1) & (dangling_reg != reg_2)
+        # For triangles spanning only 2 regions, the line goes from the middle of the conflicting edge to
+        # the middle of the edge between the dangling vertex and the vertex in another region than its own.
+        apex = numpy.where(dangling_reg == reg_1, triangles[:, 1], triangles[:, 0])
+
+        # Stars take 4 vertices and 3 lines, simple lines 2 vertices and 1 line.
+        vertices_per_triangle = numpy.where(star, 4, 2)
+        first_vertex = numpy.cumsum(vertices_per_triangle) - vertices_per_triangle
+        lines_per_triangle = numpy.where(star, 6, 2)
+        first_line = numpy.cumsum(lines_per_triangle) - lines_per_triangle
+
+        result_lines = numpy.empty(lines_per_triangle.sum(), dtype=numpy.int64)
+        star_offset, star_lines = first_vertex[star], first_line[star]
+        for i, ind in enumerate([0, 1, 0, 2, 0, 3]):
+            result_lines[star_lines + i] = star_offset + ind
+        line_offset, line_lines = first_vertex[~star], first_line[~star]
+        result_lines[line_lines] = line_offset
+        result_lines[line_lines + 1] = line_offset + 1
+
+        def _mid_points(points):
+            result = numpy.empty((vertices_per_triangle.sum(), 3), dtype=points.dtype)
+            p0, p1, p2 = points[triangles[star, 0]], points[triangles[star, 1]], points[triangles[star, 2]]
+            result[star_offset] = (p0 + p1 + p2) / 3
+            result[star_offset + 1] = (p0 + p1) / 2
+            result[star_offset + 2] = (p1 + p2) / 2
+            result[star_offset + 3] = (p2 + p0) / 2
+            p0, p1, p_apex = points[triangles[~star, 0]], points[triangles[~star, 1]], points[apex[~star]]
+            result[line_offset] = (p0 + p1) / 2
+            result[line_offset + 1] = (p_apex + points[triangles[~star, 2]]) / 2
+            return result
+
+        return _mid_points(vertices), result_lines, _mid_points(normals)
 
 
 # TODO consider using just an enum on surface to indicate type, avoid excess classes.
@@ -39,7 +39,7 @@ import math
 from numba import cuda, int32, float32
 from tvb.simulator._numba.coupling import cu_delay_cfun, next_pow_of_2
 from tvb.simulator._numba.util import cu_expr
-from tvb.simulator.async import AsyncResult
+from tvb.simulator.async import AsyncNoise
 from randomstate.prng.xorshift128 import xorshift128
 import datetime
 
@@ -47,22 +47,6 @@ import datetime
 cuda.detect()
 
 
-class AsyncNoise(object):
-
-    def __init__(self, shape, rng):
-        self.shape = shape
-        self.rng = rng
-        self._set_ar()
-
-    def _set_ar(self):
-        self._ar = AsyncResult.do(self.rng.randn, *self.shape)
-
-    def get(self):
-        noise = self._ar.result
-        self._set_ar()
-        return noise
-
-
 def make_kernel(delays, n_thread_per_block, n_inner):
     horizon = next_pow_of_2(delays.max() + 1)
     cfpre = cu_expr('sin(xj - xi)', ('xi', 'xj'), {})
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Evaluation of functions in background threads, so that work which releases
+the GIL, such as generating random numbers, overlaps with the integration.
+
+"""
+
+import sys
+import threading
+import six
+
+
+class AsyncResult(object):
+    """
+    Result of a function evaluated in a background thread::
+
+        ar = AsyncResult.do(numpy.random.randn, 1000, 1000)
+        # ... other work ...
+        x = ar.result
+
+    Reading ``result`` waits for the thread to finish and re-raises any
+    exception the function raised.
+
+    """
+
+    def __init__(self, f, *args, **kwargs):
+        self._value = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(f, args, kwargs))
+        self._thread.daemon = True
+
+    def _run(self, f, args, kwargs):
+        try:
+            self._value = f(*args, **kwargs)
+        except Exception:
+            self._error = sys.exc_info()
+
+    @classmethod
+    def do(cls, f, *args, **kwargs):
+        "Start evaluating f(*args, **kwargs) in a new thread."
+        ar = cls(f, *args, **kwargs)
+        ar._thread.start()
+        return ar
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    @property
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            six.reraise(*self._error)
+        return self._value
+
+
+class AsyncNoise(object):
+    """
+    Standard normal variates of a given shape, generated by a background
+    thread in blocks of ``block_size`` draws. The next block is generated
+    while the current one is handed out, one draw per call to ``get``.
+
+    Blocks are drawn in order from the random state ``rng``, and numpy's
+    RandomState continues its stream of normal variates across calls, so the
+    variates are the same for any block size, including drawing one array of
+    ``shape`` at a time. As a block is drawn ahead, ``rng`` must not be used
+    elsewhere until ``close`` has been called.
+
+    """
+
+    def __init__(self, shape, rng, block_size=1):
+        self.shape = tuple(shape)
+        self.rng = rng
+        self.block_size = int(block_size)
+        self._block = None
+        self._index = 0
+        self._next = self._draw()
+
+    def _draw(self):
+        return AsyncResult.do(self.rng.normal, size=(self.block_size, ) + self.shape)
+
+    def get(self):
+        "Return the next array of variates."
+        if self._block is None or self._index == self.block_size:
+            self._block = self._next.result
+            self._next = self._draw()
+            self._index = 0
+        noise = self._block[self._index]
+        self._index += 1
+        return noise
+
+    def close(self):
+        "Wait for the block being generated, after which rng may be used again."
+        if self._next is not None:
+            self._next.result
+            self._next = None
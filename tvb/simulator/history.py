@@ -179,6 +179,53 @@ class SparseHistory(DenseHistory):
         return nbytes
 
 
+class InterpolatedHistory(SparseHistory):
+    """
+    Sparse history which also answers queries at fractional steps, as required
+    by adaptive integrators, interpolating linearly in time between the stored
+    steps. Times after the latest stored step are held at its state.
+
+    """
+
+    latest_step = None
+    current_indices = NDArray(('n_cvar', 'n_node', 'n_mode'), 'i')
+
+    def __init__(self, weights, delays, cvars, n_mode):
+        super(InterpolatedHistory, self).__init__(weights, delays, cvars, n_mode)
+        self.current_indices = numpy.r_[:self.time_stride].reshape((self.n_cvar, self.n_node, self.n_mode))
+
+    def initialize(self, init, step=None):
+        super(InterpolatedHistory, self).initialize(init)
+        self.latest_step = step
+
+    def update(self, step, new_state):
+        super(InterpolatedHistory, self).update(step, new_state)
+        self.latest_step = step
+
+    def _interpolate(self, time, indices):
+        "Interpolate the buffer at fractional steps time, broadcast with the flat indices within a step."
+        lo = numpy.floor(time)
+        frac = time - lo
+        hi = lo + 1
+        if self.latest_step is not None:
+            lo = numpy.minimum(lo, self.latest_step)
+            hi = numpy.minimum(hi, self.latest_step)
+        state = self.buffer.take((lo.astype('i') % self.n_time) * self.time_stride + indices)
+        delta = self.buffer.take((hi.astype('i') % self.n_time) * self.time_stride + indices)
+        delta -= state
+        delta *= frac
+        state += delta
+        return state
+
+    def query_sparse(self, step):
+        if step == int(step) and (self.latest_step is None or step - 1 <= self.latest_step):
+            return super(InterpolatedHistory, self).query_sparse(int(step))
+        time_indices = (step - 1 - self.nnz_idelays).reshape((-1, 1))
+        delayed_state = self._interpolate(time_indices, self.const_indices)
+        current_state = self._interpolate(numpy.array(step - 1.0), self.current_indices)
+        return current_state, delayed_state
+
+
 # implement in order  NumPy, Numba & OpenCL versions
 
 # simulator.history becomes impl instance
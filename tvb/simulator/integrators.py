@@ -48,6 +48,7 @@ will be consistent with Monitor periods corresponding to any of [4096, 2048, 102
 import functools
 import numpy
 import scipy.integrate
+from numba import vectorize, float64
 from tvb.basic.traits import core, types_basic as basic
 from tvb.datatypes import arrays
 from . import noise
@@ -72,7 +73,8 @@ class Integrator(core.Type):
         40: 3381, 1989.
 
     """
-    _base_classes = ['Integrator', 'IntegratorStochastic', 'RungeKutta4thOrderDeterministic']
+    _base_classes = ['Integrator', 'IntegratorStochastic', 'IntegratorAdaptive', 'EmbeddedRungeKutta',
+                     'RungeKutta4thOrderDeterministic']
 
     dt = basic.Float(
         label = "Integration-step size (ms)", 
@@ -109,9 +111,41 @@ class Integrator(core.Type):
         msg = "Integrator is a base class; please use a suitable subclass."
         raise NotImplementedError(msg)
 
+    _workspace = None
+    _clamp_index = None
+
+    def _work(self, X, dX, n):
+        """
+        Return n work arrays, of the shape of the state X and the type of X + dX,
+        which are allocated once per state shape rather than at every step.
+        The state returned by a scheme is always a new array, because history
+        and monitors, e.g. Raw, may keep a reference to it.
+
+        """
+        key = X.shape, numpy.result_type(X, dX), n
+        if self._workspace is None or self._workspace[0] != key:
+            self._workspace = key, [numpy.empty_like(X, dtype=key[1]) for _ in range(n)]
+        return self._workspace[1]
+
+    def _add_stimulus(self, X, stimulus, work):
+        "Add dt * stimulus to X in place, using work rather than a temporary for array stimuli."
+        if numpy.ndim(stimulus) == 0:
+            if stimulus != 0.0:
+                X += self.dt * stimulus
+        else:
+            numpy.multiply(stimulus, self.dt, out=work)
+            X += work
+
     def clamp_state(self, X):
         if self.clamped_state_variable_values is not None:
-            X[self.clamped_state_variable_indices] = self.clamped_state_variable_values
+            indices = self.clamped_state_variable_indices
+            if self._clamp_index is None or self._clamp_index[0] is not indices:
+                # consecutive indices become a slice, which assigns without fancy indexing
+                index = indices
+                if numpy.ndim(indices) == 1 and len(indices) > 0 and numpy.all(numpy.diff(indices) == 1):
+                    index = slice(indices[0], indices[-1] + 1)
+                self._clamp_index = indices, index
+            X[self._clamp_index[1]] = self.clamped_state_variable_values
 
     def __str__(self):
         return simple_gen_astr(self, 'dt')
@@ -152,6 +186,31 @@ class IntegratorStochastic(Integrator):
     def __str__(self):
         return simple_gen_astr(self, 'dt noise')
 
+    def check_noise(self, state_shape):
+        """
+        Check that the noise dispersion fits states of state_shape, once when
+        the noise is configured rather than at every step.
+
+        """
+        with numpy.errstate(all='ignore'):
+            gfun_shape = numpy.shape(self.noise.gfun(numpy.ones(state_shape)))
+        if gfun_shape not in ((), (1,)) and gfun_shape[0] != state_shape[0]:
+            msg = ("Got shape %s for noise but require %s."
+                   " You need to reconfigure noise after you have changed your model.")
+            raise ValueError(msg % (gfun_shape, tuple(state_shape[:2])))
+
+
+@vectorize([float64(float64, float64, float64, float64, float64)], nopython=True)
+def _euler_step(x, dx, variates, scale, dt):
+    "Fused X + dt dX + g dW, with the operations in the order of the NumPy schemes."
+    return dx * dt + x + variates * scale
+
+
+@vectorize([float64(float64, float64, float64, float64, float64, float64)], nopython=True)
+def _heun_corrector(x, dx1, dx2, variates, scale, dt):
+    "Fused X + dt (dX1 + dX2) / 2 + g dW, with the operations in the order of the NumPy schemes."
+    return (dx1 + dx2) * dt / 2.0 + x + variates * scale
+
 
 class HeunDeterministic(Integrator):
     """
@@ -175,14 +234,18 @@ class HeunDeterministic(Integrator):
         cf. Equation 1.11, page 283.
 
         """
-        #import pdb; pdb.set_trace()
         m_dx_tn = dfun(X, coupling, local_coupling)
-        inter = X + self.dt * (m_dx_tn  + stimulus)
+        inter, work = self._work(X, m_dx_tn, 2)
+        numpy.add(m_dx_tn, stimulus, out=inter)
+        inter *= self.dt
+        inter += X
         self.clamp_state(inter)
 
-        dX = (m_dx_tn + dfun(inter, coupling, local_coupling)) * self.dt / 2.0
-
-        X_next = X + dX + self.dt * stimulus
+        X_next = m_dx_tn + dfun(inter, coupling, local_coupling)
+        X_next *= self.dt
+        X_next /= 2.0
+        X_next += X
+        self._add_stimulus(X_next, stimulus, work)
         self.clamp_state(X_next)
         return X_next
 
@@ -208,24 +271,37 @@ class HeunStochastic(IntegratorStochastic):
         See page 1180.
 
         """
-        noise = self.noise.generate(X.shape)
-        noise_gfun = self.noise.gfun(X)
-        if (noise_gfun.shape != (1,) and noise.shape[0] != noise_gfun.shape[0]):
-            msg = str("Got shape %s for noise but require %s."
-                      " You need to reconfigure noise after you have changed your model."%(
-                       noise_gfun.shape, (noise.shape[0], noise.shape[1])))
-            raise Exception(msg)
-
+        variates, scale = self.noise.increment(X)
         m_dx_tn = dfun(X, coupling, local_coupling)
+        inter, work = self._work(X, m_dx_tn, 2)
+        _euler_step(X, m_dx_tn, variates, scale, self.dt, out=inter)
+        self._add_stimulus(inter, stimulus, work)
+        self.clamp_state(inter)
 
-        noise *= noise_gfun
+        X_next = _heun_corrector(X, m_dx_tn, dfun(inter, coupling, local_coupling), variates, scale, self.dt)
+        self._add_stimulus(X_next, stimulus, work)
+        self.clamp_state(X_next)
+        return X_next
 
-        inter = X + self.dt * m_dx_tn + noise + self.dt * stimulus
-        self.clamp_state(inter)
+    def _numpy_scheme(self, X, dfun, coupling, local_coupling, stimulus):
+        "The scheme with NumPy operations on work arrays, giving the same result."
+        variates, scale = self.noise.increment(X)
+        m_dx_tn = dfun(X, coupling, local_coupling)
+        inter, noise, work = self._work(X, m_dx_tn, 3)
+        numpy.multiply(variates, scale, out=noise)
 
-        dX = (m_dx_tn + dfun(inter, coupling, local_coupling)) * self.dt / 2.0
+        numpy.multiply(m_dx_tn, self.dt, out=inter)
+        inter += X
+        inter += noise
+        self._add_stimulus(inter, stimulus, work)
+        self.clamp_state(inter)
 
-        X_next = X + dX + noise + self.dt * stimulus
+        X_next = m_dx_tn + dfun(inter, coupling, local_coupling)
+        X_next *= self.dt
+        X_next /= 2.0
+        X_next += X
+        X_next += noise
+        self._add_stimulus(X_next, stimulus, work)
         self.clamp_state(X_next)
         return X_next
 
@@ -253,7 +329,9 @@ class EulerDeterministic(Integrator):
 
         self.dX = dfun(X, coupling, local_coupling) 
 
-        X_next = X + self.dt * (self.dX + stimulus)
+        X_next = self.dX + stimulus
+        X_next *= self.dt
+        X_next += X
         self.clamp_state(X_next)
         return X_next
 
@@ -284,10 +362,21 @@ class EulerStochastic(IntegratorStochastic):
 
         """
 
-        noise = self.noise.generate(X.shape)
-        dX = dfun(X, coupling, local_coupling) * self.dt 
-        noise_gfun = self.noise.gfun(X)
-        X_next = X + dX + noise_gfun * noise + self.dt * stimulus
+        variates, scale = self.noise.increment(X)
+        X_next = _euler_step(X, dfun(X, coupling, local_coupling), variates, scale, self.dt)
+        self._add_stimulus(X_next, stimulus, self._work(X, X_next, 1)[0])
+        self.clamp_state(X_next)
+        return X_next
+
+    def _numpy_scheme(self, X, dfun, coupling, local_coupling, stimulus):
+        "The scheme with NumPy operations, giving the same result."
+        variates, scale = self.noise.increment(X)
+        X_next = dfun(X, coupling, local_coupling) * self.dt
+        X_next += X
+        noise = self._work(X, X_next, 1)[0]
+        numpy.multiply(variates, scale, out=noise)
+        X_next += noise
+        self._add_stimulus(X_next, stimulus, noise)
         self.clamp_state(X_next)
         return X_next
 
@@ -325,23 +414,314 @@ class RungeKutta4thOrderDeterministic(Integrator):
         dt6 = dt / 6.0
 
         k1 = dfun(X, coupling, local_coupling)
-        inter_k1 = X + dt2 * k1
+        # separate stage buffers, in case dfun returns (a view of) its input
+        inter_k1, inter_k2, inter_k3, work = self._work(X, k1, 4)
+        numpy.multiply(k1, dt2, out=inter_k1)
+        inter_k1 += X
         self.clamp_state(inter_k1)
         k2 = dfun(inter_k1, coupling, local_coupling)
-        inter_k2 = X + dt2 * k2
+        numpy.multiply(k2, dt2, out=inter_k2)
+        inter_k2 += X
         self.clamp_state(inter_k2)
         k3 = dfun(inter_k2, coupling, local_coupling)
-        inter_k3 = X + dt * k3
+        numpy.multiply(k3, dt, out=inter_k3)
+        inter_k3 += X
         self.clamp_state(inter_k3)
         k4 = dfun(inter_k3, coupling, local_coupling)
 
-        dX = dt6 * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+        X_next = 2.0 * k2
+        X_next += k1
+        numpy.multiply(k3, 2.0, out=work)
+        X_next += work
+        X_next += k4
+        X_next *= dt6
+        X_next += X
+        self._add_stimulus(X_next, stimulus, work)
+        self.clamp_state(X_next)
+        return X_next
+
+
+class HeunMultiRate(HeunDeterministic):
+    """
+    A multi-rate variant of the Heun method, for models whose slow state
+    variables, listed in the model's ``slow_state_variables``, change on a
+    time scale much longer than ``dt``. The derivatives of the slow variables,
+    including their coupling terms, are evaluated once every ``slow_steps``
+    steps and held in between, while the fast variables are integrated with
+    the Heun method at every step, evaluating only the fast equations.
+
+    Within the simulator, the model's split derivatives and the indices of
+    its slow state variables are set on the integrator; a model without slow
+    state variables is integrated with the usual Heun method.
+
+    """
+
+    _ui_name = "Multi-rate Heun"
+
+    slow_steps = basic.Integer(
+        label="Steps between slow updates",
+        default=10,
+        required=True,
+        doc="""Number of integration steps over which the derivatives of the
+        slow state variables are held, before being evaluated again.""")
+
+    # set by the simulator from the model
+    slow_indices = ()
+    dfun_fast = dfun_slow = None
 
-        X_next = X + dX + self.dt * stimulus
+    _last = None
+    _n_step = 0
+
+    def scheme(self, X, dfun, coupling, local_coupling, stimulus):
+        r"""
+        Heun step for the fast variables, and for the slow ones with their
+        derivatives from the last slow update,
+
+        .. math::
+            \dot{s}_m = ds(t_{mk}, X_{mk})
+
+        """
+        slow = self.slow_indices
+        if len(slow) == 0:
+            return super(HeunMultiRate, self).scheme(X, dfun, coupling, local_coupling, stimulus)
+        if X is not self._last:
+            self._n_step = 0
+        if self._n_step % self.slow_steps == 0:
+            self._slow_dX = (self.dfun_slow or dfun)(X, coupling, local_coupling)[slow]
+        self._n_step += 1
+        dfun_fast = self.dfun_fast or dfun
+
+        def held_dfun(X, coupling, local_coupling):
+            dX = dfun_fast(X, coupling, local_coupling)
+            dX[slow] = self._slow_dX
+            return dX
+
+        X_next = super(HeunMultiRate, self).scheme(X, held_dfun, coupling, local_coupling, stimulus)
+        self._last = X_next
+        return X_next
+
+
+class IntegratorAdaptive(Integrator):
+    """
+    The IntegratorAdaptive class is a base class for integrators which choose
+    their own step size, under control of the local error estimate, and may
+    take steps spanning many of the simulator's steps of size ``dt``. Each
+    call of the scheme still advances the state by ``dt``, evaluating the
+    continuous extension of the current step where possible, so that the
+    history and monitors see the usual time grid.
+
+    Within the simulator, the coupling is a function of the time elapsed since
+    the state ``X``, and delayed states are interpolated in the history at the
+    stage times. Steps are therefore limited to the shortest conduction delay
+    less ``dt``, and to ``dt`` for connections without delay, whose coupling is
+    held over the step as in the fixed step schemes.
+
+    Subclasses implement taking a step from the end of the last one, and its
+    continuous extension.
+
+    """
+
+    atol = basic.Float(
+        label="Absolute tolerance",
+        default=1e-6,
+        required=True,
+        doc="""Absolute tolerance of the local error estimate of each step.""")
+
+    rtol = basic.Float(
+        label="Relative tolerance",
+        default=1e-3,
+        required=True,
+        doc="""Relative tolerance of the local error estimate of each step.""")
+
+    max_step = basic.Float(
+        label="Maximum step size (ms)",
+        default=0.0,
+        required=False,
+        doc="""Upper bound on the size of the adaptive steps, 0 for no bound
+        other than the one due to the conduction delays.""")
+
+    # bound on the step size due to the conduction delays in ms, set by the simulator
+    delay_bound = numpy.inf
+
+    _last = None
+    n_steps = n_rejected = 0
+
+    def _reset(self, X):
+        "Start integrating from X, which is at time 0."
+        self._n_out = 0
+        self._t_old = self._t_new = 0.0
+        self._x_new = X
+        self.n_steps = self.n_rejected = 0
+
+    def _step_bound(self, coupling):
+        "Bound on the step size, due to max_step and, when coupling is callable, the delays."
+        h = numpy.inf
+        if self.max_step > 0.0:
+            h = self.max_step
+        if callable(coupling):
+            h = min(h, self.delay_bound)
+        return h
+
+    def _step(self, dfun, coupling_at, local_coupling, stimulus, max_step):
+        "Take one step from the end of the last one, of size at most max_step."
+        raise NotImplementedError
+
+    def _dense(self, t):
+        "Evaluate the continuous extension of the last step at time t."
+        raise NotImplementedError
+
+    def scheme(self, X, dfun, coupling, local_coupling, stimulus):
+        r"""
+        Advance the state by dt. When coupling is callable, it is called with
+        the time elapsed since the state X, in ms, to obtain the coupling at
+        each stage, otherwise it is held constant.
+
+        """
+        if X is not self._last:
+            self._reset(X)
+        t0 = self._n_out * self.dt
+        t1 = t0 + self.dt
+        if callable(coupling):
+            coupling_at = lambda t: coupling(t - t0)
+        else:
+            coupling_at = lambda t: coupling
+        max_step = self._step_bound(coupling)
+        while self._t_new < t1 - 1e-9 * self.dt:
+            self._step(dfun, coupling_at, local_coupling, stimulus, max_step)
+        if abs(self._t_new - t1) <= 1e-9 * self.dt:
+            X_next = self._x_new.copy()
+        else:
+            X_next = self._dense(t1)
         self.clamp_state(X_next)
+        self._n_out += 1
+        self._last = X_next
         return X_next
 
 
+class EmbeddedRungeKutta(IntegratorAdaptive):
+    """
+    Base class for explicit Runge-Kutta methods with an embedded method for
+    error control. Subclasses provide the Butcher tableau, whose last stage
+    is evaluated at the new state and reused as the first stage of the next
+    step, the weights of the error estimate and the coefficients of the
+    continuous extension.
+
+    """
+
+    _A = _C = _E = _P = None
+    _error_order = None
+
+    def _reset(self, X):
+        super(EmbeddedRungeKutta, self)._reset(X)
+        self._k_new = None
+        self._q = None
+        self._h = self.dt
+
+    @staticmethod
+    def _weighted_sum(weights, ks):
+        "Sum of the stages ks weighted by weights, skipping zero weights."
+        total = None
+        for w, k in zip(weights, ks):
+            if w == 0.0:
+                continue
+            if total is None:
+                total = w * k
+            else:
+                total += w * k
+        return total
+
+    def _step(self, dfun, coupling_at, local_coupling, stimulus, max_step):
+        "Take one step from the end of the last one, adapting its size."
+        t, x = self._t_new, self._x_new
+        k = self._k_new
+        if k is None:
+            k = dfun(x, coupling_at(t), local_coupling) + stimulus
+        factor_exp = -1.0 / (self._error_order + 1)
+        h = min(self._h, max_step)
+        while True:
+            ks = [k]
+            for a, c in zip(self._A, self._C):
+                x_ = self._weighted_sum(a, ks)
+                x_ *= h
+                x_ += x
+                self.clamp_state(x_)
+                ks.append(dfun(x_, coupling_at(t + c * h), local_coupling) + stimulus)
+            # x_ is now the new state
+            scale = numpy.maximum(abs(x), abs(x_))
+            scale *= self.rtol
+            scale += self.atol
+            error = self._weighted_sum(self._E, ks)
+            error *= h
+            error /= scale
+            error = numpy.sqrt(numpy.mean(error ** 2))
+            if error <= 1.0:
+                break
+            self.n_rejected += 1
+            if not numpy.isfinite(error):
+                factor = 0.2
+            else:
+                factor = max(0.2, 0.9 * error ** factor_exp)
+            h *= factor
+            if h < 1e-12 * self.dt:
+                raise ValueError('%s step size underflow at t=%g ms' % (self.__class__.__name__, t))
+        self.n_steps += 1
+        self._t_old, self._t_new = t, t + h
+        self._x_old, self._x_new = x, x_
+        self._k_new = ks[-1]
+        self._ks = ks
+        self._q = None
+        if error == 0.0:
+            factor = 10.0
+        else:
+            factor = min(10.0, 0.9 * error ** factor_exp)
+        self._h = h * factor
+
+    def _dense(self, t):
+        "Evaluate the continuous extension of the last step at time t."
+        h = self._t_new - self._t_old
+        if self._q is None:
+            self._q = [self._weighted_sum(p, self._ks) for p in self._P.T]
+        theta = (t - self._t_old) / h
+        q = self._q
+        x = q[-1] * theta
+        for q_ in q[-2::-1]:
+            x += q_
+            x *= theta
+        x *= h
+        x += self._x_old
+        return x
+
+
+class DormandPrinceDeterministic(EmbeddedRungeKutta):
+    """
+    The explicit Runge-Kutta method of Dormand and Prince, of order 5 with an
+    embedded method of order 4 for error control, and a continuous extension
+    of order 4, following Hairer, Norsett and Wanner, *Solving Ordinary
+    Differential Equations I*, Springer 1993, section II.6.
+
+    """
+
+    _ui_name = "Adaptive Dormand-Prince, order (4, 5)"
+
+    _C = numpy.array([1/5., 3/10., 4/5., 8/9., 1.0, 1.0])
+    _A = [numpy.array([1/5.]),
+          numpy.array([3/40., 9/40.]),
+          numpy.array([44/45., -56/15., 32/9.]),
+          numpy.array([19372/6561., -25360/2187., 64448/6561., -212/729.]),
+          numpy.array([9017/3168., -355/33., 46732/5247., 49/176., -5103/18656.]),
+          numpy.array([35/384., 0.0, 500/1113., 125/192., -2187/6784., 11/84.])]
+    _E = numpy.array([71/57600., 0.0, -71/16695., 71/1920., -17253/339200., 22/525., -1/40.])
+    _P = numpy.array([
+        [1.0, -8048581381/2820520608., 8663915743/2820520608., -12715105075/11282082432.],
+        [0.0, 0.0, 0.0, 0.0],
+        [0.0, 131558114200/32700410799., -68118460800/10900136933., 87487479700/32700410799.],
+        [0.0, -1754552775/470086768., 14199869525/1410260304., -10690763975/1880347072.],
+        [0.0, 127303824393/49829197408., -318862633887/49829197408., 701980252875/199316789632.],
+        [0.0, -282668133/205662961., 2019193451/616988883., -1453857185/822651844.],
+        [0.0, 40617522/29380423., -110615467/29380423., 69997945/29380423.]])
+    _error_order = 4
+
+
 class Identity(Integrator):
     """
     The Identity integrator does not apply any scheme to the
@@ -408,7 +788,9 @@ class SciPySDE(SciPyODEBase):
 
     def scheme(self, X, dfun, coupling, local_coupling, stimulus):
         X_next = self._apply_ode(X, dfun, coupling, local_coupling, stimulus)
-        X_next += self.noise.gfun(X) * self.noise.generate(X.shape)
+        noise = self.noise.generate(X.shape)
+        noise *= self.noise.gfun(X)
+        X_next += noise
         self.clamp_state(X_next)
         return X_next
 
@@ -435,3 +817,90 @@ class Dop853(SciPyODE, Integrator):
 class Dop853Stochastic(SciPySDE, IntegratorStochastic):
     _scipy_ode_integrator_name = "dop853"
     _ui_name = "Stochastic Dormand-Prince, order 8 (5, 3)"
+
+
+class SciPyIVP(IntegratorAdaptive):
+    """
+    Integrates with one of the solvers of SciPy's ``solve_ivp``, which is
+    called once for as many steps of size ``dt`` as the conduction delays
+    permit, rather than once per step, and the states on the time grid are
+    evaluated from its dense output.
+
+    The solver is kept from one block of steps to the next, with its step
+    size and, for the implicit methods, its Jacobian, unless clamping changed
+    the state at the end of the block, in which case a new solver is started
+    there, selecting its first step again.
+
+    """
+
+    _ui_name = "SciPy initial value problem solver"
+
+    method = basic.Enumerate(
+        label="Method",
+        options=["RK45", "RK23", "Radau", "BDF", "LSODA"],
+        default=["RK45"],
+        select_multiple=False,
+        doc="""The solve_ivp method: explicit Runge-Kutta methods of order 5(4)
+        or 3(2), implicit Runge-Kutta or backward differentiation formulae for
+        stiff problems, or LSODA switching automatically between Adams and BDF
+        methods.""")
+
+    max_block = basic.Integer(
+        label="Maximum steps per solver call",
+        default=1000,
+        required=True,
+        doc="""The largest number of steps of size dt for which the solver is
+        called at once.""")
+
+    def _step_bound(self, coupling):
+        "Bound on the time spanned by a solver call, max_step bounding the solver's own steps."
+        h = self.max_block * self.dt
+        if callable(coupling):
+            h = min(h, self.delay_bound)
+        return h
+
+    def _reset(self, X):
+        super(SciPyIVP, self)._reset(X)
+        self._solver = None
+
+    def _new_solver(self, t, x, t_bound):
+        "Start a solver at state x at time t, calling the current right hand side."
+        Solver = getattr(scipy.integrate, str(self.method[0]))
+        return Solver(lambda t, y: self._fun(t, y), t, x.ravel(), t_bound, rtol=self.rtol, atol=self.atol,
+                      max_step=self.max_step if self.max_step > 0.0 else numpy.inf)
+
+    def _step(self, dfun, coupling_at, local_coupling, stimulus, max_step):
+        "Solve from the end of the last solver call for max_step ms."
+        t, x = self._t_new, self._x_new
+        shape = x.shape
+
+        def fun(t, y):
+            dX = dfun(y.reshape(shape), coupling_at(t), local_coupling) + stimulus
+            return dX.ravel()
+
+        self._fun = fun
+        solver = self._solver
+        if solver is None or not numpy.array_equal(solver.y, x.ravel()):
+            solver = self._solver = self._new_solver(t, x, t + max_step)
+        else:
+            solver.t_bound = t + max_step
+            solver.status = 'running'
+            if isinstance(solver, scipy.integrate.LSODA):
+                # LSODA stops at the critical time in its work array, set from t_bound on creation
+                solver._lsoda_solver._integrator.rwork[0] = solver.t_bound
+        ts, interpolants = [t], []
+        while solver.status == 'running':
+            message = solver.step()
+            if solver.status == 'failed':
+                raise ValueError('%s failed at t=%g ms: %s' % (self.__class__.__name__, solver.t, message))
+            ts.append(solver.t)
+            interpolants.append(solver.dense_output())
+        self.n_steps += len(interpolants)
+        self._t_old, self._t_new = t, t + max_step
+        self._x_new = solver.y.reshape(shape).copy()
+        self.clamp_state(self._x_new)
+        self._solution = scipy.integrate.OdeSolution(ts, interpolants)
+
+    def _dense(self, t):
+        "Evaluate the dense output of the last solver call at time t."
+        return self._solution(t).reshape(self._x_new.shape)
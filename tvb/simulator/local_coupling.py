@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Local coupling operator for surface simulations.
+
+Models apply the local coupling in their ``dfun`` to state variables, with
+:func:`local_coupling_product`, or to other arrays as ``local_coupling * x``. The
+operator defined here keeps the local connectivity as a CSR matrix, padded for
+non-cortical nodes, and evaluates such products with a multithreaded sparse matrix
+product.
+
+While the simulator evaluates the model on a state staged with
+:meth:`LocalCoupling.stage`, the products of all the state variables which the model
+locally couples are computed at once, in one pass over the matrix, and requests for
+the product of a state variable of that state are served from the staged result.
+
+"""
+
+import numpy
+import numba
+import scipy.sparse
+from tvb.simulator.common import get_logger
+
+LOG = get_logger(__name__)
+
+
+@numba.njit(parallel=True)
+def _csr_matmul(indptr, indices, data, x, out):
+    "Computes out = A x, for A in CSR format and x of shape (n_node, n_col), rows spread over threads."
+    for i in numba.prange(out.shape[0]):
+        for j in range(out.shape[1]):
+            acc = 0.0
+            for p in range(indptr[i], indptr[i + 1]):
+                acc += data[p] * x[indices[p], j]
+            out[i, j] = acc
+
+
+class LocalCoupling(object):
+    """
+    Sparse local coupling operator, scaled by coupling strength and padded to the number of nodes.
+
+    ``matrix`` is the local connectivity matrix, ``n_node`` the total number of simulated nodes
+    (vertices + non-cortical regions), ``coupling_strength`` either a scalar or one value per
+    vertex, scaling the rows of the matrix, and ``dtype`` the precision used to store the matrix
+    and to compute the products, e.g. ``numpy.float32`` to halve the memory traffic.
+
+    Products use Numba's threads when more than one is available (see ``NUMBA_NUM_THREADS``),
+    otherwise SciPy's single threaded CSR product, which is faster on a single core.
+
+    ``coupled_state_variables`` lists the indices of the state variables whose products
+    :meth:`stage` computes together; indices passed to :meth:`product` are added to it.
+    """
+
+    def __init__(self, matrix, n_node, coupling_strength=1.0, dtype=numpy.float64,
+                 n_threads=numba.config.NUMBA_NUM_THREADS, coupled_state_variables=()):
+        matrix = scipy.sparse.csr_matrix(matrix)
+        n_row = matrix.shape[0]
+        if n_row > n_node or matrix.shape[1] > n_node:
+            raise ValueError("Local connectivity of shape %s is larger than %d nodes." % (matrix.shape, n_node))
+        coupling_strength = numpy.asarray(coupling_strength, dtype=numpy.float64).ravel()
+        if coupling_strength.size == 1:
+            data = matrix.data * coupling_strength[0]
+        elif coupling_strength.size == n_row:
+            data = matrix.data * numpy.repeat(coupling_strength, numpy.diff(matrix.indptr))
+        else:
+            raise ValueError("Coupling strength of size %d does not match %d vertices."
+                             % (coupling_strength.size, n_row))
+        self.n_node = n_node
+        self.dtype = numpy.dtype(dtype)
+        # rows of non-cortical nodes are empty, which only requires extending the row pointers
+        self.indptr = numpy.r_[matrix.indptr, numpy.repeat(matrix.indptr[-1], n_node - n_row)].astype(numpy.intc)
+        self.indices = matrix.indices.astype(numpy.intc)
+        self.data = data.astype(self.dtype)
+        self.n_threads = n_threads
+        self._csr = self.matrix
+        self.coupled_state_variables = list(coupled_state_variables)
+        self._state = None
+        self._products = {}
+
+    @property
+    def nnz(self):
+        return self.data.size
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    @property
+    def matrix(self):
+        "The operator as a SciPy CSR matrix."
+        return scipy.sparse.csr_matrix((self.data, self.indices, self.indptr), shape=(self.n_node, self.n_node))
+
+    def dot(self, x):
+        "Compute the local coupling of x, of shape (n_node, ...)."
+        x = numpy.asarray(x)
+        if x.shape[0] != self.n_node:
+            raise ValueError("Cannot apply local coupling of %d nodes to array of shape %s." % (self.n_node, x.shape))
+        x_ = numpy.ascontiguousarray(x.reshape((self.n_node, -1)), dtype=self.dtype)
+        if self.n_threads > 1:
+            out = numpy.empty(x_.shape, dtype=self.dtype)
+            _csr_matmul(self.indptr, self.indices, self.data, x_, out)
+        else:
+            out = self._csr.dot(x_)
+        return out.reshape(x.shape)
+
+    def __mul__(self, x):
+        return self.dot(x)
+
+    def product(self, state, svar):
+        """
+        Local coupling of the state variable of index ``svar`` of ``state``, of shape (n_svar,
+        n_node, n_mode). The product is served from those computed by :meth:`stage` when
+        ``state`` is the staged state, and ``svar`` is added to the coupled state variables
+        staged from then on.
+        """
+        if svar not in self.coupled_state_variables:
+            self.coupled_state_variables.append(svar)
+        if state is not self._state:
+            return self.dot(state[svar])
+        if svar not in self._products:
+            self._products[svar] = self.dot(state[svar])
+        return self._products[svar]
+
+    def stage(self, state):
+        """
+        Compute the local coupling of all coupled state variables of ``state``, of shape
+        (n_svar, n_node, n_mode), in one product, for the following calls to :meth:`product`
+        on the same state.
+        """
+        self._state = state
+        self._products = {}
+        svars = self.coupled_state_variables
+        if svars:
+            _, n_node, n_mode = state.shape
+            coupled = numpy.empty((n_node, len(svars), n_mode), dtype=self.dtype)
+            for i, svar in enumerate(svars):
+                coupled[:, i] = state[svar]
+            products = self.dot(coupled).transpose((1, 0, 2))
+            for svar, product in zip(svars, products):
+                self._products[svar] = product
+
+    def unstage(self):
+        "Forget the staged state and its products."
+        self._state = None
+        self._products = {}
+
+    def staged(self, dfun):
+        "Wrap dfun so that each state it is evaluated on is staged for the duration of the evaluation."
+        def staged_dfun(state, coupling, local_coupling=0.0):
+            if local_coupling is not self:
+                return dfun(state, coupling, local_coupling)
+            self.stage(state)
+            try:
+                return dfun(state, coupling, local_coupling)
+            finally:
+                self.unstage()
+        return staged_dfun
+
+
+def local_coupling_product(local_coupling, state, svar):
+    """
+    Local coupling of the state variable of index ``svar`` of ``state``, for a scalar local
+    coupling or a :class:`LocalCoupling` operator.
+    """
+    if isinstance(local_coupling, LocalCoupling):
+        return local_coupling.product(state, svar)
+    return local_coupling * state[svar]
@@ -384,8 +384,8 @@ class JC_Epileptor(ModelNumbaDfun):
     def dfun(self, x, c, local_coupling=0.0):
         x_ = x.reshape(x.shape[:-1]).T
         c_ = c.reshape(c.shape[:-1]).T
-        Iext = self.Iext + local_coupling * x[0, :, 0]
-        lc_1 = local_coupling * x[6, :, 0]
+        Iext = self.Iext + self.local_coupling_of(local_coupling, x, 'x1')[:, 0]
+        lc_1 = self.local_coupling_of(local_coupling, x, 'x_rs')[:, 0]
         deriv = _numba_dfun(x_, c_,
                             self.x0, Iext, self.Iext2, self.a, self.b, self.slope, self.tt, self.Kvf,
                             self.c, self.d, self.r, self.Ks, self.Kf, self.aa, self.bb, self.tau,
@@ -2,11 +2,13 @@
 Mean field model based on Master equation about adaptative exponential leacky integrate and fire neurons population
 """
 
-from tvb.simulator.models.base import Model, LOG, numpy, basic, arrays, core
+from tvb.simulator.models.base import ModelNumbaDfun, LOG, numpy, basic, arrays, core
+import math
 import scipy.special as sp_spec
+from numba import guvectorize, float64, njit
 
 
-class Zerlaut_adaptation_first_order(Model):
+class Zerlaut_adaptation_first_order(ModelNumbaDfun):
     r"""
     **References**:
     .. [ZD_2018]  Zerlaut, Y., Chemla, S., Chavane, F. et al. *Modeling mesoscopic cortical dynamics using a mean-field
@@ -269,7 +271,7 @@ class Zerlaut_adaptation_first_order(Model):
     _nvar = 3
     cvar = numpy.array([0, 1, 2], dtype=numpy.int32)
 
-    def dfun(self, state_variables, coupling, local_coupling=0.00):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.00):
         r"""
         .. math::
             T \dot{\nu_\mu} &= -F_\mu(\nu_e,\nu_i) + \nu_\mu ,\all\mu\in\{e,i\}\\
@@ -297,6 +299,21 @@ class Zerlaut_adaptation_first_order(Model):
 
         return derivative
 
+    def _numba_parameters(self):
+        "Parameters shared by the transfer functions, in the order of the kernels."
+        return (self.Q_e, self.tau_e, self.E_e, self.Q_i, self.tau_i, self.E_i, self.g_L, self.C_m,
+                self.N_tot, self.p_connect, self.g)
+
+    def dfun(self, x, c, local_coupling=0.00):
+        lc_E = self.local_coupling_of(local_coupling, x, 'E')[:, 0]
+        lc_I = self.local_coupling_of(local_coupling, x, 'I')[:, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun_first_order(x_, c_, lc_E, lc_I, self.P_e, self.P_i, self.E_L_e, self.E_L_i,
+                                        self.T, self.tau_w, self.b, self.external_input,
+                                        *self._numba_parameters())
+        return deriv.T[..., numpy.newaxis]
+
     def TF_excitatory(self, fe, fi, W):
         """
         transfer function for excitatory population
@@ -505,7 +522,7 @@ class Zerlaut_adaptation_second_order(Zerlaut_adaptation_first_order):
     _nvar = 6
     cvar = numpy.array([0, 1, 2, 3, 4, 5], dtype=numpy.int32)
 
-    def dfun(self, state_variables, coupling, local_coupling=0.00):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.00):
         r"""
         .. math::
             \forall \mu,\lambda,\eta \in \{e,i\}^3\, ,
@@ -639,3 +656,158 @@ class Zerlaut_adaptation_second_order(Zerlaut_adaptation_first_order):
 
         return derivative
 
+    def dfun(self, x, c, local_coupling=0.00):
+        lc_E = self.local_coupling_of(local_coupling, x, 'E')[:, 0]
+        lc_I = self.local_coupling_of(local_coupling, x, 'I')[:, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun_second_order(x_, c_, lc_E, lc_I, self.P_e, self.P_i, self.E_L_e, self.E_L_i,
+                                         self.T, self.tau_w, self.b, self.external_input,
+                                         *self._numba_parameters())
+        return deriv.T[..., numpy.newaxis]
+
+
+
+@njit
+def _TF(fe, fi, W, P, E_L, q):
+    """
+    Transfer function of a population, for scalar rates, as Zerlaut_adaptation_first_order.TF; q holds
+    (Q_e, tau_e, E_e, Q_i, tau_i, E_i, g_L, C_m, N_tot, p_connect, g).
+    """
+    Q_e, tau_e, E_e, Q_i, tau_i, E_i, g_L, C_m, N_tot, p_connect, g = q
+    # fluctuation regime, as in get_fluct_regime_vars
+    fe = (fe+1e-6)*(1.-g)*p_connect*N_tot
+    fi = (fi+1e-6)*g*p_connect*N_tot
+    mu_Ge, mu_Gi = Q_e*tau_e*fe, Q_i*tau_i*fi
+    mu_G = g_L+mu_Ge+mu_Gi
+    T_m = C_m/mu_G
+    mu_V = (mu_Ge*E_e+mu_Gi*E_i+g_L*E_L-W)/mu_G
+    U_e, U_i = Q_e/mu_G*(E_e-mu_V), Q_i/mu_G*(E_i-mu_V)
+    sigma_V = math.sqrt(fe*(U_e*tau_e)**2/(2.*(tau_e+T_m))+fi*(U_i*tau_i)**2/(2.*(tau_i+T_m)))
+    T_V_numerator = (fe*(U_e*tau_e)**2 + fi*(U_i*tau_i)**2)
+    T_V_denominator = (fe*(U_e*tau_e)**2/(tau_e+T_m) + fi*(U_i*tau_i)**2/(tau_i+T_m))
+    T_V = 1.0
+    if T_V_denominator != 0.0:
+        T_V = T_V_numerator / T_V_denominator
+    # threshold, as in threshold_func
+    V = (mu_V-(-60.0))/10.0
+    S = (sigma_V-4.0)/6.0
+    T = (T_V*g_L/C_m-0.5)/1.
+    V_thre = P[0] + P[1]*V + P[2]*S + P[3]*T + P[4]*V**2 + P[5]*S**2 + P[6]*T**2 + P[7]*V*S + P[8]*V*T + P[9]*S*T
+    V_thre *= 1e3
+    return math.erfc((V_thre-mu_V) / (math.sqrt(2)*sigma_V)) / (2*T_V)
+
+
+@guvectorize([(float64[:],) * 24], '(n),(m),(),(),(p),(p)' + ',()' * 17 + '->(n)', nopython=True)
+def _numba_dfun_first_order(y, c, lc_E, lc_I, P_e, P_i, E_L_e, E_L_i, T, tau_w, b, external_input,
+                            Q_e, tau_e, E_e, Q_i, tau_i, E_i, g_L, C_m, N_tot, p_connect, g, dx):
+    "Gufunc for the first order Zerlaut model equations."
+    q = (Q_e[0], tau_e[0], E_e[0], Q_i[0], tau_i[0], E_i[0], g_L[0], C_m[0], N_tot[0], p_connect[0], g[0])
+    E = y[0]
+    I = y[1]
+    W = y[2]
+    dx[0] = (_TF(E+c[0]+lc_E[0]+external_input[0], I+lc_I[0]+external_input[0], W, P_e, E_L_e[0], q)-E)/T[0]
+    dx[1] = (_TF(E+lc_E[0]+external_input[0], I+lc_I[0]+external_input[0], W, P_i, E_L_i[0], q)-I)/T[0]
+    dx[2] = -W/tau_w[0]+b[0]*E
+
+
+# derivatives of the transfer functions by central differences of spacing 1e-7, as in the NumPy dfun
+
+@njit
+def _diff_fe(fe, fi, W, P, E_L, q):
+    df = 1e-7
+    return (_TF(fe+df, fi, W, P, E_L, q)-_TF(fe-df, fi, W, P, E_L, q))/(2*df*1e3)
+
+
+@njit
+def _diff_fi(fe, fi, W, P, E_L, q):
+    df = 1e-7
+    return (_TF(fe, fi+df, W, P, E_L, q)-_TF(fe, fi-df, W, P, E_L, q))/(2*df*1e3)
+
+
+@njit
+def _diff2_fe_fe(TF, fe, fi, W, P, E_L, q):
+    df = 1e-7
+    return (_TF(fe+df, fi, W, P, E_L, q)-2*TF+_TF(fe-df, fi, W, P, E_L, q))/((df*1e3)**2)
+
+
+@njit
+def _diff2_fi_fi(TF, fe, fi, W, P, E_L, q):
+    df = 1e-7
+    return (_TF(fe, fi+df, W, P, E_L, q)-2*TF+_TF(fe, fi-df, W, P, E_L, q))/((df*1e3)**2)
+
+
+@njit
+def _diff2_fi_fe(fe, fi, W, P, E_L, q):
+    df = 1e-7
+    return (_diff_fi(fe+df, fi, W, P, E_L, q)-_diff_fi(fe-df, fi, W, P, E_L, q))/(2*df*1e3)
+
+
+@njit
+def _diff2_fe_fi(fe, fi, W, P, E_L, q):
+    df = 1e-7
+    return (_diff_fe(fe, fi+df, W, P, E_L, q)-_diff_fe(fe, fi-df, W, P, E_L, q))/(2*df*1e3)
+
+
+@guvectorize([(float64[:],) * 24], '(n),(m),(),(),(p),(p)' + ',()' * 17 + '->(n)', nopython=True)
+def _numba_dfun_second_order(y, c, lc_E, lc_I, P_e, P_i, E_L_e, E_L_i, T, tau_w, b, external_input,
+                             Q_e, tau_e, E_e, Q_i, tau_i, E_i, g_L, C_m, N_tot, p_connect, g, dx):
+    "Gufunc for the second order Zerlaut model equations."
+    q = (Q_e[0], tau_e[0], E_e[0], Q_i[0], tau_i[0], E_i[0], g_L[0], C_m[0], N_tot[0], p_connect[0], g[0])
+    N_e = N_tot[0] * (1-g[0])
+    N_i = N_tot[0] * g[0]
+    E = y[0]
+    I = y[1]
+    C_ee = y[2]
+    C_ei = y[3]
+    C_ii = y[4]
+    W = y[5]
+    T_ = T[0]
+    E_L_e_ = E_L_e[0]
+    E_L_i_ = E_L_i[0]
+
+    E_e_in = E+c[0]+lc_E[0]+external_input[0]
+    E_i_in = E+lc_E[0]+external_input[0]
+    I_e_in = I+lc_I[0]+external_input[0]
+    I_i_in = I+lc_I[0]+external_input[0]
+
+    _TF_e = _TF(E_e_in, I_e_in, W, P_e, E_L_e_, q)
+    _TF_i = _TF(E_i_in, I_i_in, W, P_i, E_L_i_, q)
+
+    _diff_fe_TF_e = _diff_fe(E_e_in, I_e_in, W, P_e, E_L_e_, q)
+    _diff_fe_TF_i = _diff_fe(E_i_in, I_i_in, W, P_i, E_L_i_, q)
+    _diff_fi_TF_e = _diff_fi(E_e_in, I_e_in, W, P_e, E_L_e_, q)
+    _diff_fi_TF_i = _diff_fi(E_i_in, I_i_in, W, P_i, E_L_i_, q)
+
+    dx[0] = (_TF_e - E
+             + .5*C_ee*_diff2_fe_fe(_TF_e, E_e_in, I_e_in, W, P_e, E_L_e_, q)
+             + .5*C_ei*_diff2_fe_fi(E_e_in, I_e_in, W, P_e, E_L_e_, q)
+             + .5*C_ei*_diff2_fi_fe(E_e_in, I_e_in, W, P_e, E_L_e_, q)
+             + .5*C_ii*_diff2_fi_fi(_TF_e, E_e_in, I_e_in, W, P_e, E_L_e_, q)
+             )/T_
+    dx[1] = (_TF_i - I
+             + .5*C_ee*_diff2_fe_fe(_TF_i, E_i_in, I_i_in, W, P_i, E_L_i_, q)
+             + .5*C_ei*_diff2_fe_fi(E_i_in, I_i_in, W, P_i, E_L_i_, q)
+             + .5*C_ei*_diff2_fi_fe(E_i_in, I_i_in, W, P_i, E_L_i_, q)
+             + .5*C_ii*_diff2_fi_fi(_TF_i, E_i_in, I_i_in, W, P_i, E_L_i_, q)
+             )/T_
+    dx[2] = (_TF_e*(1./T_-_TF_e)/N_e
+             + (_TF_e-E)**2
+             + 2.*C_ee*_diff_fe_TF_e
+             + 2.*C_ei*_diff_fi_TF_i
+             - 2.*C_ee
+             )/T_
+    dx[3] = ((_TF_e-E)*(_TF_i-I)
+             + C_ee*_diff_fe_TF_e
+             + C_ei*_diff_fe_TF_i
+             + C_ei*_diff_fi_TF_e
+             + C_ii*_diff_fi_TF_i
+             - 2.*C_ei
+             )/T_
+    dx[4] = (_TF_i*(1./T_-_TF_i)/N_i
+             + (_TF_i-I)**2
+             + 2.*C_ii*_diff_fi_TF_i
+             + 2.*C_ei*_diff_fe_TF_e
+             - 2.*C_ii
+             )/T_
+    dx[5] = -W/tau_w[0]+b[0]*E
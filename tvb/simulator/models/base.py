@@ -39,6 +39,7 @@ import tvb.datatypes.arrays as arrays
 import tvb.basic.traits.core as core
 import tvb.basic.traits.types_basic as basic
 import tvb.simulator.noise as noise_module
+from tvb.simulator.local_coupling import local_coupling_product
 
 
 LOG = get_logger(__name__)
@@ -57,6 +58,9 @@ class Model(core.Type):
 
     state_variables = []
     variables_of_interest = []
+    # state variables evolving slowly enough for multi-rate integrators to
+    # update them less often than the others
+    slow_state_variables = []
     _nvar = None
     number_of_modes = 1
     cvar = None
@@ -82,6 +86,10 @@ class Model(core.Type):
         "Configure base model."
         for req_attr in 'nvar number_of_modes cvar'.split():
             assert hasattr(self, req_attr)
+        for name in self.slow_state_variables:
+            if name not in self.state_variables:
+                raise ValueError("Slow state variable %r is not a state variable of %s."
+                                 % (name, self.__class__.__name__))
         super(Model, self).configure()
         self.update_derived_parameters()
         self._build_observer()
@@ -91,6 +99,12 @@ class Model(core.Type):
         """ The number of state variables in this model. """
         return self._nvar
 
+    @property
+    def slow_indices(self):
+        """ Indices of the slow state variables in the state array. """
+        return numpy.array([self.state_variables.index(name)
+                            for name in self.slow_state_variables], dtype=numpy.intc)
+
     def update_derived_parameters(self):
         """
         When needed, this should be a method for calculating parameters that are
@@ -124,6 +138,34 @@ class Model(core.Type):
         """
         pass
 
+    def dfun_fast(self, state_variables, coupling, local_coupling=0.0):
+        """
+        Derivatives of the state variables not listed in
+        ``slow_state_variables``, with the same shape as ``dfun``; the values
+        for the slow ones are ignored and may be anything. Models override
+        this to skip evaluating their slow equations.
+
+        """
+        return self.dfun(state_variables, coupling, local_coupling)
+
+    def dfun_slow(self, state_variables, coupling, local_coupling=0.0):
+        """
+        Derivatives of the ``slow_state_variables``, with the same shape as
+        ``dfun``; the values for the fast ones are ignored.
+
+        """
+        return self.dfun(state_variables, coupling, local_coupling)
+
+    def local_coupling_of(self, local_coupling, state, name):
+        """
+        Local coupling of the state variable ``name`` of ``state``, of shape
+        (n_node, n_mode), for a scalar local coupling or a LocalCoupling
+        operator, which computes the products of all the state variables a
+        model couples together.
+
+        """
+        return local_coupling_product(local_coupling, state, self.state_variables.index(name))
+
     # TODO refactor as a NodeSimulator class
     def stationary_trajectory(self,
                               coupling=numpy.array([[0.0]]),
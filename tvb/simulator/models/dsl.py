@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+
+"""
+Generation of model implementations from a declarative model description.
+
+A :class:`ModelDescription` lists the state variables, parameters, derived
+quantities and equations of a model, the latter as Python expressions, e.g.::
+
+    ModelDescription(
+        name='Generic2dOscillator',
+        state_variables=['V', 'W'],
+        parameters='tau I a b c d e f g alpha beta gamma'.split(),
+        equations={
+            'V': 'd * tau * (alpha * W - f * V**3 + e * V**2 + g * V + gamma * I + gamma * c_0 + lc_V)',
+            'W': 'd * (a + b * V + c * V**2 - beta * W) / tau'})
+
+from which the NumPy, Numba CPU, Numba CUDA and OpenCL implementations are
+generated. Besides state variables, parameters and derived quantities, the
+expressions may use the coupling terms (``c_0`` by default), the local
+coupling of a state variable ``lc_<name>``, numbers, arithmetic, comparisons,
+``where(condition, then, else)`` and the functions in :data:`FUNCTIONS`.
+
+Generated sources are named after a hash of their contents and written to
+:data:`CACHE_DIR`, where they are reused across processes along with the
+compiled Numba kernels. As the sources are imported from there, the folder
+is created private to the user, and is refused if others may write to it. Models obtain the generated implementations by
+mixing in :class:`DescribedModel`.
+
+"""
+
+import ast
+import hashlib
+import imp
+import os
+import stat
+import tempfile
+import numpy
+from tvb.simulator.common import get_logger
+from tvb.simulator.local_coupling import local_coupling_product
+
+
+LOG = get_logger(__name__)
+
+# Set TVB_DSL_CACHE to keep the generated sources elsewhere.
+CACHE_DIR = os.environ.get('TVB_DSL_CACHE', os.path.expanduser(
+    os.path.join(os.environ.get('TVB_USER_HOME', '~'), '.tvb-cache', 'dsl')))
+
+FUNCTIONS = 'exp', 'log', 'sqrt', 'sin', 'cos', 'tan', 'tanh', 'abs'
+
+_RESERVED = 'math', 'numpy', 'cuda', 'float32', 'float64', 'where'
+
+
+class ModelDescription(object):
+    """
+    Declarative description of a model's equations, from which its dfun is
+    generated for each backend.
+
+    """
+
+    def __init__(self, name, state_variables, parameters, equations, derived=(), coupling_terms=('c_0',)):
+        self.name = name
+        self.state_variables = list(state_variables)
+        self.parameters = list(parameters)
+        self.coupling_terms = list(coupling_terms)
+        self.derived = list(derived)
+        if sorted(equations) != sorted(self.state_variables):
+            msg = "%s: equations %r do not match the state variables %r."
+            raise ValueError(msg % (name, sorted(equations), self.state_variables))
+        self.equations = [equations[svar] for svar in self.state_variables]
+        self._check()
+
+    def _check(self):
+        "Parse the expressions, checking names and syntax, and find the local coupling in use."
+        known = set(self.state_variables + self.parameters + self.coupling_terms)
+        known.update('lc_' + svar for svar in self.state_variables)
+        for name in known | set(name for name, _ in self.derived):
+            if name.startswith('_') or name in _RESERVED or name in FUNCTIONS:
+                raise ValueError("%s: reserved name %r." % (self.name, name))
+        used = set()
+        self._derived_trees = []
+        for name, expr in self.derived:
+            tree = self._parse(expr, known)
+            self._derived_trees.append((name, tree))
+            used.update(_names(tree))
+            known.add(name)
+        self._equation_trees = [self._parse(expr, known) for expr in self.equations]
+        for tree in self._equation_trees:
+            used.update(_names(tree))
+        self.local_coupling_variables = [svar for svar in self.state_variables if 'lc_' + svar in used]
+
+    def _parse(self, expr, known):
+        try:
+            tree = ast.parse(expr, mode='eval')
+        except SyntaxError as exc:
+            raise ValueError("%s: invalid expression %r: %s" % (self.name, expr, exc))
+        unknown = set(_names(tree)) - known
+        if unknown:
+            raise ValueError("%s: unknown names %r in %r." % (self.name, sorted(unknown), expr))
+        _NumpyPrinter().visit(tree)
+        return tree
+
+    def _body(self, printer, state, coupling, lc, param, deriv):
+        """
+        Statements unpacking the arrays, evaluating derived quantities and
+        writing the derivatives, where the array arguments are format strings
+        of the element index; parameters are not unpacked if param is None.
+
+        """
+        lines = ['%s = %s' % (svar, state.format(i)) for i, svar in enumerate(self.state_variables)]
+        lines += ['%s = %s' % (term, coupling.format(i)) for i, term in enumerate(self.coupling_terms)]
+        lines += ['lc_%s = %s' % (svar, lc.format(i)) for i, svar in enumerate(self.local_coupling_variables)]
+        if param is not None:
+            lines += ['%s = %s' % (name, param.format(i)) for i, name in enumerate(self.parameters)]
+        lines += ['%s = %s' % (name, printer.visit(tree)) for name, tree in self._derived_trees]
+        lines += ['%s = %s' % (deriv.format(i), printer.visit(tree)) for i, tree in enumerate(self._equation_trees)]
+        return lines
+
+    def numpy_source(self):
+        body = self._body(_NumpyPrinter(), '_state[{0}]', '_coupling[{0}]', '_lc[{0}]', '_param[{0}]', '_deriv[{0}]')
+        return _NUMPY_TEMPLATE % {'name': self.name, 'body': _indent(body, 1)}
+
+    def numba_source(self):
+        body = self._body(_NumbaPrinter(), '_state[{0}]', '_coupling[{0}]', '_lc[{0}]', '_param[{0}]', '_deriv[{0}]')
+        return _NUMBA_TEMPLATE % {'name': self.name, 'body': _indent(body, 1)}
+
+    def cuda_source(self):
+        "Device function source; as in the CUDA loops, there is no local coupling."
+        if len(self.coupling_terms) != 1:
+            raise ValueError("%s: CUDA device functions take a single coupling term." % (self.name, ))
+        # parameters are constants of the device function, cast by the factory
+        body = self._body(_CudaPrinter(), '_X[{0}, _t]', '_I', 'float32(0.0)', None, '_dX[{0}, _t]')
+        casts = ['%s = float32(%s)' % (name, name) for name in self.parameters]
+        return _CUDA_TEMPLATE % {'name': self.name, 'params': ', '.join(self.parameters),
+                                 'casts': _indent(casts, 1), 'body': _indent(body, 2)}
+
+    def opencl_source(self):
+        "Kernel source for CLModel's memory layout; as in the other OpenCL kernels, there is no local coupling."
+        body = self._body(_OpenCLPrinter(), 'state[{0}*_n + _i]', 'coupling[{0}*_n + _i]', '0.0f',
+                          'param[{0}*_n + _i]', 'deriv[{0}*_n + _i]')
+        n_out = len(self.equations)
+        body = ['float %s;' % (line, ) for line in body[:-n_out]] + ['%s;' % (line, ) for line in body[-n_out:]]
+        return _OPENCL_TEMPLATE % {'name': self.name, 'body': _indent(body, 1)}
+
+    def numpy_dfun(self):
+        "Generated NumPy dfun(state, coupling, lc, param)."
+        return _load(self.name, self.numpy_source()).dfun
+
+    def numba_dfun(self):
+        "Generated Numba gufunc dfun(state, coupling, lc, param) evaluating one node."
+        return _load(self.name, self.numba_source()).dfun
+
+    def cuda_factory(self):
+        "Generated factory of the CUDA device function f(dX, X, I), taking the parameter values."
+        return _load(self.name, self.cuda_source()).make_dfun
+
+    def opencl_program(self):
+        "Generated OpenCL program source, written to the cache as well."
+        source = self.opencl_source()
+        _cached(self.name, source, 'cl')
+        return source
+
+
+class DescribedModel(object):
+    """
+    Mixin providing a model's dfun implementations, generated from the
+    `description` class attribute of the model, e.g.::
+
+        class supHopf(DescribedModel, ModelNumbaDfun):
+            description = ModelDescription(...)
+
+    Parameter values are read from the attributes of the same names. Mixed
+    into a model with hand-written dfuns and a description, it provides the
+    generated ones instead, e.g. to check them against each other.
+
+    """
+
+    def _local_coupling_terms(self, state, local_coupling):
+        svars = self.description.state_variables
+        return [local_coupling_product(local_coupling, state, svars.index(svar))
+                for svar in self.description.local_coupling_variables]
+
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
+        lc = self._local_coupling_terms(state_variables, local_coupling)
+        param = [numpy.reshape(getattr(self, name), (-1, 1)) for name in self.description.parameters]
+        return self.description.numpy_dfun()(state_variables, coupling, lc, param)
+
+    def dfun(self, x, c, local_coupling=0.0):
+        lc = numpy.array([lc[:, 0] for lc in self._local_coupling_terms(x, local_coupling)]).reshape((-1, x.shape[1]))
+        p = numpy.array(numpy.broadcast_arrays(*[getattr(self, name) for name in self.description.parameters]))
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = self.description.numba_dfun()(x_, c_, lc.T, p.T)
+        return deriv.T[..., numpy.newaxis]
+
+    def cuda_dfun(self):
+        "Construct CUDA device function with the current parameter values."
+        values = []
+        for name in self.description.parameters:
+            value = numpy.asarray(getattr(self, name))
+            if value.size != 1:
+                raise ValueError("CUDA device functions take scalar parameters, %s has %d values."
+                                 % (name, value.size))
+            values.append(float(value.flat[0]))
+        return self.description.cuda_factory()(*values)
+
+    @property
+    def _opencl_ordered_params(self):
+        return self.description.parameters
+
+    @property
+    def _opencl_program_source(self):
+        return self.description.opencl_program()
+
+
+def _names(tree):
+    "Names referred to by an expression, other than called functions."
+    called = set(id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call))
+    return [node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and id(node) not in called]
+
+
+def _indent(lines, level):
+    return '\n'.join('    ' * level + line for line in lines)
+
+
+_modules = {}
+
+
+def _cache_dir():
+    "Create the cache folder, readable and writable by the user only, and check nobody else may write to it."
+    try:
+        os.makedirs(CACHE_DIR, 0o700)
+    except OSError:
+        if not os.path.isdir(CACHE_DIR):
+            raise
+    info = os.stat(CACHE_DIR)
+    if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        raise OSError('%s is not private to the user, refusing to load generated code from it' % CACHE_DIR)
+    return CACHE_DIR
+
+
+def _cached(name, source, ext):
+    "Path of the cache file holding source, written if not yet present."
+    key = hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+    path = os.path.join(_cache_dir(), '%s_%s.%s' % (name, key, ext))
+    if not os.path.exists(path):
+        # write aside then rename, so concurrent processes never read a partial file
+        tmp_handle, tmp_path = tempfile.mkstemp(suffix='.' + ext, dir=CACHE_DIR)
+        with os.fdopen(tmp_handle, 'w') as fd:
+            fd.write(source)
+        os.rename(tmp_path, path)
+        LOG.debug('generated %s', path)
+    return path
+
+
+def _load(name, source):
+    "Import the module generated from source, through the cache."
+    path = _cached(name, source, 'py')
+    if path not in _modules:
+        module_name = '_tvb_dsl_' + os.path.basename(path)[:-3]
+        _modules[path] = imp.load_source(module_name, path)
+    return _modules[path]
+
+
+class _Printer(ast.NodeVisitor):
+    "Prints expressions in the syntax of a backend, rejecting unsupported constructs."
+
+    functions = dict((name, name) for name in FUNCTIONS)
+    operators = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/',
+                 ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=', ast.Eq: '==', ast.NotEq: '!=',
+                 ast.USub: '-', ast.UAdd: '+'}
+
+    def generic_visit(self, node):
+        raise ValueError("unsupported expression syntax: %s" % (type(node).__name__, ))
+
+    def visit_Expression(self, node):
+        return self.visit(node.body)
+
+    def visit_Num(self, node):
+        return self.number(node.n)
+
+    def visit_Constant(self, node):
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            return self.generic_visit(node)
+        return self.number(node.value)
+
+    def number(self, value):
+        return repr(value)
+
+    def visit_Name(self, node):
+        return node.id
+
+    def _operator(self, op):
+        if type(op) not in self.operators:
+            raise ValueError("unsupported operator: %s" % (type(op).__name__, ))
+        return self.operators[type(op)]
+
+    def visit_BinOp(self, node):
+        if isinstance(node.op, ast.Pow):
+            return self.power(node.left, node.right)
+        return '(%s %s %s)' % (self.visit(node.left), self._operator(node.op), self.visit(node.right))
+
+    def power(self, base, exponent):
+        return '(%s ** %s)' % (self.visit(base), self.visit(exponent))
+
+    def visit_UnaryOp(self, node):
+        return '(%s%s)' % (self._operator(node.op), self.visit(node.operand))
+
+    def visit_Compare(self, node):
+        if len(node.ops) != 1:
+            raise ValueError("chained comparisons are not supported")
+        return '(%s %s %s)' % (self.visit(node.left), self._operator(node.ops[0]), self.visit(node.comparators[0]))
+
+    def visit_Call(self, node):
+        name = getattr(node.func, 'id', None)
+        if getattr(node, 'keywords', None) or getattr(node, 'starargs', None) or getattr(node, 'kwargs', None):
+            raise ValueError("only positional arguments are supported in calls")
+        args = [self.visit(arg) for arg in node.args]
+        if name == 'where':
+            if len(args) != 3:
+                raise ValueError("where takes a condition, a value if true and a value if false")
+            return self.where(*args)
+        if name not in self.functions:
+            raise ValueError("unsupported function: %s" % (name, ))
+        if len(args) != 1:
+            raise ValueError("%s takes one argument" % (name, ))
+        return '%s(%s)' % (self.functions[name], args[0])
+
+    def where(self, condition, then, else_):
+        return '(%s if %s else %s)' % (then, condition, else_)
+
+
+class _NumpyPrinter(_Printer):
+    functions = dict((name, 'numpy.' + name) for name in FUNCTIONS)
+
+    def where(self, condition, then, else_):
+        return 'numpy.where(%s, %s, %s)' % (condition, then, else_)
+
+
+class _NumbaPrinter(_Printer):
+    functions = dict((name, 'math.' + name) for name in FUNCTIONS)
+    functions['abs'] = 'abs'
+
+
+def _integer(node):
+    "Value of an integer literal node, else None."
+    value = getattr(node, 'n', getattr(node, 'value', None))
+    if isinstance(value, (int, long)) and not isinstance(value, bool):
+        return value
+
+
+class _CudaPrinter(_NumbaPrinter):
+
+    def number(self, value):
+        return 'float32(%r)' % (float(value), )
+
+    def power(self, base, exponent):
+        # integer exponents stay integer, for the cheaper integer power
+        if _integer(exponent) is not None:
+            return '(%s ** %d)' % (self.visit(base), _integer(exponent))
+        return _Printer.power(self, base, exponent)
+
+
+class _OpenCLPrinter(_Printer):
+    functions = dict((name, name) for name in FUNCTIONS)
+    functions['abs'] = 'fabs'
+
+    def number(self, value):
+        return '%rf' % (float(value), )
+
+    def power(self, base, exponent):
+        if _integer(exponent) is not None:
+            return 'pown(%s, %d)' % (self.visit(base), _integer(exponent))
+        return 'pow(%s, %s)' % (self.visit(base), self.visit(exponent))
+
+    def where(self, condition, then, else_):
+        return '(%s ? %s : %s)' % (condition, then, else_)
+
+
+_NUMPY_TEMPLATE = '''import numpy
+
+
+def dfun(_state, _coupling, _lc, _param):
+    "NumPy dfun for the %(name)s model equations."
+    _deriv = numpy.empty_like(_state)
+%(body)s
+    return _deriv
+'''
+
+_NUMBA_TEMPLATE = '''import math
+from numba import guvectorize, float64
+
+
+@guvectorize([(float64[:],) * 5], '(n),(m),(l),(p)->(n)', nopython=True, cache=True)
+def dfun(_state, _coupling, _lc, _param, _deriv):
+    "Gufunc for the %(name)s model equations."
+%(body)s
+'''
+
+_CUDA_TEMPLATE = '''import math
+from numba import cuda, float32
+
+
+def make_dfun(%(params)s):
+    "Construct CUDA device function for the %(name)s model."
+
+%(casts)s
+
+    @cuda.jit(device=True)
+    def _f(_dX, _X, _I):
+        _t = cuda.threadIdx.x
+%(body)s
+
+    return _f
+'''
+
+_OPENCL_TEMPLATE = '''// %(name)s
+__kernel void dfun(__global float *state, __global float *coupling,
+                   __global float *param, __global float *deriv)
+{
+    int _i = get_global_id(0), _n = get_global_size(0);
+
+%(body)s
+}
+'''
@@ -32,6 +32,7 @@ Hindmarsh-Rose-Jirsa Epileptor model.
 """
 
 from .base import ModelNumbaDfun, LOG, numpy, basic, arrays
+from .dsl import ModelDescription, DescribedModel
 from numba import guvectorize, float64
 
 @guvectorize([(float64[:],) * 20], '(n),(m)' + ',()'*17 + '->(n)', nopython=True)
@@ -72,6 +73,59 @@ def _numba_dfun(y, c_pop, x0, Iext, Iext2, a, b, slope, tt, Kvf, c, d, r, Ks, Kf
     ydot[5] = tt[0] * (-0.01 * (y[5] - 0.1 * y[0]))
 
 
+@guvectorize([(float64[:],) * 20], '(n),(m)' + ',()'*17 + '->(n)', nopython=True)
+def _numba_dfun_fast(y, c_pop, x0, Iext, Iext2, a, b, slope, tt, Kvf, c, d, r, Ks, Kf, aa, bb, tau, modification, ydot):
+    "Gufunc for the fast populations of the Epileptor, leaving z and g at zero."
+
+    c_pop1 = c_pop[0]
+    c_pop2 = c_pop[1]
+
+    # population 1
+    if y[0] < 0.0:
+        ydot[0] = - a[0] * y[0] ** 2 + b[0] * y[0]
+    else:
+        ydot[0] = slope[0] - y[3] + 0.6 * (y[2] - 4.0) ** 2
+    ydot[0] = tt[0] * (y[1] - y[2] + Iext[0] + Kvf[0] * c_pop1 + ydot[0] * y[0])
+    ydot[1] = tt[0] * (c[0] - d[0] * y[0] ** 2 - y[1])
+    ydot[2] = 0.0
+
+    # population 2
+    ydot[3] = tt[0] * (-y[4] + y[3] - y[3] ** 3 + Iext2[0] + bb[0] * y[5] - 0.3 * (y[2] - 3.5) + Kf[0] * c_pop2)
+    if y[3] < -0.25:
+        ydot[4] = 0.0
+    else:
+        ydot[4] = aa[0] * (y[3] + 0.25)
+    ydot[4] = tt[0] * ((-y[4] + ydot[4]) / tau[0])
+    ydot[5] = 0.0
+
+
+@guvectorize([(float64[:],) * 20], '(n),(m)' + ',()'*17 + '->(n)', nopython=True)
+def _numba_dfun_slow(y, c_pop, x0, Iext, Iext2, a, b, slope, tt, Kvf, c, d, r, Ks, Kf, aa, bb, tau, modification, ydot):
+    "Gufunc for the slow energy and filter variables of the Epileptor, leaving the others at zero."
+
+    c_pop1 = c_pop[0]
+
+    ydot[0] = 0.0
+    ydot[1] = 0.0
+
+    # energy
+    if y[2] < 0.0:
+        ydot[2] = - 0.1 * y[2] ** 7
+    else:
+        ydot[2] = 0.0
+    if modification[0]:
+        h =  x0[0] + 3/(1 + numpy.exp(-(y[0]+0.5)/0.1))
+    else:
+        h = 4 * (y[0] - x0[0]) + ydot[2]
+    ydot[2] = tt[0] * (r[0] * (h - y[2]  + Ks[0] * c_pop1))
+
+    ydot[3] = 0.0
+    ydot[4] = 0.0
+
+    # filter
+    ydot[5] = tt[0] * (-0.01 * (y[5] - 0.1 * y[0]))
+
+
 class Epileptor(ModelNumbaDfun):
     r"""
     The Epileptor is a composite neural mass model of six dimensions which
@@ -303,6 +357,7 @@ class Epileptor(ModelNumbaDfun):
     )
 
     state_variables = ['x1', 'y1', 'z', 'x2', 'y2', 'g']
+    slow_state_variables = ['z', 'g']
 
     _nvar = 6
     cvar = numpy.array([0, 3], dtype=numpy.int32)
@@ -365,7 +420,7 @@ class Epileptor(ModelNumbaDfun):
         # energy
         if_ydot2 = - 0.1 * y[2] ** 7
         else_ydot2 = 0
-        if modification:
+        if self.modification:
             h = h = self.x0 + 3. / (1. + numpy.exp(- (y[0] + 0.5) / 0.1))
         else:
             h = 4 * (y[0] - self.x0) + where(y[2] < 0., if_ydot2, else_ydot2)
@@ -382,19 +437,28 @@ class Epileptor(ModelNumbaDfun):
 
         return ydot
 
-    def dfun(self, x, c, local_coupling=0.0):
+    def _numba_call(self, kernel, x, c, local_coupling):
         x_ = x.reshape(x.shape[:-1]).T
         c_ = c.reshape(c.shape[:-1]).T
-        Iext = self.Iext + local_coupling * x[0, :, 0]
-        deriv = _numba_dfun(x_, c_,
+        Iext = self.Iext + self.local_coupling_of(local_coupling, x, 'x1')[:, 0]
+        deriv = kernel(x_, c_,
                          self.x0, Iext, self.Iext2, self.a, self.b, self.slope, self.tt, self.Kvf,
                          self.c, self.d, self.r, self.Ks, self.Kf, self.aa, self.bb, self.tau, self.modification)
         return deriv.T[..., numpy.newaxis]
 
+    def dfun(self, x, c, local_coupling=0.0):
+        return self._numba_call(_numba_dfun, x, c, local_coupling)
+
+    def dfun_fast(self, x, c, local_coupling=0.0):
+        return self._numba_call(_numba_dfun_fast, x, c, local_coupling)
 
+    def dfun_slow(self, x, c, local_coupling=0.0):
+        return self._numba_call(_numba_dfun_slow, x, c, local_coupling)
 
 
-class Epileptor2D(ModelNumbaDfun):
+
+
+class Epileptor2D(DescribedModel, ModelNumbaDfun):
     r"""
         Two-dimensional reduction of the Epileptor.
         
@@ -532,72 +596,17 @@ class Epileptor2D(ModelNumbaDfun):
     _nvar = 2
     cvar = numpy.array([0], dtype=numpy.int32)
 
-
-    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0,
-                array=numpy.array, where=numpy.where, concat=numpy.concatenate):
-        r"""
-        Computes the derivatives of the state-variables of the Epileptor 2D
-        with respect to time.
-        """
-
-        y = state_variables
-        ydot = numpy.empty_like(state_variables)
-        
-        Iext = self.Iext + local_coupling * y[0]
-        c_pop = coupling[0, :]
-
-        # population 1
-        if_ydot0 = self.a * y[0] ** 2 + (self.d - self.b) * y[0]
-        else_ydot0 = - self.slope - 0.6 * (y[1] - 4.0) ** 2 + self.d * y[0]
-
-        ydot[0] = self.tt * (self.c - y[1] + Iext + self.Kvf * c_pop - (where(y[0] < 0., if_ydot0, else_ydot0)) * y[0])
-        
-        # energy
-        if_ydot1 = - 0.1 * y[1] ** 7
-        else_ydot1 = 0
-        
-        if self.modification:
-            h = self.x0 + 3. / (1. + numpy.exp(- (y[0] + 0.5) / 0.1))
-        else:
-            h = 4 * (y[0] - self.x0) + where(y[1] < 0., if_ydot1, else_ydot1)
-        
-        ydot[1] = self.tt * (self.r * (h - y[1] + self.Ks * c_pop))
-
-        return ydot
-
-    def dfun(self, x, c, local_coupling=0.0):
-        """"The dfun using numba for speed."""
-        
-        x_ = x.reshape(x.shape[:-1]).T
-        c_ = c.reshape(c.shape[:-1]).T
-        Iext = self.Iext + local_coupling * x[0, :, 0]
-        deriv = _numba_dfun_epi2d(x_, c_,
-                            self.x0, Iext, self.a, self.b, self.slope, self.c,
-                            self.d, self.r, self.Kvf, self.Ks, self.tt, self.modification)
-        return deriv.T[..., numpy.newaxis]
-
-@guvectorize([(float64[:],) * 15], '(n),(m)' + ',()'* 12 + '->(n)', nopython=True)
-def _numba_dfun_epi2d(y, c_pop, x0, Iext, a, b, slope, c, d, r, Kvf, Ks, tt, modification, ydot):
-    "Gufunction for Epileptor 2D model equations."
-
-    c_pop = c_pop[0]
-
-    # population 1
-    if y[0] < 0.0:
-        ydot[0] = a[0] * y[0] ** 2 + (d[0] - b[0]) * y[0]
-    else:
-        ydot[0] = - slope[0] - 0.6 * (y[1] - 4.0) ** 2 + d[0] * y[0]
-    ydot[0] = tt[0] * (c[0] - y[1] + Iext[0] + Kvf[0] * c_pop - ydot[0] * y[0])
-
-     # energy
-    if y[1] < 0.0:
-        ydot[1] = - 0.1 * y[1] ** 7
-    else:
-        ydot[1] = 0.0
-
-    if modification[0]:
-        h = x0[0] + 3. / (1. + numpy.exp(- (y[0] + 0.5) / 0.1))
-    else:
-        h = 4 * (y[0] - x0[0]) + ydot[1]
-
-    ydot[1] = tt[0] * (r[0] * (h - y[1] + Ks[0] * c_pop))
+    # the Epileptor 2D equations, from which the dfuns are generated
+    description = ModelDescription(
+        name='Epileptor2D',
+        state_variables=['x1', 'z'],
+        parameters='x0 Iext a b slope c d r Kvf Ks tt modification'.split(),
+        coupling_terms=['c_pop'],
+        derived=[
+            # population 1
+            ('f1', 'where(x1 < 0.0, a * x1**2 + (d - b) * x1, - slope - 0.6 * (z - 4.0)**2 + d * x1)'),
+            # energy
+            ('h', 'where(modification, x0 + 3.0 / (1.0 + exp(- (x1 + 0.5) / 0.1)), '
+                  '4.0 * (x1 - x0) + where(z < 0.0, - 0.1 * z**7, 0.0))')],
+        equations={'x1': 'tt * (c - z + Iext + lc_x1 + Kvf * c_pop - f1 * x1)',
+                   'z': 'tt * (r * (h - z + Ks * c_pop))'})
@@ -31,10 +31,11 @@ Hopfield model with modifications following Golos & Daucé.
 
 """
 
-from .base import Model, LOG, numpy, basic, arrays
+from .base import ModelNumbaDfun, LOG, numpy, basic, arrays
+from numba import guvectorize, float64
 
 
-class Hopfield(Model):
+class Hopfield(ModelNumbaDfun):
     r"""
 
     The Hopfield neural network is a discrete time dynamical system composed
@@ -150,11 +151,12 @@ class Hopfield(Model):
         super(Hopfield, self).configure()
         if self.dynamic:
             self.dfun = self.dfunDyn
+            self._numpy_dfun = self._numpy_dfunDyn
             self._nvar = 2
             self.cvar = numpy.array([0, 1], dtype=numpy.int32)
             # self.variables_of_interest = ["x", "theta"]
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
         The fast, :math:`x`, and slow, :math:`\theta`, state variables are typically
         considered to represent a membrane potentials of nodes and the global inhibition term,
@@ -173,7 +175,7 @@ class Hopfield(Model):
         derivative = numpy.array([dx, dx])
         return derivative
 
-    def dfunDyn(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfunDyn(self, state_variables, coupling, local_coupling=0.0):
         r"""
         The fast, :math:`x`, and slow, :math:`\theta`, state variables are typically
         considered to represent a membrane potentials of nodes and the inhibition term(s),
@@ -194,3 +196,29 @@ class Hopfield(Model):
 
         derivative = numpy.array([dx, dtheta])
         return derivative
+
+    def dfun(self, x, c, local_coupling=0.0):
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self.taux)
+        return deriv.T[..., numpy.newaxis]
+
+    def dfunDyn(self, x, c, local_coupling=0.0):
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun_dyn(x_, c_, self.taux, self.tauT)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 4], '(n),(m),()->(n)', nopython=True)
+def _numba_dfun(y, c, taux, dx):
+    "Gufunc for Hopfield model equations, with the derivative of x repeated for theta."
+    dx[0] = (- y[0] + c[0]) / taux[0]
+    dx[1] = dx[0]
+
+
+@guvectorize([(float64[:],) * 5], '(n),(m),(),()->(n)', nopython=True)
+def _numba_dfun_dyn(y, c, taux, tauT, dx):
+    "Gufunc for Hopfield model equations with a dynamic threshold."
+    dx[0] = (- y[0] + c[0]) / taux[0]
+    dx[1] = (- y[1] + c[1]) / tauT[0]
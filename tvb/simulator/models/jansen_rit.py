@@ -32,8 +32,9 @@ Jansen-Rit and derivative models.
 """
 
 from .base import ModelNumbaDfun, Model, numpy, basic, arrays
+from .dsl import ModelDescription
 import math
-from numba import guvectorize, float64
+from numba import guvectorize, float64, njit
 
 
 class JansenRit(ModelNumbaDfun):
@@ -237,6 +238,19 @@ class JansenRit(ModelNumbaDfun):
     _nvar = 6
     cvar = numpy.array([1, 2], dtype=numpy.int32)
 
+    # the equations of dfun, from which the other backends may be generated
+    description = ModelDescription(
+        name='JansenRit',
+        state_variables='y0 y1 y2 y3 y4 y5'.split(),
+        parameters='nu_max r v0 a a_1 a_2 a_3 a_4 A b B J mu'.split(),
+        derived=[('sigm_y1_y2', '2.0 * nu_max / (1.0 + exp(r * (v0 - (y1 - y2))))'),
+                 ('sigm_y0_1', '2.0 * nu_max / (1.0 + exp(r * (v0 - (a_1 * J * y0))))'),
+                 ('sigm_y0_3', '2.0 * nu_max / (1.0 + exp(r * (v0 - (a_3 * J * y0))))')],
+        equations={'y0': 'y3', 'y1': 'y4', 'y2': 'y5',
+                   'y3': 'A * a * sigm_y1_y2 - 2.0 * a * y3 - a ** 2 * y0',
+                   'y4': 'A * a * (mu + a_2 * J * sigm_y0_1 + c_0 + lc_y1 - lc_y2) - 2.0 * a * y4 - a ** 2 * y1',
+                   'y5': 'B * b * (a_4 * J * sigm_y0_3) - 2.0 * b * y5 - b ** 2 * y2'})
+
     def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
         The dynamic equations were taken from [JR_1995]_
@@ -325,7 +339,7 @@ def _numba_dfun_jr(y, c,
     dx[5] = B[0] * b[0] * (a_4[0] * J[0] * sigm_y0_3) - 2.0 * b[0] * y[5] - b[0] ** 2 * y[2]
 
 
-class ZetterbergJansen(Model):
+class ZetterbergJansen(ModelNumbaDfun):
     """
     Zetterberg et al derived a model inspired by the Wilson-Cowan equations. It served as a basis for the later,
     better known Jansen-Rit model.
@@ -539,7 +553,7 @@ class ZetterbergJansen(Model):
     keke = None  # self.ke **2
     kiki = None  # self.ki **2
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         magic_exp_number = 709
 
         v1 = state_variables[0, :]
@@ -609,3 +623,47 @@ class ZetterbergJansen(Model):
         self.keke = self.ke**2
         self.kiki = self.ki**2
 
+    def dfun(self, x, c, local_coupling=0.0):
+        lc = self.local_coupling_of(local_coupling, x, 'v6')[:, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun_zj(x_, c_, lc, self.Heke, self.Hiki, self.ke_2, self.ki_2, self.keke, self.kiki,
+                               self.e0, self.rho_1, self.rho_2, self.gamma_1, self.gamma_2, self.gamma_3,
+                               self.gamma_4, self.gamma_5, self.gamma_1T, self.gamma_2T, self.gamma_3T,
+                               self.P, self.U, self.Q)
+        return deriv.T[..., numpy.newaxis]
+
+
+@njit
+def _sigma_zj(sv, e0, rho_1, rho_2):
+    "Activation function of the Zetterberg-Jansen model, zero where the exponential would blow up."
+    temp = rho_1 * (rho_2 - sv)
+    if temp > 709:
+        return 0.0
+    return (2 * e0) / (1 + math.exp(temp))
+
+
+@guvectorize([(float64[:],) * 24], '(n),(m)' + ',()' * 21 + '->(n)', nopython=True)
+def _numba_dfun_zj(y, c, lc, Heke, Hiki, ke_2, ki_2, keke, kiki, e0, rho_1, rho_2,
+                   gamma_1, gamma_2, gamma_3, gamma_4, gamma_5, gamma_1T, gamma_2T, gamma_3T, P, U, Q, dx):
+    "Gufunc for Zetterberg-Jansen model equations."
+    v1, y1, v2, y2, v3, y3, v4, y4, v5, y5 = y[0], y[1], y[2], y[3], y[4], y[5], y[6], y[7], y[8], y[9]
+    e0_, rho_1_, rho_2_ = e0[0], rho_1[0], rho_2[0]
+    coupled_input = _sigma_zj(c[0] + lc[0], e0_, rho_1_, rho_2_)
+    sigma_v2_v3 = _sigma_zj(v2 - v3, e0_, rho_1_, rho_2_)
+    sigma_v4_v5 = _sigma_zj(v4 - v5, e0_, rho_1_, rho_2_)
+    dx[0] = y1
+    dx[1] = Heke[0] * (gamma_1[0] * sigma_v2_v3 + gamma_1T[0] * (U[0] + coupled_input)) - ke_2[0] * y1 - keke[0] * v1
+    dx[2] = y2
+    dx[3] = (Heke[0] * (gamma_2[0] * _sigma_zj(v1, e0_, rho_1_, rho_2_) + gamma_2T[0] * (P[0] + coupled_input))
+             - ke_2[0] * y2 - keke[0] * v2)
+    dx[4] = y3
+    dx[5] = Hiki[0] * (gamma_4[0] * sigma_v4_v5) - ki_2[0] * y3 - kiki[0] * v3
+    dx[6] = y4
+    dx[7] = Heke[0] * (gamma_3[0] * sigma_v2_v3 + gamma_3T[0] * (Q[0] + coupled_input)) - ke_2[0] * y4 - keke[0] * v4
+    dx[8] = y5
+    # keke rather than kiki, as in the NumPy equations
+    dx[9] = Hiki[0] * (gamma_5[0] * sigma_v4_v5) - ki_2[0] * y5 - keke[0] * v5
+    dx[10] = y2 - y3
+    dx[11] = y4 - y5
+
@@ -31,10 +31,11 @@ Larter-Breakspear model based on the Morris-Lecar equations.
 
 """
 
-from .base import Model, LOG, numpy, basic, arrays
+from .base import ModelNumbaDfun, LOG, numpy, basic, arrays
+from numba import guvectorize, float64
 
 
-class LarterBreakspear(Model):
+class LarterBreakspear(ModelNumbaDfun):
     r"""
     A modified Morris-Lecar model that includes a third equation which simulates
     the effect of a population of inhibitory interneurons synapsing on
@@ -446,7 +447,7 @@ class LarterBreakspear(Model):
     _nvar = 3
     cvar = numpy.array([0], dtype=numpy.int32)
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
         Dynamic equations:
 
@@ -482,4 +483,77 @@ class LarterBreakspear(Model):
                          + self.ane * self.Iext)
         derivative[1] = self.t_scale * self.phi * (m_K - W) / self.tau_K
         derivative[2] = self.t_scale * self.b * (self.ani * self.Iext + self.aei * V * QV)
-        return derivative
\ No newline at end of file
+        return derivative
+
+    # parameters of the kernel, which are more than a ufunc takes operands
+    _numba_parameters = ('TCa d_Ca TNa d_Na TK d_K QV_max VT d_V QZ_max ZT d_Z t_scale gCa C rNMDA aee VCa gK VK'
+                         ' gL VL gNa VNa aie ane Iext phi tau_K b ani aei').split()
+
+    def dfun(self, x, c, local_coupling=0.0):
+        if numpy.isscalar(local_coupling):
+            # the kernel scales its own QV
+            lc_scale, lc_0 = local_coupling, 0.0
+        else:
+            QV = 0.5 * self.QV_max * (1 + numpy.tanh((x[0, :, 0] - self.VT) / self.d_V))
+            lc_scale, lc_0 = 0.0, local_coupling * QV
+        # one vector of parameters per node
+        p = numpy.array(numpy.broadcast_arrays(*[getattr(self, name) for name in self._numba_parameters]))
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, p.T, lc_scale, lc_0)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 6], '(n),(m),(p),(),()->(n)', nopython=True)
+def _numba_dfun(y, c, p, lc_scale, lc_0, dx):
+    "Gufunc for Larter-Breakspear model equations."
+    TCa = p[0]
+    d_Ca = p[1]
+    TNa = p[2]
+    d_Na = p[3]
+    TK = p[4]
+    d_K = p[5]
+    QV_max = p[6]
+    VT = p[7]
+    d_V = p[8]
+    QZ_max = p[9]
+    ZT = p[10]
+    d_Z = p[11]
+    t_scale = p[12]
+    gCa = p[13]
+    C = p[14]
+    rNMDA = p[15]
+    aee = p[16]
+    VCa = p[17]
+    gK = p[18]
+    VK = p[19]
+    gL = p[20]
+    VL = p[21]
+    gNa = p[22]
+    VNa = p[23]
+    aie = p[24]
+    ane = p[25]
+    Iext = p[26]
+    phi = p[27]
+    tau_K = p[28]
+    b = p[29]
+    ani = p[30]
+    aei = p[31]
+    V = y[0]
+    W = y[1]
+    Z = y[2]
+    c_0 = c[0]
+    m_Ca = 0.5 * (1 + numpy.tanh((V - TCa) / d_Ca))
+    m_Na = 0.5 * (1 + numpy.tanh((V - TNa) / d_Na))
+    m_K = 0.5 * (1 + numpy.tanh((V - TK) / d_K))
+    QV = 0.5 * QV_max * (1 + numpy.tanh((V - VT) / d_V))
+    QZ = 0.5 * QZ_max * (1 + numpy.tanh((Z - ZT) / d_Z))
+    QV_lc = QV + (lc_scale[0] * QV + lc_0[0])
+    dx[0] = t_scale * (- (gCa + (1.0 - C) * (rNMDA * aee) * QV_lc + C * rNMDA * aee * c_0) * m_Ca * (V - VCa)
+                       - gK * W * (V - VK)
+                       - gL * (V - VL)
+                       - (gNa * m_Na + (1.0 - C) * aee * QV_lc + C * aee * c_0) * (V - VNa)
+                       - aie * Z * QZ
+                       + ane * Iext)
+    dx[1] = t_scale * phi * (m_K - W) / tau_K
+    dx[2] = t_scale * b * (ani * Iext + aei * V * QV)
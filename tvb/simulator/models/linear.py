@@ -31,10 +31,12 @@ Generic linear model.
 
 """
 
-from .base import Model, LOG, numpy, basic, arrays
+from .base import ModelNumbaDfun, LOG, numpy, basic, arrays
+from .dsl import ModelDescription
+from numba import guvectorize, float64
 
 
-class Linear(Model):
+class Linear(ModelNumbaDfun):
     _ui_name = "Linear model"
     ui_configurable_parameters = ['gamma']
 
@@ -63,8 +65,28 @@ class Linear(Model):
     _nvar = 1
     cvar = numpy.array([0], dtype=numpy.int32)
 
-    def dfun(self, state, coupling, local_coupling=0.0):
+    # the equations of dfun, from which the other backends may be generated
+    description = ModelDescription(
+        name='Linear',
+        state_variables=['x'],
+        parameters=['gamma'],
+        equations={'x': 'gamma * x + c_0 + lc_x'})
+
+    def _numpy_dfun(self, state, coupling, local_coupling=0.0):
         x, = state
         c, = coupling
         dx = self.gamma * x + c + local_coupling * x
-        return numpy.array([dx])
\ No newline at end of file
+        return numpy.array([dx])
+
+    def dfun(self, x, c, local_coupling=0.0):
+        lc = self.local_coupling_of(local_coupling, x, 'x')[:, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self.gamma, lc)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 5], '(n),(m),(),()->(n)', nopython=True)
+def _numba_dfun(x, c, gamma, lc, dx):
+    "Gufunc for the linear model equation."
+    dx[0] = gamma[0] * x[0] + c[0] + lc[0]
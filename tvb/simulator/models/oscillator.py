@@ -32,8 +32,9 @@ Oscillator models.
 """
 
 from .base import Model, ModelNumbaDfun, LOG, numpy, basic, arrays
+from .dsl import ModelDescription, DescribedModel
 import numexpr
-from numba import guvectorize, float64
+from numba import guvectorize, vectorize, float64
 
 
 
@@ -359,6 +360,15 @@ class Generic2dOscillator(ModelNumbaDfun):
     _nvar = 2
     cvar = numpy.array([0], dtype=numpy.int32)
 
+    # the equations of dfun, from which the other backends may be generated
+    description = ModelDescription(
+        name='Generic2dOscillator',
+        state_variables=['V', 'W'],
+        parameters='tau I a b c d e f g alpha beta gamma'.split(),
+        equations={
+            'V': 'd * tau * (alpha * W - f * V**3 + e * V**2 + g * V + gamma * I + gamma * c_0 + lc_V)',
+            'W': 'd * (a + b * V + c * V**2 - beta * W) / tau'})
+
     def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0, ev=numexpr.evaluate):
         r"""
         The two state variables :math:`V` and :math:`W` are typically considered
@@ -410,7 +420,7 @@ class Generic2dOscillator(ModelNumbaDfun):
         return derivative
 
     def dfun(self, vw, c, local_coupling=0.0):
-        lc_0 = local_coupling * vw[0, :, 0]
+        lc_0 = self.local_coupling_of(local_coupling, vw, 'V')[:, 0]
         vw_ = vw.reshape(vw.shape[:-1]).T
         c_ = c.reshape(c.shape[:-1]).T
         deriv = _numba_dfun_g2d(vw_, c_, self.tau, self.I, self.a, self.b, self.c, self.d, self.e, self.f, self.g,
@@ -428,7 +438,7 @@ def _numba_dfun_g2d(vw, c_0, tau, I, a, b, c, d, e, f, g, beta, alpha, gamma, lc
     dx[1] = d[0] * (a[0] + b[0] * V + c[0] * V2 - beta[0] * W) / tau[0]
 
 
-class Kuramoto(Model):
+class Kuramoto(ModelNumbaDfun):
     r"""
     The Kuramoto model is a model of synchronization phenomena derived by
     Yoshiki Kuramoto in 1975 which has since been applied to diverse domains
@@ -496,8 +506,8 @@ class Kuramoto(Model):
     _nvar = 1
     cvar = numpy.array([0], dtype=numpy.int32)
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0,
-             ev=numexpr.evaluate, sin=numpy.sin, pi2=numpy.pi * 2):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0,
+                    ev=numexpr.evaluate, sin=numpy.sin, pi2=numpy.pi * 2):
         r"""
         The :math:`\theta` variable is the phase angle of the oscillation.
 
@@ -531,8 +541,25 @@ class Kuramoto(Model):
         # all this pi makeh me have great hungary, can has sum NaN?
         return self.derivative
 
+    def dfun(self, x, c, local_coupling=0.0):
+        # NumPy's sine is faster than the kernel's, so the local coupling term is computed here,
+        # and skipped when it is zero, which leaves one elementwise sum over the nodes
+        lc = 0.0
+        if not numpy.isscalar(local_coupling):
+            lc = numpy.sin(self.local_coupling_of(local_coupling, x, 'theta')[:, 0])
+        elif local_coupling != 0.0:
+            lc = numpy.sin(local_coupling * x[0, :, 0])
+        deriv = _numba_dfun_kuramoto(c[0, :, 0], self.omega, lc)
+        return deriv.reshape(x.shape)
+
+
+@vectorize([float64(float64, float64, float64)], nopython=True)
+def _numba_dfun_kuramoto(c, omega, lc):
+    "Ufunc for Kuramoto model equations."
+    return omega + (c + lc)
+
 
-class supHopf(ModelNumbaDfun):
+class supHopf(DescribedModel, ModelNumbaDfun):
     r"""
     The supHopf model describes the normal form of a supercritical Hopf bifurcation in Cartesian coordinates.
     This normal form has a supercritical bifurcation at a=0 with a the bifurcation parameter in the model. So 
@@ -600,45 +627,11 @@ class supHopf(ModelNumbaDfun):
     _nvar = 2                                           # number of state-variables
     cvar = numpy.array([0, 1], dtype=numpy.int32)       # coupling variables
 
-    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0, 
-                    array=numpy.array, where=numpy.where, concat=numpy.concatenate):
-        r"""
-        Computes the derivatives of the state-variables of supHopf
-        with respect to time.
-        """
-
-        y = state_variables
-        ydot = numpy.empty_like(state_variables)
-        
-        # long-range coupling
-        c_0 = coupling[0]
-        c_1 = coupling[1]
-
-        # short-range (local) coupling
-        lc_0 = local_coupling * y[0]
-
-        #supHopf's equations in Cartesian coordinates:
-        ydot[0] = (self.a - y[0]**2 - y[1]**2) * y[0] - self.omega * y[1] + c_0 + lc_0
-        ydot[1] = (self.a - y[0]**2 - y[1]**2) * y[1] + self.omega * y[0] + c_1
-
-        return ydot
-
-    def dfun(self, x, c, local_coupling=0.0):
-        x_ = x.reshape(x.shape[:-1]).T
-        c_ = c.reshape(c.shape[:-1]).T
-        lc_0 = local_coupling * x[0, :, 0]
-        deriv = _numba_dfun_supHopf(x_, c_, self.a, self.omega, lc_0)
-        
-        return deriv.T[..., numpy.newaxis]
-
-@guvectorize([(float64[:],) * 6], '(n),(m)' + ',()' * 3 + '->(n)', nopython=True)
-def _numba_dfun_supHopf(y, c, a, omega, lc_0, ydot):
-    "Gufunc for supHopf model equations."
-
-    #long-range coupling
-    c_0 = c[0]
-    c_1 = c[1]
-
-    #supHopf equations
-    ydot[0] = (a[0] - y[0]**2 - y[1]**2) * y[0] - omega[0] * y[1] + c_0 + lc_0[0]
-    ydot[1] = (a[0] - y[0]**2 - y[1]**2) * y[1] + omega[0] * y[0] + c_1
+    # supHopf's equations in Cartesian coordinates, from which the dfuns are generated
+    description = ModelDescription(
+        name='supHopf',
+        state_variables=['x', 'y'],
+        parameters=['a', 'omega'],
+        coupling_terms=['c_0', 'c_1'],
+        equations={'x': '(a - x**2 - y**2) * x - omega * y + c_0 + lc_x',
+                   'y': '(a - x**2 - y**2) * y + omega * x + c_1'})
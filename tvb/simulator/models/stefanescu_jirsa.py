@@ -31,9 +31,10 @@ Models developed by Stefanescu-Jirsa, based on reduced-set analyses of infinite
 
 """
 
-from .base import Model, LOG, numpy, basic, arrays, scipy_integrate_trapz, scipy_stats_norm
+from .base import ModelNumbaDfun, LOG, numpy, basic, arrays, scipy_integrate_trapz, scipy_stats_norm
+from numba import guvectorize, float64
 
-class ReducedSetBase(Model):
+class ReducedSetBase(ModelNumbaDfun):
     number_of_modes = 3
     nu = 1500
     nv = 1500
@@ -213,7 +214,7 @@ class ReducedSetFitzHughNagumo(ReducedSetBase):
     m_i = None
     n_i = None
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
 
 
@@ -262,6 +263,14 @@ class ReducedSetFitzHughNagumo(ReducedSetBase):
 
         return derivative
 
+    def dfun(self, x, c, local_coupling=0.0):
+        lc = self.local_coupling_of(local_coupling, x, 'xi')
+        # one (state variable, mode) block per node
+        deriv = _numba_dfun_fhn(x.transpose((1, 0, 2)), c.transpose((1, 0, 2)), lc,
+                                self.Aik, self.Bik, self.Cik, self.e_i, self.f_i, self.IE_i, self.II_i,
+                                self.m_i, self.n_i, self.tau, self.b, self.K11, self.K12, self.K21)
+        return deriv.transpose((1, 0, 2))
+
     def update_derived_parameters(self):
         """
         Calculate coefficients for the Reduced FitzHugh-Nagumo oscillator based
@@ -526,7 +535,7 @@ class ReducedSetHindmarshRose(ReducedSetBase):
     m_i = None
     n_i = None
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
         The equations of the population model for i-th mode at node q are:
 
@@ -581,6 +590,15 @@ class ReducedSetHindmarshRose(ReducedSetBase):
 
         return derivative
 
+    def dfun(self, x, c, local_coupling=0.0):
+        lc = self.local_coupling_of(local_coupling, x, 'xi')
+        # one (state variable, mode) block per node
+        deriv = _numba_dfun_hr(x.transpose((1, 0, 2)), c.transpose((1, 0, 2)), lc,
+                               self.A_ik, self.B_ik, self.C_ik, self.a_i, self.b_i, self.c_i, self.d_i,
+                               self.e_i, self.f_i, self.h_i, self.p_i, self.IE_i, self.II_i, self.m_i, self.n_i,
+                               self.K11, self.K12, self.K21, self.r, self.s)
+        return deriv.transpose((1, 0, 2))
+
     def update_derived_parameters(self, corrected_d_p=True):
         """
         Calculate coefficients for the neural field model based on a Reduced set
@@ -658,3 +676,75 @@ class ReducedSetHindmarshRose(ReducedSetBase):
 
         self.m_i = (self.r * self.s * self.xo * intcVdI).T
         self.n_i = (self.r * self.s * self.xo * intcUdI).T
+
+
+@guvectorize([(float64[:, :], float64[:, :], float64[:], float64[:, :], float64[:, :], float64[:, :],
+               float64[:], float64[:], float64[:], float64[:], float64[:], float64[:],
+               float64[:], float64[:], float64[:], float64[:], float64[:], float64[:, :])],
+             '(n,k),(m,k),(k),(k,k),(k,k),(k,k)' + ',(k)' * 6 + ',()' * 5 + '->(n,k)', nopython=True)
+def _numba_dfun_fhn(y, c, lc, Aik, Bik, Cik, e_i, f_i, IE_i, II_i, m_i, n_i, tau, b, K11, K12, K21, dx):
+    "Gufunc for the reduced set of FitzHugh-Nagumo oscillators, over the modes of one node."
+    n_mode = y.shape[1]
+    c_0 = 0.0
+    for k in range(n_mode):
+        c_0 += c[0, k]
+    for i in range(n_mode):
+        xi = y[0, i]
+        eta = y[1, i]
+        alpha = y[2, i]
+        beta = y[3, i]
+        xi_A = 0.0
+        alpha_B = 0.0
+        xi_C = 0.0
+        for k in range(n_mode):
+            xi_A += y[0, k] * Aik[k, i]
+            alpha_B += y[2, k] * Bik[k, i]
+            xi_C += y[0, k] * Cik[k, i]
+        dx[0, i] = (tau[0] * (xi - e_i[i] * xi ** 3 / 3.0 - eta) +
+                    K11[0] * (xi_A - xi) -
+                    K12[0] * (alpha_B - xi) +
+                    tau[0] * (IE_i[i] + c_0 + lc[i]))
+        dx[1, i] = (xi - b[0] * eta + m_i[i]) / tau[0]
+        dx[2, i] = (tau[0] * (alpha - f_i[i] * alpha ** 3 / 3.0 - beta) +
+                    K21[0] * (xi_C - alpha) +
+                    tau[0] * (II_i[i] + c_0 + lc[i]))
+        dx[3, i] = (alpha - b[0] * beta + n_i[i]) / tau[0]
+
+
+@guvectorize([(float64[:, :], float64[:, :], float64[:], float64[:, :], float64[:, :], float64[:, :],
+               float64[:], float64[:], float64[:], float64[:], float64[:], float64[:],
+               float64[:], float64[:], float64[:], float64[:], float64[:], float64[:],
+               float64[:], float64[:], float64[:], float64[:], float64[:], float64[:, :])],
+             '(n,k),(m,k),(k),(k,k),(k,k),(k,k)' + ',(k)' * 12 + ',()' * 5 + '->(n,k)', nopython=True)
+def _numba_dfun_hr(y, c, lc, A_ik, B_ik, C_ik, a_i, b_i, c_i, d_i, e_i, f_i, h_i, p_i, IE_i, II_i, m_i, n_i,
+                   K11, K12, K21, r, s, dx):
+    "Gufunc for the reduced set of Hindmarsh-Rose oscillators, over the modes of one node."
+    n_mode = y.shape[1]
+    c_0 = 0.0
+    for k in range(n_mode):
+        c_0 += c[0, k]
+    for i in range(n_mode):
+        xi = y[0, i]
+        eta = y[1, i]
+        tau = y[2, i]
+        alpha = y[3, i]
+        beta = y[4, i]
+        gamma = y[5, i]
+        xi_A = 0.0
+        alpha_B = 0.0
+        xi_C = 0.0
+        for k in range(n_mode):
+            xi_A += y[0, k] * A_ik[k, i]
+            alpha_B += y[3, k] * B_ik[k, i]
+            xi_C += y[0, k] * C_ik[k, i]
+        dx[0, i] = (eta - a_i[i] * xi ** 3 + b_i[i] * xi ** 2 - tau +
+                    K11[0] * (xi_A - xi) -
+                    K12[0] * (alpha_B - xi) +
+                    IE_i[i] + c_0 + lc[i])
+        dx[1, i] = c_i[i] - d_i[i] * xi ** 2 - eta
+        dx[2, i] = r[0] * s[0] * xi - r[0] * tau - m_i[i]
+        dx[3, i] = (beta - e_i[i] * alpha ** 3 + f_i[i] * alpha ** 2 - gamma +
+                    K21[0] * (xi_C - alpha) +
+                    II_i[i] + c_0 + lc[i])
+        dx[4, i] = h_i[i] - p_i[i] * alpha ** 2 - beta
+        dx[5, i] = r[0] * s[0] * alpha - r[0] * gamma - n_i[i]
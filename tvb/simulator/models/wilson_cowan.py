@@ -31,10 +31,11 @@ Wilson-Cowan equations based model definition.
 
 """
 
-from .base import Model, LOG, numpy, basic, arrays
+from .base import ModelNumbaDfun, LOG, numpy, basic, arrays
+from numba import guvectorize, float64
 
 
-class WilsonCowan(Model):
+class WilsonCowan(ModelNumbaDfun):
     r"""
     **References**:
 
@@ -338,7 +339,7 @@ class WilsonCowan(Model):
     _nvar = 2
     cvar = numpy.array([0, 1], dtype=numpy.int32)
 
-    def dfun(self, state_variables, coupling, local_coupling=0.0):
+    def _numpy_dfun(self, state_variables, coupling, local_coupling=0.0):
         r"""
 
         .. math::
@@ -368,3 +369,28 @@ class WilsonCowan(Model):
         derivative[1] = (-I + (self.k_i - self.r_i * I) * s_i) / self.tau_i
 
         return derivative
+
+    def dfun(self, x, c, local_coupling=0.0):
+        lc_0 = self.local_coupling_of(local_coupling, x, 'E')[:, 0]
+        lc_1 = self.local_coupling_of(local_coupling, x, 'I')[:, 0]
+        x_ = x.reshape(x.shape[:-1]).T
+        c_ = c.reshape(c.shape[:-1]).T
+        deriv = _numba_dfun(x_, c_, self.c_ee, self.c_ei, self.c_ie, self.c_ii, self.tau_e, self.tau_i,
+                            self.a_e, self.b_e, self.c_e, self.theta_e, self.a_i, self.b_i, self.theta_i, self.c_i,
+                            self.r_e, self.r_i, self.k_e, self.k_i, self.P, self.Q, self.alpha_e, self.alpha_i,
+                            lc_0, lc_1)
+        return deriv.T[..., numpy.newaxis]
+
+
+@guvectorize([(float64[:],) * 27], '(n),(m)' + ',()'*24 + '->(n)', nopython=True)
+def _numba_dfun(y, c, c_ee, c_ei, c_ie, c_ii, tau_e, tau_i, a_e, b_e, c_e, theta_e, a_i, b_i, theta_i, c_i,
+                r_e, r_i, k_e, k_i, P, Q, alpha_e, alpha_i, lc_0, lc_1, dx):
+    "Gufunc for Wilson-Cowan model equations."
+    E = y[0]
+    I = y[1]
+    x_e = alpha_e[0] * (c_ee[0] * E - c_ei[0] * I + P[0] - theta_e[0] + c[0] + lc_0[0] + lc_1[0])
+    x_i = alpha_i[0] * (c_ie[0] * E - c_ii[0] * I + Q[0] - theta_i[0] + lc_0[0] + lc_1[0])
+    s_e = c_e[0] / (1.0 + numpy.exp(-a_e[0] * (x_e - b_e[0])))
+    s_i = c_i[0] / (1.0 + numpy.exp(-a_i[0] * (x_i - b_i[0])))
+    dx[0] = (-E + (k_e[0] - r_e[0] * E) * s_e) / tau_e[0]
+    dx[1] = (-I + (k_i[0] - r_i[0] * I) * s_i) / tau_i[0]
@@ -32,6 +32,7 @@ Models based on Wong-Wang's work.
 """
 
 from .base import ModelNumbaDfun, LOG, numpy, basic, arrays
+from .dsl import ModelDescription
 from numba import guvectorize, float64
 
 @guvectorize([(float64[:],)*11], '(n),(m)' + ',()'*8 + '->(n)', nopython=True)
@@ -159,6 +160,16 @@ class ReducedWongWang(ModelNumbaDfun):
     _nvar = 1
     cvar = numpy.array([0], dtype=numpy.int32)
 
+    # the equations of dfun, from which the other backends may be generated
+    description = ModelDescription(
+        name='ReducedWongWang',
+        state_variables=['S'],
+        parameters='a b d gamma tau_s w J_N I_o'.split(),
+        derived=[('x', 'w * J_N * S + I_o + J_N * c_0 + J_N * lc_S'),
+                 ('H', '(a * x - b) / (1 - exp(-d * (a * x - b)))'),
+                 ('dS', '- (S / tau_s) + (1 - S) * H * gamma')],
+        equations={'S': 'where(S < 0.0, 0.0 - S, where(S > 1.0, 1.0 - S, dS))'})
+
     def configure(self):
         """  """
         super(ReducedWongWang, self).configure()
@@ -192,7 +203,7 @@ class ReducedWongWang(ModelNumbaDfun):
 
     def dfun(self, x, c, local_coupling=0.0):
         x_ = x.reshape(x.shape[:-1]).T
-        c_ = c.reshape(c.shape[:-1]).T + local_coupling * x[0]
+        c_ = c.reshape(c.shape[:-1]).T + self.local_coupling_of(local_coupling, x, 'S')
         deriv = _numba_dfun(x_, c_, self.a, self.b, self.d, self.gamma,
                         self.tau_s, self.w, self.J_N, self.I_o)
         return deriv.T[..., numpy.newaxis]
\ No newline at end of file
@@ -42,13 +42,79 @@ RandomState.
 """
 
 import numpy
+import numba
+import numexpr
 from tvb.datatypes import arrays, equations
 from tvb.basic.traits import types_basic as basic, core
 from .common import get_logger, simple_gen_astr
+from .async import AsyncNoise
 
 
 LOG = get_logger(__name__)
 
+_PHILOX_M = (numpy.uint64(0xD2511F53), numpy.uint64(0xCD9E8D57))
+_PHILOX_W = (numpy.uint64(0x9E3779B9), numpy.uint64(0xBB67AE85))
+_MASK32 = numpy.uint64(0xFFFFFFFF)
+
+
+@numba.njit
+def philox4x32(c0, c1, c2, c3, k0, k1):
+    "Philox4x32-10 counter-based generator, Salmon et al. 2011: four 32 bit words of a counter and a key."
+    m0, m1 = _PHILOX_M
+    w0, w1 = _PHILOX_W
+    s32 = numpy.uint64(32)
+    for i in range(10):
+        p0 = m0 * c0
+        p1 = m1 * c2
+        c0, c1, c2, c3 = ((p1 >> s32) ^ c1 ^ k0) & _MASK32, p1 & _MASK32, \
+                         ((p0 >> s32) ^ c3 ^ k1) & _MASK32, p0 & _MASK32
+        k0 = (k0 + w0) & _MASK32
+        k1 = (k1 + w1) & _MASK32
+    return c0, c1, c2, c3
+
+
+@numba.njit
+def _counter_normal(out, seed, instance, step):
+    "Fill out[step, i] with the standard normal variate of counter (i, step, instance)."
+    k0, k1 = seed & _MASK32, seed >> numpy.uint64(32)
+    s5, s6, s32 = numpy.uint64(5), numpy.uint64(6), numpy.uint64(32)
+    two_pi = 2.0 * numpy.pi
+    for t in range(out.shape[0]):
+        t_step = step + numpy.uint64(t)
+        for pair in range((out.shape[1] + 1) // 2):
+            x0, x1, x2, x3 = philox4x32(numpy.uint64(pair), t_step & _MASK32, t_step >> s32, instance, k0, k1)
+            # two uniform variates with 53 bits of resolution in (0, 1), then Box-Muller
+            u0 = ((x0 >> s5) * 67108864.0 + (x1 >> s6) + 0.5) / 9007199254740992.0
+            u1 = ((x2 >> s5) * 67108864.0 + (x3 >> s6) + 0.5) / 9007199254740992.0
+            radius = numpy.sqrt(-2.0 * numpy.log(u0))
+            out[t, 2 * pair] = radius * numpy.cos(two_pi * u1)
+            if 2 * pair + 1 < out.shape[1]:
+                out[t, 2 * pair + 1] = radius * numpy.sin(two_pi * u1)
+
+
+def counter_normal(seed, step, shape, instance=0, n_steps=None):
+    """
+    Standard normal variates from the Philox4x32-10 counter-based generator.
+    The variate at flat index i of an array of ``shape`` drawn at ``step`` is
+    a function of (seed, instance, step, i) only, so that any step can be
+    generated on its own, in any order, by any thread or process, and a run
+    split in chunks draws the same noise as a single run.
+
+    :param seed: key of the generator, e.g. the ``init_seed`` of a RandomStream
+    :param step: counter of the (first) step to draw
+    :param shape: shape of the variates drawn per step
+    :param instance: independent stream index, e.g. of simulations in a batch
+    :param n_steps: when given, draw this many consecutive steps at once
+    :returns: array of ``shape``, or of (n_steps, ) + ``shape``
+
+    """
+    shape = tuple(shape)
+    out = numpy.empty((n_steps or 1, int(numpy.prod(shape))))
+    _counter_normal(out, numpy.uint64(seed), numpy.uint64(instance), numpy.uint64(step))
+    if n_steps is None:
+        return out.reshape(shape)
+    return out.reshape((n_steps, ) + shape)
+
 
 class RandomStream(core.Type):
     """
@@ -146,7 +212,42 @@ class Noise(core.Type):
         doc="""An instance of numpy's RandomState associated with this
         specific Noise object.""")
 
+    block_size = basic.Integer(
+        label="Noise block size",
+        required=False,
+        default=0,
+        doc="""When positive, and the noise is configured with a shape, the
+        Gaussian variates are generated in a background thread, in blocks of
+        this many integration steps, while the integration proceeds. The
+        variates are the same for any block size, but the random stream is
+        read ahead by up to two blocks.""")
+
+    counter_based = basic.Bool(
+        label="Counter-based random numbers",
+        required=False,
+        default=False,
+        doc="""Draw the Gaussian variates from a Philox4x32-10 counter-based
+        generator keyed by the random stream's init_seed (the default init_seed
+        of RandomStream when the random stream is a bare numpy RandomState),
+        rather than from the random stream itself. Each variate is then addressed by the (step,
+        state-variable, node, mode, instance) it is drawn for, so that batched
+        and parallel simulations are reproducible, and a simulation restored
+        from its ``counter`` or run in chunks draws the same noise.""")
+
+    instance = basic.Integer(
+        label="Noise instance",
+        required=False,
+        default=0,
+        doc="""With counter-based random numbers, the index of this noise
+        among simulations that share a seed; each instance draws independent
+        variates.""")
+
     dt = None
+    counter = 0
+    _key = None
+    _scaling = None
+    _async = None
+    _async_shape = None
     # For use if coloured
     _E = None
     _sqrt_1_E2 = None
@@ -160,14 +261,24 @@ class Noise(core.Type):
 
         """
         super(Noise, self).configure()
+        self.reset_counter()
+        self._configure_async(None)
         self.random_stream.configure()
 
     def __str__(self):
         return simple_gen_astr(self, 'dt ntau')
 
     def configure_white(self, dt, shape=None):
-        """Set the time step (dt) of noise or integration time"""
+        """
+        Set the time step (dt) of noise or integration time. The noise scaling
+        is computed here from nsig, so changing nsig afterwards requires
+        configuring the noise again.
+        """
         self.dt = dt
+        self.reset_counter()
+        self._configure_key()
+        self._configure_async(shape)
+        self._configure_gfun()
         LOG.info('White noise configured with dt=%g', self.dt)
 
     def configure_coloured(self, dt, shape):
@@ -208,11 +319,70 @@ class Noise(core.Type):
         self.dt = dt
         self._E = numpy.exp(-self.dt / self.ntau)
         self._sqrt_1_E2 = numpy.sqrt((1.0 - self._E ** 2))
-        self._eta = self.random_stream.normal(size=shape)
+        self.reset_counter()
+        self._configure_key()
+        self._configure_async(shape)
+        self._configure_gfun()
+        self._eta = self._normal(shape)
         self._dt_sqrt_lambda = self.dt * numpy.sqrt(1.0 / self.ntau)
         LOG.info('Colored noise configured with dt=%g E=%g sqrt_1_E2=%g eta=%g & dt_sqrt_lambda=%g',
                   self.dt, self._E, self._sqrt_1_E2, self._eta, self._dt_sqrt_lambda)
 
+    def _configure_gfun(self):
+        """
+        Prepare what gfun evaluates at every step, once per configuration,
+        starting with the per node scaling of the noise, :math:`\sqrt{2D}`.
+        Changing nsig afterwards requires configuring the noise again.
+        """
+        self._scaling = numpy.sqrt(2.0 * self.nsig)
+
+    def _sqrt_2_nsig(self):
+        "Per node scaling of the noise, :math:`\\sqrt{2D}`, as of the last configuration."
+        if self._scaling is None:
+            self._configure_gfun()
+        return self._scaling
+
+    def reset_counter(self):
+        """
+        Restart the counter-based generator from its first step. Configuring
+        the noise resets the counter, so a simulation restored from a
+        checkpoint sets ``counter`` to the checkpointed value after configuring
+        the noise, and then draws the same variates as an uninterrupted run.
+        """
+        self.counter = 0
+
+    def _configure_key(self):
+        """
+        Fix the key of the counter-based generator, once per configuration: the
+        init_seed of random_stream, if it is a RandomStream. A bare numpy
+        RandomState, which random_stream is by default, does not record its seed,
+        so the default init_seed of RandomStream is used instead.
+        """
+        self._key = getattr(self.random_stream, 'init_seed', RandomStream().init_seed)
+
+    def _configure_async(self, shape):
+        "Stop drawing variates in the background; drawing restarts for shape with the next noise generated."
+        if self._async is not None:
+            self._async.close()
+            self._async = None
+        self._async_shape = tuple(shape) if self.block_size > 0 and shape is not None else None
+
+    def _normal(self, shape):
+        "Standard normal variates, from the counter-based generator or the background blocks if configured."
+        if self.counter_based:
+            if self._key is None:
+                self._configure_key()
+            self.counter += 1
+            return counter_normal(self._key, self.counter - 1, shape, self.instance)
+        if self._async_shape is None:
+            return self.random_stream.normal(size=shape)
+        if tuple(shape) != self._async_shape:
+            msg = "Noise configured for shape %s but got %s; reconfigure the noise."
+            raise ValueError(msg % (self._async_shape, tuple(shape)))
+        if self._async is None:
+            self._async = AsyncNoise(shape, self.random_stream, self.block_size)
+        return self._async.get()
+
     def generate(self, shape, lo=-1.0, hi=1.0):
         "Generate noise realization."
         if self.ntau > 0.0:
@@ -223,15 +393,27 @@ class Noise(core.Type):
 
     def coloured(self, shape):
         "Generate colored noise. [FoxVemuri_1988]_"
-        self._h = self._sqrt_1_E2 * self.random_stream.normal(size=shape)
+        self._h = self._sqrt_1_E2 * self._normal(shape)
         self._eta =  self._eta * self._E + self._h
         return self._dt_sqrt_lambda * self._eta
 
     def white(self, shape):
         "Generate white noise."
-        noise = numpy.sqrt(self.dt) * self.random_stream.normal(size=shape)
+        noise = numpy.sqrt(self.dt) * self._normal(shape)
         return noise
 
+    def increment(self, state_variables):
+        r"""
+        The noise increment :math:`g(X)\,dW` over a step from the state
+        ``state_variables``, as variates and the factor scaling them. Noises
+        which can scale their variates by a precomputed factor return it, so
+        that integrators fuse the scaling with their step.
+
+        """
+        noise = self.generate(state_variables.shape)
+        noise *= self.gfun(state_variables)
+        return noise, 1.0
+
 
 class Additive(Noise):
     """
@@ -259,8 +441,26 @@ class Additive(Noise):
             g(x) = \sqrt{2D}
 
         """
-        g_x = numpy.sqrt(2.0 * self.nsig)
-        return g_x
+        return self._sqrt_2_nsig()
+
+    _white_scaling = None
+
+    def _configure_gfun(self):
+        "Also fold the time step into the scaling of white noise variates, :math:`\\sqrt{2D\\,dt}`."
+        super(Additive, self)._configure_gfun()
+        self._white_scaling = None if self.dt is None else numpy.sqrt(self.dt) * self._scaling
+
+    def increment(self, state_variables):
+        r"""
+        Standard normal variates, and their per node scaling for white noise,
+        :math:`\sqrt{2D\,dt}`, as of the last configuration.
+
+        """
+        if self.ntau > 0.0:
+            return super(Additive, self).increment(state_variables)
+        if self._white_scaling is None:
+            self._configure_gfun()
+        return self._normal(state_variables.shape), self._white_scaling
 
 
 class Multiplicative(Noise):
@@ -295,6 +495,27 @@ class Multiplicative(Noise):
         default=equations.Linear(parameters={"a": 1.0, "b": 0.0}),
         doc="""A function evaluated on the state-variables, the result of which enters as the diffusion coefficient.""")
 
+    _gfun = None  # compiled expression and its parameters, or False if b has none
+
+    def _configure_gfun(self):
+        """
+        Compile :math:`\sqrt{2D}\,b(x)` into a single numexpr expression,
+        rather than parsing the equation of b at every step. Equations which
+        compute their pattern by other means than evaluating their equation
+        string keep doing so.
+        """
+        super(Multiplicative, self)._configure_gfun()
+        self._gfun = False
+        if type(self.b).pattern.fset is not equations.Equation.pattern.fset:
+            return
+        expression = '_sqrt_2_nsig * (%s)' % (self.b.equation, )
+        names, _ = numexpr.necompiler.getExprNames(expression, {})
+        parameters = [name for name in names if name not in ('var', '_sqrt_2_nsig')]
+        if not set(parameters).issubset(self.b.parameters):
+            return
+        signature = [(name, numpy.float64) for name in ['var', '_sqrt_2_nsig'] + parameters]
+        self._gfun = numexpr.NumExpr(expression, signature), parameters
+
     def gfun(self, state_variables):
         """
         Scale the noise by the noise dispersion and the diffusion coefficient.
@@ -304,6 +525,10 @@ class Multiplicative(Noise):
         Equation 4.6, page 119.
 
         """
-        self.b.pattern = state_variables
-        g_x = numpy.sqrt(2.0 * self.nsig) * self.b.pattern
-        return g_x
+        if self._gfun is None:
+            self._configure_gfun()
+        if not self._gfun:
+            self.b.pattern = state_variables
+            return self._sqrt_2_nsig() * self.b.pattern
+        gfun, parameters = self._gfun
+        return gfun(state_variables, self._sqrt_2_nsig(), *[self.b.parameters[name] for name in parameters])
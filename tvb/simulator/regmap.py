@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Mapping between regions and nodes of surface simulations.
+
+In surface simulations, nodes are the cortical vertices followed by the
+non-cortical regions, and the simulator's ``_regmap`` gives the region of each
+node. Every step, the delayed coupling computed per region is expanded to the
+nodes, and the new node state is averaged per region for the history. The
+:class:`RegionMap` precomputes the index and segment structures of both
+operations and writes their results in reused buffers.
+
+"""
+
+import numpy
+import numba
+
+
+@numba.njit
+def _expand(region_values, regmap, out):
+    "Compiled expansion, out[:, j] = region_values[:, regmap[j]]."
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            region = regmap[j]
+            for k in range(out.shape[2]):
+                out[i, j, k] = region_values[i, region, k]
+
+
+@numba.njit
+def _average(node_values, rows, order, bounds, counts, out):
+    "Compiled segment mean over the nodes of each region, for the given rows of node_values."
+    for i in range(rows.shape[0]):
+        row = rows[i]
+        for region in range(bounds.shape[0] - 1):
+            for k in range(out.shape[2]):
+                acc = 0.0
+                for p in range(bounds[region], bounds[region + 1]):
+                    acc += node_values[row, order[p], k]
+                out[row, region, k] = acc / counts[region]
+
+
+class RegionMap(object):
+    """
+    Expands region values to nodes and averages node values over regions, for arrays
+    of shape (n_var, n_region or n_node, n_mode).
+
+    ``regmap`` gives the region of each node, and every region must have at least one node.
+    With ``use_numba``, both operations use compiled loops instead of NumPy's ``take`` and
+    ``add.reduceat``. Results are written in buffers reused from one call to the next, so
+    they must be consumed (or copied) before the next call.
+    """
+
+    def __init__(self, regmap, n_region, use_numba=False):
+        self.regmap = numpy.asarray(regmap, dtype=numpy.intp)
+        self.n_node = self.regmap.size
+        self.n_region = n_region
+        self.use_numba = use_numba
+        counts = numpy.bincount(self.regmap, minlength=n_region)
+        if counts.size > n_region or not counts.all():
+            raise ValueError("Region map must map nodes onto each one of %d regions." % (n_region, ))
+        # nodes sorted by region, with each region a contiguous segment
+        self.order = numpy.argsort(self.regmap, kind='mergesort')
+        self.bounds = numpy.r_[0, numpy.cumsum(counts)]
+        self.counts = counts.astype(numpy.float64)
+        self._buffers = {}
+
+    def _buffer(self, name, shape, dtype):
+        key = name, shape, dtype
+        if key not in self._buffers:
+            self._buffers[key] = numpy.zeros(shape, dtype)
+        return self._buffers[key]
+
+    def expand(self, region_values):
+        "Expand region values of shape (n_var, n_region, n_mode) to the nodes."
+        n_var, _, n_mode = region_values.shape
+        out = self._buffer('expand', (n_var, self.n_node, n_mode), region_values.dtype)
+        if self.use_numba:
+            _expand(region_values, self.regmap, out)
+        else:
+            # out is not buffered by NumPy for modes other than 'raise'
+            numpy.take(region_values, self.regmap, axis=1, out=out, mode='clip')
+        return out
+
+    def average(self, node_values, rows=None):
+        """
+        Average node values of shape (n_var, n_node, n_mode) over regions. When ``rows`` is given,
+        e.g. the coupling variables, only these variables are averaged and the others are left to zero.
+        """
+        n_var, _, n_mode = node_values.shape
+        rows = numpy.r_[:n_var] if rows is None else numpy.asarray(rows, dtype=numpy.intp)
+        out = self._buffer('average', (n_var, self.n_region, n_mode), node_values.dtype)
+        if self.use_numba:
+            _average(node_values, rows, self.order, self.bounds, self.counts, out)
+        else:
+            sorted_values = self._buffer('sorted', (self.n_node, n_mode), node_values.dtype)
+            for row in rows:
+                numpy.take(node_values[row], self.order, axis=0, out=sorted_values, mode='clip')
+                numpy.add.reduceat(sorted_values, self.bounds[:-1], axis=0, out=out[row])
+                out[row] /= self.counts[:, numpy.newaxis]
+        return out
@@ -41,8 +41,8 @@ simulation and the method for running the simulation.
 
 import time
 import math
+import functools
 import numpy
-import scipy.sparse
 from tvb.basic.profile import TvbProfile
 import tvb.basic.traits.core as core
 import tvb.basic.traits.types_basic as basic
@@ -52,7 +52,9 @@ from tvb.datatypes import cortex, connectivity, arrays, patterns
 from tvb.simulator import models, integrators, monitors, coupling
 
 from .common import psutil, get_logger, numpy_add_at
-from .history import SparseHistory, DenseHistory
+from .history import SparseHistory, DenseHistory, InterpolatedHistory
+from .local_coupling import LocalCoupling
+from .regmap import RegionMap
 
 
 LOG = get_logger(__name__)
@@ -201,6 +203,9 @@ class Simulator(core.Type):
 
     history = None # type: SparseHistory
 
+    # precision of the local coupling operator of surface simulations, float32 halves its memory traffic
+    local_coupling_dtype = numpy.float64
+
     @property
     def good_history_shape(self):
         "Returns expected history shape."
@@ -247,6 +252,7 @@ class Simulator(core.Type):
             rm = self.surface.region_mapping
             unmapped = self.connectivity.unmapped_indices(rm)
             self._regmap = numpy.r_[rm, unmapped]
+            self._region_map = RegionMap(self._regmap, self.connectivity.number_of_regions)
             self.number_of_nodes = self._regmap.shape[0]
             LOG.info('Surface simulation with %d vertices + %d non-cortical, %d total nodes',
                      rm.size, unmapped.size, self.number_of_nodes)
@@ -295,9 +301,15 @@ class Simulator(core.Type):
         # Set delays, provided in physical units, in integration steps.
         self.connectivity.set_idelays(self.integrator.dt)
         self.horizon = self.connectivity.idelays.max() + 1
+        if isinstance(self.integrator, integrators.IntegratorAdaptive):
+            # delayed states needed by the stages of a step must already be in history
+            idelays = self.connectivity.idelays[self.connectivity.weights != 0]
+            if idelays.size:
+                self.integrator.delay_bound = max(idelays.min() - 1, 1) * self.integrator.dt
         # Reshape integrator.noise.nsig, if necessary.
         if isinstance(self.integrator, integrators.IntegratorStochastic):
             self._configure_integrator_noise()
+            self.integrator.check_noise(self.good_history_shape[1:])
         # Setup history
         self._configure_history(self.initial_conditions)
         # Configure Monitors to work with selected Model, etc...
@@ -318,27 +330,10 @@ class Simulator(core.Type):
 
     def _prepare_local_coupling(self):
         if self.surface is None:
-            local_coupling = 0.0
-        else:
-            if self.surface.coupling_strength.size == 1:
-                local_coupling = (self.surface.coupling_strength[0] *
-                                  self.surface.local_connectivity.matrix)
-            elif self.surface.coupling_strength.size == self.surface.number_of_vertices:
-                ind = numpy.arange(self.number_of_nodes, dtype=numpy.intc)
-                vec_cs = numpy.zeros((self.number_of_nodes,))
-                vec_cs[:self.surface.number_of_vertices] = self.surface.coupling_strength
-                sp_cs = scipy.sparse.csc_matrix((vec_cs, (ind, ind)),
-                                                shape=(self.number_of_nodes, self.number_of_nodes))
-                local_coupling = sp_cs * self.surface.local_connectivity.matrix
-            if local_coupling.shape[1] < self.number_of_nodes:
-                # must match unmapped indices handling in preconfigure
-                from scipy.sparse import csr_matrix, vstack, hstack
-                nn = self.number_of_nodes
-                npad = nn - local_coupling.shape[0]
-                rpad = csr_matrix((local_coupling.shape[0], npad))
-                bpad = csr_matrix((npad, nn))
-                local_coupling = vstack([hstack([local_coupling, rpad]), bpad])
-        return local_coupling
+            return 0.0
+        # non-cortical nodes are padded by the operator, must match unmapped indices handling in preconfigure
+        return LocalCoupling(self.surface.local_connectivity.matrix, self.number_of_nodes,
+                             self.surface.coupling_strength, dtype=self.local_coupling_dtype)
 
     def _prepare_stimulus(self):
         if self.stimulus is None:
@@ -354,9 +349,13 @@ class Simulator(core.Type):
         "Compute delayed node coupling values."
         coupling = self.coupling(step, self.history)
         if self.surface is not None:
-            coupling = coupling[:, self._regmap]
+            coupling = self._region_map.expand(coupling)
         return coupling
 
+    def _loop_compute_node_coupling_at(self, step, t):
+        "Compute delayed node coupling values at time t ms after the state of the previous step."
+        return self._loop_compute_node_coupling(step + t / self.integrator.dt)
+
     def _loop_update_stimulus(self, step, stimulus):
         "Update stimulus values for current time step."
         if self.stimulus is not None:
@@ -367,10 +366,7 @@ class Simulator(core.Type):
     def _loop_update_history(self, step, n_reg, state):
         "Update history."
         if self.surface is not None and state.shape[1] > self.connectivity.number_of_regions:
-            region_state = numpy.zeros((n_reg, state.shape[0], state.shape[2]))         # temp (node, cvar, mode)
-            numpy_add_at(region_state, self._regmap, state.transpose((1, 0, 2)))        # sum within region
-            region_state /= numpy.bincount(self._regmap).reshape((-1, 1, 1))            # div by n node in region
-            state = region_state.transpose((1, 0, 2))                                   # (cvar, node, mode)
+            state = self._region_map.average(state, self.model.cvar)    # only cvars are kept in history
         self.history.update(step, state)
 
     def _loop_monitor_output(self, step, state):
@@ -400,16 +396,32 @@ class Simulator(core.Type):
         self._handle_random_state(random_state)
         n_reg = self.connectivity.number_of_regions
         local_coupling = self._prepare_local_coupling()
+        dfun = self.model.dfun
+        if isinstance(local_coupling, LocalCoupling):
+            # local coupling of all coupled state variables is computed once per integration stage
+            dfun = local_coupling.staged(dfun)
+        if isinstance(self.integrator, integrators.HeunMultiRate):
+            # fast and slow equations are evaluated separately, at their own rates
+            dfun_fast, dfun_slow = self.model.dfun_fast, self.model.dfun_slow
+            if isinstance(local_coupling, LocalCoupling):
+                dfun_fast, dfun_slow = local_coupling.staged(dfun_fast), local_coupling.staged(dfun_slow)
+            self.integrator.slow_indices = self.model.slow_indices
+            self.integrator.dfun_fast, self.integrator.dfun_slow = dfun_fast, dfun_slow
         stimulus = self._prepare_stimulus()
         state = self.current_state
+        adaptive = isinstance(self.integrator, integrators.IntegratorAdaptive)
 
         # integration loop
         n_steps = int(math.ceil(self.simulation_length / self.integrator.dt))
         for step in range(self.current_step + 1, self.current_step + n_steps +1):
             # needs implementing by hsitory + coupling?
-            node_coupling = self._loop_compute_node_coupling(step)
+            if adaptive:
+                # evaluated by the integrator only at the times its steps require
+                node_coupling = functools.partial(self._loop_compute_node_coupling_at, step)
+            else:
+                node_coupling = self._loop_compute_node_coupling(step)
             self._loop_update_stimulus(step, stimulus)
-            state = self.integrator.scheme(state, self.model.dfun, node_coupling, local_coupling, stimulus)
+            state = self.integrator.scheme(state, dfun, node_coupling, local_coupling, stimulus)
             self._loop_update_history(step, n_reg, state)
             output = self._loop_monitor_output(step, state)
             if output is not None:
@@ -476,15 +488,19 @@ class Simulator(core.Type):
             numpy_add_at(region_history.transpose(ax), self._regmap, history.transpose(ax))
             region_history /= numpy.bincount(self._regmap).reshape((-1, 1))
             history = region_history
-        # create history query implementation
-        self.history = SparseHistory(
+        # create history query implementation, which adaptive integrators query between steps
+        adaptive = isinstance(self.integrator, integrators.IntegratorAdaptive)
+        self.history = (InterpolatedHistory if adaptive else SparseHistory)(
             self.connectivity.weights,
             self.connectivity.idelays,
             self.model.cvar,
             self.model.number_of_modes
         )
         # initialize its buffer
-        self.history.initialize(history)
+        if adaptive:
+            self.history.initialize(history, self.current_step)
+        else:
+            self.history.initialize(history)
 
     def _configure_integrator_noise(self):
         """
@@ -504,13 +520,6 @@ class Simulator(core.Type):
 
         noise = self.integrator.noise        
 
-        if self.integrator.noise.ntau > 0.0:
-            self.integrator.noise.configure_coloured(self.integrator.dt,
-                                                     self.good_history_shape[1:])
-        else:
-            self.integrator.noise.configure_white(self.integrator.dt,
-                                                  self.good_history_shape[1:])
-
         if self.surface is not None:
             if self.integrator.noise.nsig.size == self.connectivity.number_of_regions:
                 self.integrator.noise.nsig = self.integrator.noise.nsig[self.surface.region_mapping]
@@ -522,7 +531,7 @@ class Simulator(core.Type):
         nsig = self.integrator.noise.nsig
         LOG.debug("Given noise shape is %s", nsig.shape)
         if nsig.shape in (good_nsig_shape, (1,)):
-            return
+            pass
         elif nsig.shape == (self.model.nvar, ):
             nsig = nsig.reshape((self.model.nvar, 1, 1))
         elif nsig.shape == (self.number_of_nodes, ):
@@ -536,6 +545,14 @@ class Simulator(core.Type):
         LOG.debug("Corrected noise shape is %s", nsig.shape)
         self.integrator.noise.nsig = nsig
 
+        # configured once nsig has its final value, which the noise scaling is computed from
+        if self.integrator.noise.ntau > 0.0:
+            self.integrator.noise.configure_coloured(self.integrator.dt,
+                                                     self.good_history_shape[1:])
+        else:
+            self.integrator.noise.configure_white(self.integrator.dt,
+                                                  self.good_history_shape[1:])
+
     def _configure_monitors(self):
         """ Configure the requested Monitors for this Simulator """
         # Coerce to list if required
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.cross_correlation module
+
+"""
+
+import numpy
+from scipy.signal import correlate
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers.cross_correlation import CrossCorrelate, cross_correlate
+from tvb.datatypes import time_series
+
+
+class TestCrossCorrelate(BaseTestCase):
+    """
+    Compare the FFT based cross correlation against scipy.signal.correlate.
+    """
+
+    def _reference(self, data):
+        tpts, _, nodes, _ = data.shape
+        result = numpy.zeros((tpts, nodes, nodes) + data.shape[1:4:2])
+        for mode in range(data.shape[3]):
+            for var in range(data.shape[1]):
+                x = data[:, var, :, mode] - data[:, var, :, mode].mean(axis=0)
+                for n1 in range(nodes):
+                    for n2 in range(nodes):
+                        result[:, n1, n2, var, mode] = correlate(x[:, n1], x[:, n2], mode="same")
+        return result
+
+    def test_same_as_scipy(self):
+        for tpts in (64, 65):
+            data = numpy.random.randn(tpts, 2, 5, 1)
+            ts = time_series.TimeSeries(data=data, sample_period=0.5)
+            cross_corr = CrossCorrelate(time_series=ts).evaluate()
+            numpy.testing.assert_allclose(cross_corr.array_data, self._reference(data), atol=1e-10)
+            assert cross_corr.time.shape == (tpts,)
+            assert cross_corr.time[tpts // 2] == 0.0
+
+    def test_max_lag(self):
+        data = numpy.random.randn(101, 1, 4, 2)
+        ts = time_series.TimeSeries(data=data, sample_period=0.5)
+        analyzer = CrossCorrelate(time_series=ts, max_lag=5.0)
+        cross_corr = analyzer.evaluate()
+        assert cross_corr.array_data.shape == analyzer.result_shape(data.shape) == (21, 4, 4, 1, 2)
+        numpy.testing.assert_allclose(cross_corr.time, 0.5 * numpy.arange(-10, 11))
+        numpy.testing.assert_allclose(cross_corr.array_data, self._reference(data)[40:61], atol=1e-10)
+
+    def test_blocks(self):
+        data = numpy.random.randn(50, 7)
+        lags = numpy.arange(-3, 4)
+        numpy.testing.assert_allclose(cross_correlate(data, lags, block_memory=1),
+                                      cross_correlate(data, lags), atol=1e-10)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.fcd_matrix module
+
+"""
+
+import os
+import shutil
+import tempfile
+import numpy
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers import fcd_matrix
+from tvb.datatypes import time_series
+
+
+class TestFcd(BaseTestCase):
+    """
+    Compare the streamed FC and FCD against correlations computed window by window.
+    """
+
+    def setup_method(self):
+        self.data = numpy.cumsum(numpy.random.randn(600, 8), axis=0)
+
+    def _reference_stream(self, sp, sw, n_windows):
+        triangular = numpy.triu_indices(8, 1)
+        return numpy.array([numpy.corrcoef(self.data[int(i * sp):int(i * sp + sw) + 1].T)[triangular]
+                            for i in range(n_windows)])
+
+    def test_fc_stream(self):
+        for sp, sw in ((5, 60), (2.5, 30.5), (70, 60)):
+            n_windows = int((600 - sw) / sp)
+            stream = fcd_matrix.sliding_fc_stream(self.data, sp, sw, n_windows)
+            numpy.testing.assert_allclose(stream, self._reference_stream(sp, sw, n_windows), atol=1e-12)
+
+    def test_fcd_from_stream(self):
+        stream = self._reference_stream(10, 60, 50)
+        fcd = fcd_matrix.fcd_from_stream(stream.copy())
+        numpy.testing.assert_allclose(fcd, numpy.corrcoef(stream), atol=1e-12)
+
+    def test_memmap_stream(self):
+        folder = tempfile.mkdtemp()
+        try:
+            stream = numpy.lib.format.open_memmap(os.path.join(folder, 'fc.npy'), mode='w+', shape=(50, 28))
+            fcd_matrix.sliding_fc_stream(self.data, 10, 60, out=stream)
+            fcd = fcd_matrix.fcd_from_stream(stream)
+            del stream
+        finally:
+            shutil.rmtree(folder)
+        numpy.testing.assert_allclose(fcd, numpy.corrcoef(self._reference_stream(10, 60, 50)), atol=1e-12)
+
+    def test_evaluate(self):
+        ts = time_series.TimeSeriesRegion(data=self.data[:, numpy.newaxis, :, numpy.newaxis], sample_period=2.0)
+        analyzer = fcd_matrix.FcdCalculator(time_series=ts, sw=120.0, sp=20.0)
+        fcd = analyzer.evaluate()[0]
+        assert fcd.shape == analyzer.result_shape(ts.data.shape)
+        numpy.testing.assert_allclose(fcd[:, :, 0, 0], numpy.corrcoef(self._reference_stream(10, 60, 54)),
+                                      atol=1e-12)
+
+    def test_evaluate_on_disk(self, monkeypatch):
+        monkeypatch.setattr(fcd_matrix, 'FC_STREAM_MEMORY', 0)
+        folder = tempfile.mkdtemp()
+        monkeypatch.setattr(tempfile, 'tempdir', folder)
+        try:
+            ts = time_series.TimeSeriesRegion(data=self.data[:, numpy.newaxis, :, numpy.newaxis],
+                                              sample_period=2.0)
+            fcd = fcd_matrix.FcdCalculator(time_series=ts, sw=120.0, sp=20.0).evaluate()[0]
+            assert os.listdir(folder) == []
+        finally:
+            shutil.rmtree(folder)
+        numpy.testing.assert_allclose(fcd[:, :, 0, 0], numpy.corrcoef(self._reference_stream(10, 60, 54)),
+                                      atol=1e-12)
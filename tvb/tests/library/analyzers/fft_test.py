@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.fft module
+
+"""
+
+import numpy
+from scipy import signal
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers import fft
+from tvb.datatypes import time_series
+
+
+class TestFFT(BaseTestCase):
+    """
+    Compare the segmented FFT against transforming each segment separately.
+    """
+
+    def _reference(self, data, seg_tpts, starts, window):
+        result = []
+        for start in starts:
+            segment = signal.detrend(data[start:start + seg_tpts], axis=0)
+            segment = segment * window(seg_tpts)[:, numpy.newaxis, numpy.newaxis, numpy.newaxis]
+            result.append(numpy.fft.fft(segment, axis=0)[1:seg_tpts // 2 + 1])
+        return numpy.stack(result, axis=-1)
+
+    def test_evaluate(self):
+        data = numpy.random.randn(1000, 2, 5, 1)
+        ts = time_series.TimeSeries(data=data, sample_period=0.5)
+        spectrum = fft.FFT(time_series=ts, segment_length=150.0, window_function='hamming').evaluate()
+        # 4 segments of 300 points, overlapping by 100 points
+        reference = self._reference(data, 300, [0, 233, 466, 700], numpy.hamming)
+        numpy.testing.assert_allclose(spectrum.array_data, reference, atol=1e-10)
+
+    def test_single_segment(self):
+        data = numpy.random.randn(301, 1, 3, 2)
+        ts = time_series.TimeSeries(data=data, sample_period=1.0)
+        spectrum = fft.FFT(time_series=ts, window_function='bartlett').evaluate()
+        reference = self._reference(data, 301, [0], numpy.bartlett)
+        numpy.testing.assert_allclose(spectrum.array_data, reference, atol=1e-10)
+
+    def test_chunks(self):
+        data = numpy.random.randn(800, 1, 7, 1)
+        ts = time_series.TimeSeries(data=data, sample_period=1.0)
+        spectrum = fft.FFT(time_series=ts, segment_length=200.0, window_function='hanning').evaluate()
+        chunk_memory = fft.FFT_CHUNK_MEMORY
+        try:
+            fft.FFT_CHUNK_MEMORY = 1
+            chunked = fft.FFT(time_series=ts, segment_length=200.0, window_function='hanning').evaluate()
+        finally:
+            fft.FFT_CHUNK_MEMORY = chunk_memory
+        numpy.testing.assert_allclose(chunked.array_data, spectrum.array_data)
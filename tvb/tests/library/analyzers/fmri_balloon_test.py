@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.fmri_balloon module
+
+"""
+
+import numpy
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers.fmri_balloon import BalloonModel
+from tvb.simulator import integrators
+from tvb.datatypes import time_series
+
+
+class TestBalloonModel(BaseTestCase):
+    """
+    Compare the compiled balloon integration against stepping the integrator scheme.
+    """
+
+    def _scheme_bold(self, model, data, heun):
+        integrator = integrators.HeunDeterministic(dt=model.dt) if heun else integrators.EulerDeterministic(dt=model.dt)
+        x = data[:, :1] - data[:, :1].mean(axis=0)
+        state = numpy.zeros((4, ) + data.shape[2:])
+        state[1:] = 1.0
+        k1, k2, k3 = model.compute_derived_parameters()
+        bold = []
+        for step in range(data.shape[0]):
+            if step > 0:
+                state = integrator.scheme(state, model.balloon_dfun, x[step], 0.0, 0.0)
+            v, q = state[2], state[3]
+            bold.append(model.V0 * (k1 * (1. - q) + k2 * (1. - q / v) + k3 * (1. - v)))
+        return numpy.array(bold)
+
+    def test_compiled(self):
+        data = numpy.random.rand(2000, 2, 5, 2)
+        ts = time_series.TimeSeries(data=data, sample_period=1.0, time=numpy.arange(2000.0))
+        for heun in (True, False):
+            integrator = integrators.HeunDeterministic() if heun else integrators.EulerDeterministic()
+            model = BalloonModel(time_series=ts, dt=0.001, integrator=integrator,
+                                 bold_model='nonlinear', neural_input_transformation='none')
+            bold = model.evaluate().data
+            assert bold.shape == (2000, 1, 5, 2)
+            numpy.testing.assert_allclose(bold[:, 0], self._scheme_bold(model, data, heun), rtol=1e-12)
+
+    def test_other_integrator(self):
+        data = numpy.random.rand(500, 1, 3, 1)
+        ts = time_series.TimeSeries(data=data, sample_period=1.0, time=numpy.arange(500.0))
+        integrator = integrators.RungeKutta4thOrderDeterministic()
+        bold = BalloonModel(time_series=ts, dt=0.001, integrator=integrator,
+                            bold_model='nonlinear', neural_input_transformation='none').evaluate().data
+        heun = BalloonModel(time_series=ts, dt=0.001, integrator=integrators.HeunDeterministic(),
+                            bold_model='nonlinear', neural_input_transformation='none').evaluate().data
+        assert bold.shape == heun.shape
+        numpy.testing.assert_allclose(bold, heun, rtol=1e-4, atol=1e-4 * numpy.abs(heun).max())
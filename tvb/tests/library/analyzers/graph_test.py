@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.graph module
+
+"""
+
+import numpy
+import scipy.sparse
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers import graph
+
+
+class TestGraph(BaseTestCase):
+    """
+    Check the sparse graph metrics on small graphs with known values.
+    """
+
+    def _ring(self, n):
+        A = numpy.zeros((n, n))
+        A[numpy.r_[:n], (numpy.r_[:n] + 1) % n] = 1.0
+        return A + A.T
+
+    def test_betweenness(self):
+        # on a path 0-1-2-3 the inner nodes lie on 4 ordered shortest paths each
+        A = numpy.diag(numpy.ones(3), 1)
+        A = A + A.T
+        assert numpy.allclose(graph.betweenness_bin(A), [0, 4, 4, 0])
+        assert numpy.allclose(graph.betweenness_bin(scipy.sparse.csr_matrix(A)), [0, 4, 4, 0])
+        # a long detour on the direct edge moves the shortest paths through node 2
+        L = numpy.array([[0, 5, 1], [5, 0, 1], [1, 1, 0.]])
+        assert numpy.allclose(graph.betweenness_wei(L), [0, 0, 2])
+
+    def test_efficiency_and_clustering(self):
+        A = self._ring(6)
+        # distances 1, 1, 2, 2, 3 from every node
+        assert numpy.allclose(graph.efficiency_bin(A), (2 + 1 + 1 / 3.0) / 5)
+        assert numpy.allclose(graph.efficiency_wei(2 * A), 2 * graph.efficiency_bin(A))
+        assert numpy.allclose(graph.efficiency_bin(A, compute_local_efficiency=True), 0.0)
+        K = numpy.ones((4, 4)) - numpy.eye(4)
+        assert numpy.allclose(graph.clustering_coef_bu(K), 1.0)
+        assert numpy.allclose(graph.clustering_coef_wu(K * 0.5), 1.0)
+        assert numpy.allclose(graph.clustering_coef_bu(A), 0.0)
+
+    def test_largest_components(self):
+        A = numpy.random.rand(40, 40) < 0.06
+        A = (A | A.T) * 1.0
+        sequence = numpy.r_[numpy.random.permutation(40)[:30], 0, 0]
+        temp = A.copy()
+        sizes = []
+        for node in sequence:
+            temp[node, :] = temp[:, node] = 0.0
+            sizes.append(graph.get_components_sizes(temp))
+        assert numpy.all(graph.largest_component_sizes(A, sequence) == sizes)
+        assert graph.get_components_sizes(self._ring(7)) == 7
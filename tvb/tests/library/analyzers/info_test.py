@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.info module
+
+"""
+
+import numpy
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers.info import sampen
+
+
+class TestSampleEntropy(BaseTestCase):
+    """
+    Compare the KD-tree match counting against comparing all pairs of templates.
+    """
+
+    def _matches(self, y, n, r):
+        templates = numpy.array([y[i:i + n] for i in range(y.size - n + 1)])
+        distance = numpy.abs(templates[:, numpy.newaxis] - templates[numpy.newaxis]).max(axis=-1)
+        return numpy.triu(distance < r, 1).sum()
+
+    def test_counts(self):
+        # rounded values give distances equal to r, which must not match
+        y = numpy.round(numpy.random.randn(400), 1)
+        e, p, c2, c1 = sampen(y, m=2, r=0.2, info=True)
+        assert c1 == self._matches(y, 2, 0.2)
+        assert c2 == self._matches(y, 3, 0.2)
+        assert numpy.allclose(e, -numpy.log(c2 * 1.0 / c1))
+
+    def test_scales_and_nodes(self):
+        y = numpy.random.randn(600, 3)
+        taus = numpy.r_[1:4]
+        e = sampen(y, taus=taus, qse=True)
+        assert e.shape == (3, 3)
+        for node in range(3):
+            r = 0.15 * y[:, node].std()
+            coarse = y[:600 // 2 * 2, node].reshape((-1, 2)).mean(axis=1)
+            c1, c2 = self._matches(coarse, 2, r), self._matches(coarse, 3, r)
+            assert numpy.allclose(e[1, node], -numpy.log(c2 * 1.0 / c1 / (2 * r)))
+            assert numpy.allclose(e[:, node], sampen(y[:, node], taus=taus, qse=True))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.node_coherence module
+
+"""
+
+import numpy
+import matplotlib.mlab as mlab
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers.node_coherence import NodeCoherence, coherence, hamming
+from tvb.datatypes import time_series
+
+
+class TestNodeCoherence(BaseTestCase):
+    """
+    Compare the block-wise Welch coherence against matplotlib's mlab.cohere.
+    """
+
+    def _check_against_mlab(self, data, nfft, noverlap, coh, freq, sample_rate):
+        numpy.testing.assert_allclose(freq, numpy.fft.fftfreq(nfft, 1e3 / sample_rate)[1:(nfft + 1) // 2])
+        for var in range(data.shape[1]):
+            for mode in range(data.shape[3]):
+                for n1 in range(data.shape[2]):
+                    for n2 in range(data.shape[2]):
+                        cxy, _ = mlab.cohere(data[:, var, n1, mode], data[:, var, n2, mode], NFFT=nfft,
+                                             noverlap=noverlap, detrend=mlab.detrend_none,
+                                             window=hamming(nfft))
+                        numpy.testing.assert_allclose(coh[:, n1, n2, var, mode], cxy[1:(nfft + 1) // 2])
+
+    def test_coherence(self):
+        data = numpy.random.randn(1000, 2, 5, 1)
+        for noverlap in (0, 32):
+            coh, freq = coherence(data, 1e3, nfft=64, noverlap=noverlap)
+            self._check_against_mlab(data, 64, noverlap, coh, freq, 1e3)
+
+    def test_blocks(self):
+        data = numpy.random.randn(500, 1, 9, 2)
+        coh, _ = coherence(data, 1e3, nfft=32)
+        coh_blocks, _ = coherence(data, 1e3, nfft=32, max_memory=1)
+        numpy.testing.assert_allclose(coh_blocks, coh)
+        numpy.testing.assert_allclose(coh, coh.transpose((0, 2, 1, 3, 4)))
+
+    def test_evaluate(self):
+        data = numpy.random.randn(600, 1, 4, 1)
+        ts = time_series.TimeSeries(data=data, sample_period=1.0)
+        ts.configure()
+        analyzer = NodeCoherence(time_series=ts, nfft=32, noverlap=16)
+        spectrum = analyzer.evaluate()
+        assert spectrum.array_data.shape == analyzer.result_shape(data.shape)[0]
+        self._check_against_mlab(data, 32, 16, spectrum.array_data, spectrum.frequency, ts.sample_rate)
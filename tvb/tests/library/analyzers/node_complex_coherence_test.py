@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.node_complex_coherence module
+
+"""
+
+import numpy
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers.node_complex_coherence import NodeComplexCoherence
+from tvb.datatypes import time_series
+
+
+class TestNodeComplexCoherence(BaseTestCase):
+    """
+    Compare the vectorized cross spectra against a direct per segment computation.
+    """
+
+    def setup_method(self):
+        self.data = numpy.random.randn(3000, 1, 6, 1)
+        self.ts = time_series.TimeSeries(data=self.data, sample_period=1.0)
+
+    def _reference(self, nfreq, window):
+        # 1000 ms epochs, split into 500 ms segments shifted by 250 ms
+        data = self.data[:, 0, :, 0]
+        cs = numpy.zeros((6, 6, nfreq), dtype=numpy.complex128)
+        av = numpy.zeros((6, nfreq), dtype=numpy.complex128)
+        for epoch in range(3):
+            for segment in range(3):
+                start = epoch * 1000 + segment * 250
+                spectra = numpy.fft.fft(data[start:start + 500] * window(500)[:, numpy.newaxis], axis=0)
+                for f in range(nfreq):
+                    cs[:, :, f] += numpy.outer(spectra[f], spectra[f].conj())
+                    av[:, f] += spectra[f]
+        cs /= 9.0
+        av /= 9.0
+        for f in range(nfreq):
+            cs[:, :, f] -= numpy.outer(av[:, f], av[:, f].conj())
+        power = numpy.sqrt(numpy.einsum('iif->if', cs).real)
+        return cs, cs / (power[:, numpy.newaxis] * power[numpy.newaxis, :])
+
+    def test_evaluate(self):
+        result = NodeComplexCoherence(time_series=self.ts).evaluate()
+        cs, coh = self._reference(251, numpy.hanning)
+        numpy.testing.assert_allclose(result.cross_spectrum, cs, atol=1e-9)
+        numpy.testing.assert_allclose(result.array_data, coh, atol=1e-12)
+
+    def test_max_freq(self):
+        result = NodeComplexCoherence(time_series=self.ts, window_function='hamming', max_freq=40.0).evaluate()
+        cs, coh = self._reference(40, numpy.hamming)
+        numpy.testing.assert_allclose(result.cross_spectrum, cs, atol=1e-9)
+        numpy.testing.assert_allclose(result.array_data, coh, atol=1e-12)
+
+    def test_segments_not_averaged(self):
+        analyzer = NodeComplexCoherence(time_series=self.ts, average_segments=False)
+        result = analyzer.evaluate()
+        result_shape, _ = analyzer.result_shape(self.data.shape, 1024.0, 1000.0, 500.0, 250.0, 1.0, 0, False)
+        assert result.cross_spectrum.shape == result.array_data.shape == result_shape
+        numpy.testing.assert_allclose(numpy.abs(numpy.einsum('iifs->ifs', result.array_data)), 1.0)
+
+    def test_worker_processes(self):
+        for average_segments in (True, False):
+            serial = NodeComplexCoherence(time_series=self.ts, average_segments=average_segments).evaluate()
+            parallel = NodeComplexCoherence(time_series=self.ts, average_segments=average_segments,
+                                            n_jobs=2).evaluate()
+            numpy.testing.assert_allclose(parallel.cross_spectrum, serial.cross_spectrum, atol=1e-9)
+            numpy.testing.assert_allclose(parallel.array_data, serial.array_data, atol=1e-12)
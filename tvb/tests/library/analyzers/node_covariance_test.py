@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.node_covariance module
+
+"""
+
+import numpy
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.datatypes.time_series import TimeSeries
+from tvb.analyzers import node_covariance
+from tvb.analyzers.node_covariance import NodeCovariance, second_moments
+from tvb.analyzers.correlation_coefficient import CorrelationCoefficient
+
+
+class TestSecondMoments(BaseTestCase):
+    """
+    Compare the chunked, batched moments with numpy.cov and numpy.corrcoef.
+    """
+
+    def setup_method(self):
+        data = numpy.random.randn(300, 2, 6, 3) + 100.0
+        self.time_series = TimeSeries(data=data, sample_period=1.0)
+        self.time_series.configure()
+
+    def test_chunks(self, monkeypatch):
+        # a few time points per chunk, so that many chunks are merged
+        monkeypatch.setattr(node_covariance, "COVARIANCE_CHUNK_MEMORY", 8 * 36 * 7)
+        moments = second_moments(self.time_series, slice(10, 290))
+        diagonal = second_moments(self.time_series, slice(10, 290), full=False)
+        data = self.time_series.data[10:290]
+        for var in range(2):
+            for mode in range(3):
+                assert numpy.allclose(moments.covariance()[var, mode], numpy.cov(data[:, var, :, mode].T))
+                assert numpy.allclose(moments.correlation()[var, mode], numpy.corrcoef(data[:, var, :, mode].T))
+                assert numpy.allclose(diagonal.variance[var, mode], data[:, var, :, mode].var(axis=0, ddof=1))
+
+    def test_analyzers(self):
+        covariance = NodeCovariance(time_series=self.time_series).evaluate().array_data
+        correlation = CorrelationCoefficient(time_series=self.time_series).evaluate().array_data
+        assert covariance.shape == correlation.shape == (6, 6, 2, 3)
+        data = self.time_series.data[:, 1, :, 2]
+        assert numpy.allclose(covariance[:, :, 1, 2], numpy.cov(data.T))
+        assert numpy.allclose(correlation[:, :, 1, 2], numpy.corrcoef(data.T))
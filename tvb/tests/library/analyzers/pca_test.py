@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.pca module
+
+"""
+
+import numpy
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.datatypes.time_series import TimeSeries
+from tvb.analyzers.pca import PCA
+
+
+class TestPCA(BaseTestCase):
+    """
+    Check the exact and randomized principal components against an SVD.
+    """
+
+    def setup_method(self):
+        # a few strong sources mixed into many nodes
+        sources = numpy.random.randn(400, 1, 4, 1) * numpy.r_[8.0, 6.0, 4.0, 3.0][:, numpy.newaxis]
+        mixing = numpy.random.randn(4, 40)
+        data = numpy.einsum('tvsm,sn->tvnm', sources, mixing) + numpy.random.randn(400, 1, 40, 1)
+        self.time_series = TimeSeries(data=data, sample_period=1.0)
+        self.time_series.configure()
+        data = data[:, 0, :, 0]
+        data = (data - data.mean(axis=0)) / data.std(axis=0)
+        _, s, self.vh = numpy.linalg.svd(data, full_matrices=False)
+        self.fractions = s ** 2 / (s ** 2).sum()
+
+    def test_exact(self):
+        pca = PCA(time_series=self.time_series).evaluate()
+        assert pca.weights.shape == (40, 40, 1, 1)
+        assert numpy.allclose(pca.fractions[:, 0, 0], self.fractions)
+        assert numpy.allclose(numpy.abs(pca.weights[:4, :, 0, 0]), numpy.abs(self.vh[:4]))
+
+    def test_randomized(self):
+        pca = PCA(time_series=self.time_series, n_components=4)
+        assert pca.result_shape(self.time_series.data.shape) == [(4, 40, 1, 1), (4, 1, 1)]
+        result = pca.evaluate()
+        assert numpy.allclose(result.fractions[:, 0, 0], self.fractions[:4])
+        assert numpy.allclose(numpy.abs(result.weights[:, :, 0, 0]), numpy.abs(self.vh[:4]), atol=1e-6)
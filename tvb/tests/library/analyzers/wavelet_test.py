@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.analyzers.wavelet module
+
+"""
+
+import numpy
+from scipy import signal
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.analyzers.wavelet import ContinuousWaveletTransform
+from tvb.datatypes import time_series
+
+
+class TestContinuousWaveletTransform(BaseTestCase):
+    """
+    Compare the FFT based transform against direct convolution with each Morlet wavelet.
+    """
+
+    def _reference(self, data, sample_rate, freqs, temporal_step, nt):
+        sigma_t = 1.0 / (2.0 * numpy.pi * freqs / 5.0)
+        coef = numpy.zeros((len(freqs), nt) + data.shape[1:], dtype=numpy.complex128)
+        for i, f0 in enumerate(freqs):
+            amp = 1.0 / numpy.sqrt(sample_rate * numpy.sqrt(numpy.pi) * sigma_t[i])
+            x = numpy.arange(0, 4.0 * sigma_t[i] * sample_rate, 1) / sample_rate
+            wvlt = amp * numpy.exp(-x ** 2 / (2.0 * sigma_t[i] ** 2)) * numpy.exp(2j * numpy.pi * f0 * x)
+            wvlt = numpy.hstack((numpy.conjugate(wvlt[-1:0:-1]), wvlt))
+            for var in range(data.shape[1]):
+                for node in range(data.shape[2]):
+                    wt = signal.convolve(data[:, var, node, 0], wvlt, 'same')
+                    coef[i, :, var, node, 0] = wt[0::temporal_step][:nt]
+        return coef
+
+    def test_evaluate(self):
+        for sample_period, period in ((7.8125, 0.9765625), (5.0, 1.0), (1.0, 1.0)):
+            data = numpy.random.randn(700, 2, 3, 1)
+            ts = time_series.TimeSeries(data=data, sample_period=period)
+            ts.configure()
+            coef = ContinuousWaveletTransform(time_series=ts, sample_period=sample_period).evaluate().array_data
+            temporal_step = int(round(sample_period / period))
+            freqs = numpy.arange(0.008, 0.060, 0.002)
+            reference = self._reference(data, ts.sample_rate, freqs, temporal_step, 700 // temporal_step)
+            numpy.testing.assert_allclose(coef, reference, atol=1e-12)
+
+    def test_worker_processes(self):
+        ts = time_series.TimeSeries(data=numpy.random.randn(700, 2, 3, 1), sample_period=0.9765625)
+        ts.configure()
+        serial = ContinuousWaveletTransform(time_series=ts).evaluate().array_data
+        parallel = ContinuousWaveletTransform(time_series=ts, n_jobs=3).evaluate().array_data
+        numpy.testing.assert_allclose(parallel, serial, atol=1e-14)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and 
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test for tvb.basic.readers module
+
+"""
+
+import os
+import bz2
+import shutil
+import tempfile
+import zipfile
+import numpy
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.basic.readers import ArrayCache, FileReader, ZipReader
+
+
+class TestArrayCache(BaseTestCase):
+    """
+    Test that parsed arrays are cached and served back unchanged.
+    """
+
+    def setup_method(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = ArrayCache(os.path.join(self.folder, 'cache'))
+        self.data = numpy.random.rand(10, 4)
+
+    def teardown_method(self):
+        shutil.rmtree(self.folder)
+
+    def _cache_entries(self):
+        return os.listdir(self.cache.folder) if os.path.isdir(self.cache.folder) else []
+
+    def test_file_reader(self):
+        text_path = os.path.join(self.folder, 'data.txt')
+        numpy.savetxt(text_path, self.data)
+
+        first = FileReader(text_path, cache=self.cache).read_array(use_cols=(1, 2))
+        assert len(self._cache_entries()) == 1
+        second = FileReader(text_path, cache=self.cache).read_array(use_cols=(1, 2))
+        numpy.testing.assert_array_equal(first, second)
+        numpy.testing.assert_allclose(second, self.data[:, 1:3])
+
+        # Different read arguments are kept apart
+        FileReader(text_path, cache=self.cache).read_array(dtype=numpy.int32)
+        assert len(self._cache_entries()) == 2
+
+        # Cached arrays can be changed, without touching the cache entry
+        second[:] = 0.0
+        third = FileReader(text_path, cache=self.cache).read_array(use_cols=(1, 2))
+        numpy.testing.assert_array_equal(first, third)
+
+    def test_changed_source(self):
+        text_path = os.path.join(self.folder, 'data.txt')
+        numpy.savetxt(text_path, self.data)
+        FileReader(text_path, cache=self.cache).read_array()
+
+        numpy.savetxt(text_path, 2 * self.data[:5])
+        os.utime(text_path, (0, 0))
+        result = FileReader(text_path, cache=self.cache).read_array()
+        numpy.testing.assert_allclose(result, 2 * self.data[:5])
+
+    def test_zip_reader(self):
+        zip_path = os.path.join(self.folder, 'data.zip')
+        text_path = os.path.join(self.folder, 'weights.txt')
+        numpy.savetxt(text_path, self.data)
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            archive.write(text_path, 'weights.txt')
+            archive.writestr('tract_lengths.txt.bz2', bz2.compress(open(text_path).read()))
+
+        for _ in range(2):
+            reader = ZipReader(zip_path, cache=self.cache)
+            numpy.testing.assert_allclose(reader.read_array_from_file('weights'), self.data)
+            numpy.testing.assert_allclose(reader.read_array_from_file('tract_lengths'), self.data)
+        assert len(self._cache_entries()) == 2
+
+    def test_disabled(self):
+        text_path = os.path.join(self.folder, 'data.txt')
+        numpy.savetxt(text_path, self.data)
+        result = FileReader(text_path, cache=ArrayCache(None)).read_array()
+        numpy.testing.assert_allclose(result, self.data)
+        assert not self._cache_entries()
@@ -76,6 +76,23 @@ class TestSensors(BaseTestCase):
         except Exception:
             pass
 
+    def test_sensors_to_cube(self):
+        dt = sensors.Sensors()
+        dt.labels = numpy.array(["s%d" % i for i in range(20)])
+        dt.locations = numpy.random.RandomState(42).randn(20, 3)
+        dt.configure()
+
+        cube = SkinAir()
+        cube.vertices = numpy.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], 'f')
+        cube.triangles = numpy.array([[0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5], [0, 4, 5], [0, 5, 1],
+                                      [2, 3, 7], [2, 7, 6], [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3]])
+        cube.configure()
+        mapping = dt.sensors_to_surface(cube)
+
+        # Sensors must land on the cube, along their own direction
+        expected = dt.locations / abs(dt.locations).max(axis=1)[:, numpy.newaxis]
+        assert numpy.allclose(mapping, expected)
+
     def test_sensorseeg(self):
         dt = sensors.SensorsEEG(load_default=True)
         dt.configure()
@@ -147,6 +147,22 @@ class TestSurfaces(BaseTestCase):
         assert 0 == pinched_off.size
         assert 3 == holes.size
 
+    def test_region_boundaries(self):
+        dt = surfaces.Surface()
+        dt.vertices = numpy.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]]).astype(numpy.float64)
+        dt.triangles = numpy.array([[0, 2, 1], [0, 1, 3], [0, 3, 2], [1, 2, 3]])
+        dt.configure()
+        region_mapping = RegionMapping(array_data=numpy.array([0, 0, 1, 2]))
+
+        vertices, lines, normals = dt.generate_region_boundaries(region_mapping)
+        vertices = numpy.array(vertices[0]).reshape((-1, 3))
+        # Two triangles spanning 2 regions give a line each, the other two a 3-way star each
+        assert vertices.shape == (12, 3)
+        assert len(normals[0]) == 36
+        assert lines[0] == [0, 1, 2, 3, 4, 5, 4, 6, 4, 7, 8, 9, 8, 10, 8, 11]
+        assert numpy.allclose(vertices[:4], [[0, 0.5, 0], [0.5, 0.5, 0], [0.5, 0, 0.5], [0, 0, 0.5]])
+        assert numpy.allclose(vertices[4:8], [[0, 1. / 3, 1. / 3], [0, 0, 0.5], [0, 0.5, 0.5], [0, 0.5, 0]])
+
     def test_skinair(self):
         dt = surfaces.SkinAir(load_default=True)
         assert isinstance(dt, surfaces.SkinAir)
@@ -42,6 +42,7 @@ from tvb.datatypes.connectivity import Connectivity
 from tvb.simulator.coupling import Coupling
 from tvb.simulator.integrators import Identity
 from tvb.simulator.models import Model
+from tvb.simulator.history import SparseHistory, InterpolatedHistory
 from tvb.simulator.monitors import Raw
 from tvb.simulator.simulator import Simulator
 
@@ -108,3 +109,39 @@ class TestsExactPropagation(BaseTestCase):
                            [38., 13., 10., 1.],
                            [48., 17., 11., 1.]])
         assert numpy.allclose(xs, xs_)
+
+
+class TestInterpolatedHistory(BaseTestCase):
+
+    def _histories(self, n=5, n_time=6, latest_step=20):
+        numpy.random.seed(42)
+        weights = numpy.random.rand(n, n) * (numpy.random.rand(n, n) > 0.3)
+        idelays = numpy.random.randint(0, n_time, (n, n))
+        idelays[0, 0] = n_time - 1
+        init = numpy.random.randn(n_time, 1, n, 1)
+        sparse = SparseHistory(weights, idelays, numpy.r_[0], 1)
+        sparse.initialize(init)
+        interp = InterpolatedHistory(weights, idelays, numpy.r_[0], 1)
+        interp.initialize(init, latest_step)
+        return sparse, interp
+
+    def test_grid(self):
+        sparse, interp = self._histories()
+        for step in range(15, 21):
+            for expected, actual in zip(sparse.query_sparse(step), interp.query_sparse(step)):
+                assert (expected == actual).all()
+
+    def test_fractional(self):
+        sparse, interp = self._histories()
+        lo, hi = sparse.query_sparse(18), sparse.query_sparse(19)
+        for expected_lo, expected_hi, actual in zip(lo, hi, interp.query_sparse(18.25)):
+            assert numpy.allclose(0.75 * expected_lo + 0.25 * expected_hi, actual)
+
+    def test_held_after_latest(self):
+        sparse, interp = self._histories(latest_step=20)
+        current, delayed = interp.query_sparse(23.5)
+        latest = sparse.buffer[20 % sparse.n_time]
+        assert (current == latest).all()
+        held = (23.5 - 1 - interp.nnz_idelays) >= 20
+        assert held.any()
+        assert (delayed[:, held] == latest[:, interp.nnz_col_el_idx[held]]).all()
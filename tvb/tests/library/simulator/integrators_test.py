@@ -98,6 +98,46 @@ class TestIntegrators(BaseTestCase):
         self._test_scheme(euler_det)
         self._test_scheme(euler_sto)
 
+    def test_stochastic_fused(self):
+        dfun = lambda x, c, lc: -x ** 3 + c
+        for cls in (integrators.HeunStochastic, integrators.EulerStochastic):
+            for noise_ in (noise.Additive(nsig=numpy.array([1e-3, 2e-3]).reshape((2, 1, 1))),
+                           noise.Multiplicative(nsig=numpy.array([1e-3]))):
+                noise_.configure_white(0.1, (2, 5, 1))
+                integ = cls(dt=0.1, noise=noise_)
+                xs = []
+                for scheme in (integ.scheme, integ._numpy_scheme):
+                    noise_.random_stream.seed(42)
+                    x = numpy.ones((2, 5, 1))
+                    for i in range(10):
+                        x = scheme(x, dfun, 0.1, 0.0, 0.0)
+                    xs.append(x)
+                assert numpy.array_equal(xs[0], xs[1])
+                # the noise increment is the scaled white noise
+                noise_.random_stream.seed(42)
+                variates, scale = noise_.increment(xs[0])
+                noise_.random_stream.seed(42)
+                assert numpy.allclose(variates * scale, noise_.white(xs[0].shape) * noise_.gfun(xs[0]))
+
+    def test_stochastic_fused_reconfigured(self):
+        "The fused noise increment follows nsig and dt when the noise is configured again."
+        noise_ = noise.Additive(nsig=numpy.array([1e-3]))
+        noise_.configure_white(0.1, (2, 5, 1))
+        _, scale = noise_.increment(numpy.ones((2, 5, 1)))
+        assert numpy.allclose(scale, numpy.sqrt(0.1 * 2e-3))
+        noise_.nsig *= 4
+        noise_.configure_white(0.05, (2, 5, 1))
+        _, scale = noise_.increment(numpy.ones((2, 5, 1)))
+        assert numpy.allclose(scale, numpy.sqrt(0.05 * 8e-3))
+
+    def test_check_noise(self):
+        integ = integrators.HeunStochastic(noise=noise.Additive(nsig=numpy.ones(2)))
+        integ.check_noise((2, 5, 1))
+        integ.noise.nsig = numpy.ones(5)
+        integ.noise.configure_white(0.1)
+        with pytest.raises(ValueError):
+            integ.check_noise((2, 5, 1))
+
     def test_rk4(self):
         rk4 = integrators.RungeKutta4thOrderDeterministic()
         assert rk4.dt == dt
@@ -142,3 +182,71 @@ class TestIntegrators(BaseTestCase):
             x = vode.scheme(x, self._dummy_dfun, 0.0, 0.0, 0.0)
         for idx, val in zip(vode.clamped_state_variable_indices, vode.clamped_state_variable_values):
             assert numpy.allclose(x[idx], val)
+
+    def test_workspace(self):
+        "Work arrays are reused, returned states are not."
+        for integ in (integrators.HeunDeterministic(), integrators.RungeKutta4thOrderDeterministic()):
+            integ.clamped_state_variable_indices = numpy.r_[1, 2]
+            integ.clamped_state_variable_values = numpy.array([[[42.0]], [[24.0]]])
+            x = numpy.random.randn(4, 10, 1)
+            states = [integ.scheme(x, self._dummy_dfun, 0.0, 0.0, 0.0)]
+            work = [id(w) for w in integ._workspace[1]]
+            for i in range(3):
+                states.append(integ.scheme(states[-1], self._dummy_dfun, 0.0, 0.0, numpy.ones_like(x)))
+            assert work == [id(w) for w in integ._workspace[1]]
+            assert len(set(id(state) for state in states)) == len(states)
+            assert not set(work) & set(id(state) for state in states)
+            for state in states:
+                assert (state[1:3] == [[[42.0]], [[24.0]]]).all()
+
+    def test_dormand_prince(self):
+        integ = integrators.DormandPrinceDeterministic(dt=0.1, rtol=1e-6, atol=1e-9)
+        assert integ.dt == 0.1
+        self._test_scheme(integ)
+        x0 = numpy.random.rand(2, 10, 1)
+        x = x0
+        for i in range(50):
+            x = integ.scheme(x, lambda x, c, lc: -x, 0.0, 0.0, 0.0)
+        assert numpy.allclose(x, x0 * numpy.exp(-5.0), rtol=1e-6)
+        # steps span many calls of the scheme
+        assert integ.n_steps < 25
+
+    def test_dormand_prince_coupling(self):
+        "Callable coupling is evaluated at the time of each stage."
+        integ = integrators.DormandPrinceDeterministic(dt=0.1)
+        x0 = numpy.zeros((1, 3, 1))
+        x1 = integ.scheme(x0, lambda x, c, lc: c, lambda t: numpy.ones_like(x0) * t, 0.0, 0.0)
+        assert numpy.allclose(x1, 0.1 ** 2 / 2)
+
+    def test_scipy_ivp(self):
+        for method in ('RK45', 'RK23', 'Radau', 'BDF', 'LSODA'):
+            integ = integrators.SciPyIVP(dt=0.1, method=method, rtol=1e-8, atol=1e-10, max_block=20)
+            self._test_scheme(integ)
+            x0 = numpy.random.rand(2, 10, 1)
+            x = integ.scheme(x0, lambda x, c, lc: -x, 0.0, 0.0, 0.0)
+            solver = integ._solver
+            for i in range(49):
+                x = integ.scheme(x, lambda x, c, lc: -x, 0.0, 0.0, 0.0)
+            assert numpy.allclose(x, x0 * numpy.exp(-5.0), rtol=1e-6)
+            # one solver call per block of 20 steps, continuing with the same solver
+            assert integ._t_new == 6.0
+            assert integ._solver is solver
+
+    def test_heun_multi_rate(self):
+        integ = integrators.HeunMultiRate(dt=0.01, slow_steps=10)
+        self._test_scheme(integ)
+        # slow variable 1 relaxes to the fast variable 0, which decays a hundred times faster
+        dfun = lambda x, c, lc: numpy.array([-x[0], 0.01 * (x[0] - x[1])])
+        n_slow = [0]
+        def dfun_slow(x, c, lc):
+            n_slow[0] += 1
+            return dfun(x, c, lc)
+        integ.slow_indices = numpy.array([1])
+        integ.dfun_fast, integ.dfun_slow = dfun, dfun_slow
+        heun = integrators.HeunDeterministic(dt=0.01)
+        x = y = numpy.ones((2, 5, 1))
+        for i in range(100):
+            x = integ.scheme(x, dfun, 0.0, 0.0, 0.0)
+            y = heun.scheme(y, dfun, 0.0, 0.0, 0.0)
+        assert n_slow[0] == 10
+        assert numpy.allclose(x, y, rtol=1e-3)
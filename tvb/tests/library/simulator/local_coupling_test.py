@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Scientific Package. This package holds all simulators, and
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test the local coupling operator of surface simulations.
+
+"""
+
+import numpy
+import scipy.sparse
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.simulator import models
+from tvb.simulator.local_coupling import LocalCoupling, local_coupling_product
+
+
+class TestLocalCoupling(BaseTestCase):
+
+    n_vertex, n_node, n_mode = 50, 56, 3
+
+    def setup_method(self):
+        rng = numpy.random.RandomState(42)
+        self.matrix = scipy.sparse.random(self.n_vertex, self.n_vertex, density=0.1, format='csc', random_state=rng)
+        self.strength = rng.rand(self.n_vertex)
+        self.state = rng.randn(4, self.n_node, self.n_mode)
+        # reference: the simulator's former padding of the scaled matrix
+        padded = scipy.sparse.vstack([scipy.sparse.hstack([scipy.sparse.diags(self.strength) * self.matrix,
+                                                           scipy.sparse.csr_matrix((self.n_vertex, 6))]),
+                                      scipy.sparse.csr_matrix((6, self.n_node))])
+        self.reference = scipy.sparse.csr_matrix(padded)
+
+    def test_dot(self):
+        lc = LocalCoupling(self.matrix, self.n_node, self.strength)
+        assert lc.nnz == self.matrix.nnz
+        assert numpy.allclose(lc.matrix.toarray(), self.reference.toarray())
+        for x in (self.state[0], self.state[1, :, 0]):
+            assert numpy.allclose(lc * x, self.reference * x)
+
+    def test_scalar_strength_float32(self):
+        lc = LocalCoupling(self.matrix, self.n_node, 0.5, dtype=numpy.float32)
+        assert lc.data.dtype == numpy.float32
+        expected = 0.5 * self.matrix * self.state[0, :self.n_vertex]
+        assert numpy.allclose((lc * self.state[0])[:self.n_vertex], expected, rtol=1e-5, atol=1e-5)
+        assert (lc * self.state[0])[self.n_vertex:].sum() == 0.0
+
+    def test_bad_strength(self):
+        try:
+            LocalCoupling(self.matrix, self.n_node, numpy.ones(3))
+            raise AssertionError("Should have failed for coupling strength of size 3.")
+        except ValueError:
+            pass
+
+    def test_staged(self):
+        lc = LocalCoupling(self.matrix, self.n_node, self.strength)
+
+        def dfun(state, coupling, local_coupling=0.0):
+            return numpy.array([local_coupling_product(local_coupling, state, 2),
+                                local_coupling_product(local_coupling, state, 0), state[1], state[3]])
+
+        staged_dfun = lc.staged(dfun)
+        state = numpy.empty(self.state.shape)
+        for _ in range(3):
+            # the integrators reuse their work buffers from step to step
+            state[:] = numpy.random.randn(*self.state.shape)
+            dx = staged_dfun(state, None, lc)
+            assert numpy.allclose(dx[0], self.reference * state[2])
+            assert numpy.allclose(dx[1], self.reference * state[0])
+            # unstaged products of the same buffer are computed afresh
+            assert numpy.allclose(lc * state[0, :, 1], self.reference * state[0, :, 1])
+        assert lc.coupled_state_variables == [2, 0]
+
+    def test_coupled_state_variables(self):
+        lc = LocalCoupling(self.matrix, self.n_node, self.strength, coupled_state_variables=[1, 3])
+        lc.stage(self.state)
+        # products of the staged state are served from the staged result
+        assert lc.product(self.state, 3) is lc.product(self.state, 3)
+        assert numpy.allclose(lc.product(self.state, 3), self.reference * self.state[3])
+        lc.unstage()
+        assert lc.product(self.state, 3) is not lc.product(self.state, 3)
+        assert numpy.allclose(lc.product(self.state, 3), self.reference * self.state[3])
+        assert lc.coupled_state_variables == [1, 3]
+
+    def test_model(self):
+        "Models served from the staged products match the direct products."
+        model = models.WilsonCowan()
+        model.configure()
+        lc = LocalCoupling(self.matrix, self.n_node, self.strength)
+        state = numpy.random.rand(2, self.n_node, 1)
+        coupling = numpy.random.rand(2, self.n_node, 1)
+        expected = model._numpy_dfun(state, coupling, lc)
+        for _ in range(2):
+            numpy.testing.assert_allclose(lc.staged(model.dfun)(state, coupling, lc), expected)
+        assert lc.coupled_state_variables == [0, 1]
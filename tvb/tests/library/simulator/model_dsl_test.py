@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#
+#
+#  TheVirtualBrain-Scientific Package. This package holds all simulators, and
+# analysers necessary to run brain-simulations. You can use it stand alone or
+# in conjunction with TheVirtualBrain-Framework Package. See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Test for tvb.simulator.models.dsl module
+
+"""
+
+import os
+import stat
+import numpy
+import pytest
+import scipy.sparse
+from numba import cuda
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.simulator import models
+from tvb.simulator.models.oscillator import supHopf
+from tvb.simulator.models.epileptor import Epileptor2D
+from tvb.simulator.local_coupling import LocalCoupling
+from tvb.simulator.models.dsl import ModelDescription, DescribedModel
+from tvb.simulator.models import dsl
+from tvb.simulator._numba.util import CUDA_SIM
+
+try:
+    import pyopencl
+    PYOPENCL_AVAILABLE = True
+except ImportError:
+    PYOPENCL_AVAILABLE = False
+
+
+def described(model):
+    "The model with the dfuns generated from its description, instead of the hand-written ones."
+    return type(model.__name__ + 'DSL', (DescribedModel, model), {})
+
+
+class TestModelDescription(BaseTestCase):
+
+    hand_written = models.Generic2dOscillator, models.ReducedWongWang, models.JansenRit, models.Linear
+
+    def test_backends_match_hand_written(self):
+        n_node = 20
+        for hand_written in self.hand_written:
+            model, reference = described(hand_written)(), hand_written()
+            model.configure()
+            reference.configure()
+            x = numpy.random.rand(model.nvar, n_node, 1)
+            c = numpy.random.rand(len(model.cvar), n_node, 1)
+            lc = LocalCoupling(scipy.sparse.random(n_node, n_node, 0.2), n_node)
+            for local_coupling in (0.0, 0.3, lc):
+                expected = reference.dfun(x.copy(), c, local_coupling)
+                numpy.testing.assert_allclose(model.dfun(x, c, local_coupling), expected, 1e-12, 1e-15)
+                numpy.testing.assert_allclose(model._numpy_dfun(x, c, local_coupling), expected, 1e-12, 1e-15)
+
+    def test_generated_models(self):
+        n_node = 20
+        x = numpy.random.randn(2, n_node, 1) * 2.0
+        c = numpy.random.randn(2, n_node, 1)
+        lc = LocalCoupling(scipy.sparse.random(n_node, n_node, 0.2), n_node)
+        for model, reference in ((supHopf(a=numpy.linspace(-1.0, 1.0, n_node)), _sup_hopf),
+                                 (Epileptor2D(), _epileptor_2d),
+                                 (Epileptor2D(modification=numpy.array([True])), _epileptor_2d)):
+            model.configure()
+            for local_coupling in (0.0, 0.3, lc):
+                expected = reference(model, x[..., 0], c[..., 0], local_coupling * x[0, :, 0])[..., numpy.newaxis]
+                numpy.testing.assert_allclose(model.dfun(x, c, local_coupling), expected, 1e-12, 1e-12)
+                numpy.testing.assert_allclose(model._numpy_dfun(x, c, local_coupling), expected, 1e-12, 1e-12)
+
+    def test_spatial_parameters(self):
+        model = described(models.Generic2dOscillator)(a=numpy.linspace(-2.0, 2.0, 5))
+        model.configure()
+        x = numpy.random.rand(2, 5, 1)
+        c = numpy.random.rand(1, 5, 1)
+        numpy.testing.assert_allclose(model.dfun(x, c), model._numpy_dfun(x, c))
+
+    def test_cache(self):
+        description = models.Linear.description
+        dfun = description.numba_dfun()
+        assert description.numba_dfun() is dfun
+        description.numpy_dfun(), description.cuda_factory(), description.opencl_program()
+        names = os.listdir(dsl.CACHE_DIR)
+        for source in (description.numpy_source(), description.numba_source(),
+                       description.cuda_source(), description.opencl_program()):
+            assert any(open(os.path.join(dsl.CACHE_DIR, name)).read() == source
+                       for name in names if name.startswith('Linear_'))
+
+    def test_cache_private(self, monkeypatch, tmpdir):
+        folder = str(tmpdir.join('dsl'))
+        monkeypatch.setattr(dsl, 'CACHE_DIR', folder)
+        path = dsl._cached('Linear', models.Linear.description.numpy_source(), 'py')
+        assert os.path.dirname(path) == folder
+        assert stat.S_IMODE(os.stat(folder).st_mode) == 0o700
+        os.chmod(folder, 0o777)
+        with pytest.raises(OSError):
+            dsl._cached('Linear', models.Linear.description.numpy_source(), 'py')
+
+    def test_invalid(self):
+        kwargs = dict(name='Bad', state_variables=['x'], parameters=['a'])
+        for equations in ({'x': 'a * y'}, {'x': 'a +'}, {'x': 'a if x else 0'}, {'x': 'erf(x)'},
+                          {'x': 'where(x < 0, a)'}, {'x': '0 < x < a'}, {'y': 'a'}):
+            with pytest.raises(ValueError):
+                ModelDescription(equations=equations, **kwargs)
+        with pytest.raises(ValueError):
+            ModelDescription(name='Bad', state_variables=['x'], parameters=['numpy'], equations={'x': 'numpy'})
+
+    def test_where(self):
+        model = described(models.Linear)()
+        model.description = ModelDescription(name='Rectified', state_variables=['x'], parameters=['gamma'],
+                                             equations={'x': 'where(x > 0, gamma * x, -x) + c_0'})
+        model.configure()
+        x = numpy.random.randn(1, 10, 1)
+        c = numpy.zeros((1, 10, 1))
+        expected = numpy.where(x > 0, model.gamma * x, -x)
+        numpy.testing.assert_allclose(model.dfun(x, c), expected)
+        numpy.testing.assert_allclose(model._numpy_dfun(x, c), expected)
+
+    @pytest.mark.skipif(not CUDA_SIM, reason='CUDA simulator not enabled')
+    def test_cuda(self):
+        n_thread = 8
+        for model in (described(models.Generic2dOscillator)(), described(models.ReducedWongWang)(),
+                      described(models.Linear)(), Epileptor2D()):
+            model.configure()
+            X = numpy.random.rand(model.nvar, n_thread).astype('f')
+            I = numpy.random.rand(n_thread).astype('f')
+            expected = model._numpy_dfun(X[..., numpy.newaxis].astype('d'), I[numpy.newaxis, :, numpy.newaxis])
+            numpy.testing.assert_allclose(_run_cuda(model.cuda_dfun(), X, I), expected[..., 0], 1e-4, 1e-5)
+
+    @pytest.mark.skipif(not CUDA_SIM, reason='CUDA simulator not enabled')
+    def test_cuda_jansen_rit(self):
+        from tvb.simulator._numba.models import make_jr
+        model = described(models.JansenRit)()
+        model.configure()
+        X = numpy.random.rand(6, 8).astype('f')
+        I = numpy.random.rand(8).astype('f')
+        numpy.testing.assert_allclose(_run_cuda(model.cuda_dfun(), X, I), _run_cuda(make_jr(), X, I), 1e-4, 1e-5)
+
+    @pytest.mark.skipif(not PYOPENCL_AVAILABLE, reason='PyOpenCL not available')
+    def test_opencl(self):
+        from tvb.simulator._opencl.util import create_cpu_context, context_and_queue
+        from tvb.simulator._opencl.models import CLModel, CLRWW
+        context, queue = context_and_queue(create_cpu_context())
+        for hand_written in (models.Generic2dOscillator, models.ReducedWongWang, models.Linear):
+            cl_model = type('CL' + hand_written.__name__, (described(hand_written), CLModel), {})()
+            cl_model.configure()
+            cl_model.configure_opencl(context, queue)
+            x = numpy.random.rand(cl_model.nvar, 100, 1)
+            c = numpy.random.rand(1, 100, 1)
+            numpy.testing.assert_allclose(cl_model.dfunKernel(x, c), cl_model._numpy_dfun(x, c), 1e-5, 1e-6)
+        # against the hand-written kernel, including states outside [0, 1]
+        generated = type('CLReducedWongWang', (described(models.ReducedWongWang), CLModel), {})()
+        hand_written = CLRWW()
+        for cl_model in generated, hand_written:
+            cl_model.configure()
+            cl_model.configure_opencl(context, queue)
+        x = numpy.random.rand(1, 100, 1) * 1.4 - 0.2
+        c = numpy.random.rand(1, 100, 1)
+        numpy.testing.assert_allclose(generated.dfunKernel(x, c), hand_written.dfunKernel(x, c), 1e-5, 1e-6)
+
+
+
+def _sup_hopf(model, y, c, lc):
+    m = model
+    return numpy.array([(m.a - y[0] ** 2 - y[1] ** 2) * y[0] - m.omega * y[1] + c[0] + lc,
+                        (m.a - y[0] ** 2 - y[1] ** 2) * y[1] + m.omega * y[0] + c[1]])
+
+
+def _epileptor_2d(model, y, c, lc):
+    m = model
+    f1 = numpy.where(y[0] < 0.0, m.a * y[0] ** 2 + (m.d - m.b) * y[0], - m.slope - 0.6 * (y[1] - 4.0) ** 2 + m.d * y[0])
+    if m.modification:
+        h = m.x0 + 3.0 / (1.0 + numpy.exp(- (y[0] + 0.5) / 0.1))
+    else:
+        h = 4.0 * (y[0] - m.x0) + numpy.where(y[1] < 0.0, - 0.1 * y[1] ** 7, 0.0)
+    return numpy.array([m.tt * (m.c - y[1] + m.Iext + lc + m.Kvf * c[0] - f1 * y[0]),
+                        m.tt * (m.r * (h - y[1] + m.Ks * c[0]))])
+
+def _run_cuda(f, X, I):
+    "Evaluate the device function f on a block of one thread per column of X."
+    dX = numpy.zeros_like(X)
+
+    @cuda.jit
+    def kernel(dX, X, I):
+        t = cuda.threadIdx.x
+        f(dX, X, I[t])
+
+    kernel[1, X.shape[1]](dX, X, I)
+    return dX
@@ -152,6 +152,17 @@ class TestModels(BaseTestCase):
         model = models.Epileptor()
         self._validate_initialization(model, 6)
 
+    def test_epileptor_split(self):
+        model = models.Epileptor()
+        model.configure()
+        x = numpy.random.randn(6, 10, 1)
+        c = numpy.random.randn(2, 10, 1)
+        slow = model.slow_indices
+        fast = numpy.setdiff1d(numpy.r_[:6], slow)
+        dx = model.dfun(x, c)
+        assert numpy.allclose(model.dfun_fast(x, c)[fast], dx[fast])
+        assert numpy.allclose(model.dfun_slow(x, c)[slow], dx[slow])
+
     def test_hopfield(self):
         """
         """
@@ -173,3 +184,17 @@ class TestModels(BaseTestCase):
     def test_linear(self):
         model = models.Linear()
         self._validate_initialization(model, 1)
+
+    def test_numba_dfun(self):
+        "Numba dfuns match the NumPy reference ones."
+        for model in (models.WilsonCowan(), models.LarterBreakspear(), models.Hopfield(),
+                      models.Hopfield(dynamic=numpy.array([1])), models.Kuramoto(),
+                      models.ZetterbergJansen(), models.Linear(), models.ReducedSetFitzHughNagumo(),
+                      models.ReducedSetHindmarshRose(), models.Zerlaut_adaptation_first_order(),
+                      models.Zerlaut_adaptation_second_order()):
+            model.configure()
+            x = model.initial(2 ** -4, (1, model.nvar, 10, model.number_of_modes))[0]
+            c = numpy.random.randn(len(model.cvar), 10, model.number_of_modes)
+            for local_coupling in (0.0, 0.3):
+                numpy.testing.assert_allclose(model.dfun(x, c, local_coupling),
+                                              model._numpy_dfun(x, c, local_coupling), rtol=1e-8, atol=1e-12)
@@ -34,8 +34,11 @@ Test for tvb.simulator.noise module
 .. moduleauthor:: Paula Sanz Leon <sanzleon.paula@gmail.com>
 
 """
+import numpy
+import pytest
 from tvb.tests.library.base_testcase import BaseTestCase
 from tvb.simulator import noise
+from tvb.simulator.async import AsyncResult
 from tvb.datatypes import equations
 
 
@@ -52,3 +55,121 @@ class TestNoise(BaseTestCase):
         noise_multiplicative = noise.Multiplicative()
         assert noise_multiplicative.ntau == 0.0
         assert isinstance(noise_multiplicative.b, equations.Linear)
+
+    def test_async_blocks(self):
+        shape = (2, 5, 1)
+        draws = {}
+        for block_size in (0, 1, 3, 8):
+            for ntau in (2.0, 0.0):
+                noise_additive = noise.Additive(ntau=ntau, block_size=block_size)
+                if ntau > 0.0:
+                    noise_additive.configure_coloured(0.1, shape)
+                else:
+                    noise_additive.configure_white(0.1, shape)
+                draws[block_size, ntau] = numpy.array([noise_additive.generate(shape) for _ in range(20)])
+        for key in draws:
+            assert numpy.all(draws[key] == draws[0, key[1]])
+        with pytest.raises(ValueError):
+            noise_additive.generate((2, 4, 1))
+        noise_additive.configure_white(0.1)
+        assert noise_additive._async is None
+        assert noise_additive.generate((2, 4, 1)).shape == (2, 4, 1)
+
+
+class TestAsync(BaseTestCase):
+    def test_result(self):
+        assert AsyncResult.do(sum, [1, 2, 3]).result == 6
+        with pytest.raises(ZeroDivisionError):
+            AsyncResult.do(divmod, 1, 0).result
+
+
+class TestCounterBased(BaseTestCase):
+    def test_philox(self):
+        # known answers of the Random123 reference implementation
+        words = noise.philox4x32(*[numpy.uint64(0xFFFFFFFF)] * 6)
+        assert words == (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd)
+        z = noise.counter_normal(42, 0, (2, 500, 1), n_steps=200)
+        assert abs(z.mean()) < 0.01 and abs(z.std() - 1.0) < 0.01
+        assert numpy.all(noise.counter_normal(42, 13, (2, 500, 1)) == z[13])
+        assert numpy.all(noise.counter_normal(42, 13, (2, 500, 1), instance=1) != z[13])
+
+    def test_restore(self):
+        shape = (2, 5, 1)
+        for ntau in (0.0, 2.0):
+            noise_additive = noise.Additive(ntau=ntau, counter_based=True, random_stream=noise.RandomStream(init_seed=7))
+            if ntau > 0.0:
+                noise_additive.configure_coloured(0.1, shape)
+            else:
+                noise_additive.configure_white(0.1, shape)
+            draws = [noise_additive.generate(shape) for _ in range(10)]
+            if ntau == 0.0:
+                # continue from a checkpointed counter
+                noise_additive.counter = 4
+                assert numpy.all(noise_additive.generate(shape) == draws[4])
+                assert numpy.allclose(draws[3], numpy.sqrt(0.1) * noise.counter_normal(7, 3, shape))
+
+
+    def test_key(self):
+        "The counter-based generator is keyed when configured, by the default init_seed for a bare RandomState."
+        shape = (1, 3, 1)
+        noise_additive = noise.Additive(counter_based=True)
+        noise_additive.configure_white(0.1, shape)
+        noise_additive.random_stream = noise.RandomStream(init_seed=7)
+        assert numpy.all(noise_additive._normal(shape) == noise.counter_normal(42, 0, shape))
+        noise_additive.configure_white(0.1, shape)
+        assert numpy.all(noise_additive._normal(shape) == noise.counter_normal(7, 0, shape))
+
+    def test_chunked_run(self):
+        "A run split into chunks, restored from the counter, matches an unsplit run."
+        from tvb.simulator.integrators import EulerStochastic
+        shape = (2, 5, 1)
+        dfun = lambda x, c, lc: -x
+        def run(x, n_step, counter=None):
+            integ = EulerStochastic(dt=0.1, noise=noise.Additive(
+                nsig=numpy.array([0.1]), counter_based=True, random_stream=noise.RandomStream(init_seed=7)))
+            integ.noise.configure_white(integ.dt, shape)
+            if counter is not None:
+                integ.noise.counter = counter
+            for _ in range(n_step):
+                x = integ.scheme(x, dfun, 0.0, 0.0, 0.0)
+            return x, integ.noise.counter
+        x0 = numpy.ones(shape)
+        unsplit, _ = run(x0, 20)
+        chunk, counter = run(x0, 8)
+        assert counter == 8
+        chunked, _ = run(chunk, 12, counter)
+        assert numpy.array_equal(chunked, unsplit)
+
+
+class TestGfun(BaseTestCase):
+    def test_compiled(self):
+        X = numpy.random.randn(2, 10, 1)
+        nsig = numpy.array([0.01, 0.02]).reshape((2, 1, 1))
+        for b in (equations.Linear(parameters={"a": 0.3, "b": 1.0}), equations.Gaussian()):
+            noise_multiplicative = noise.Multiplicative(nsig=nsig, b=b)
+            noise_multiplicative.configure_white(0.1, X.shape)
+            b.pattern = X
+            assert numpy.allclose(noise_multiplicative.gfun(X), numpy.sqrt(2.0 * nsig) * b.pattern)
+        noise_additive = noise.Additive(nsig=nsig.copy())
+        noise_additive.configure_white(0.1, X.shape)
+        assert numpy.all(noise_additive.gfun(X) == numpy.sqrt(2.0 * nsig))
+        # changing nsig, in place or not, takes effect with the next configuration
+        noise_additive.nsig *= 4
+        noise_additive.configure_white(0.1, X.shape)
+        assert numpy.all(noise_additive.gfun(X) == numpy.sqrt(8.0 * nsig))
+        noise_additive.nsig = 2 * nsig
+        noise_additive.configure_white(0.1, X.shape)
+        assert numpy.all(noise_additive.gfun(X) == numpy.sqrt(4.0 * nsig))
+
+    def test_simulator_nsig(self):
+        "The simulator configures the noise with nsig reshaped to the nodes."
+        from tvb.simulator import simulator, models, integrators
+        from tvb.datatypes.connectivity import Connectivity
+        conn = Connectivity(weights=numpy.ones((4, 4)), tract_lengths=numpy.zeros((4, 4)),
+                            region_labels=numpy.array(list('abcd')), centres=numpy.zeros((4, 3)))
+        nsig = numpy.r_[1.0, 2.0, 3.0, 4.0]
+        sim = simulator.Simulator(model=models.Linear(), connectivity=conn,
+                                  integrator=integrators.EulerStochastic(noise=noise.Additive(nsig=nsig)))
+        sim.configure()
+        gfun = sim.integrator.noise.gfun(numpy.zeros((1, 4, 1)))
+        assert numpy.allclose(gfun, numpy.sqrt(2.0 * nsig).reshape((1, 4, 1)))
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2017, Baycrest Centre for Geriatric Care ("Baycrest") and others
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this
+# program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Test the region to node mapping of surface simulations.
+
+"""
+
+import numpy
+from tvb.tests.library.base_testcase import BaseTestCase
+from tvb.simulator.common import numpy_add_at
+from tvb.simulator.regmap import RegionMap
+
+
+class TestRegionMap(BaseTestCase):
+
+    n_region, n_mode = 7, 3
+
+    def setup_method(self):
+        rng = numpy.random.RandomState(42)
+        self.regmap = numpy.r_[rng.randint(0, 5, 100), 5, 6]
+        self.node_values = rng.randn(4, self.regmap.size, self.n_mode)
+        self.region_values = rng.randn(2, self.n_region, self.n_mode)
+
+    def _reference_average(self):
+        region_state = numpy.zeros((self.n_region, 4, self.n_mode))
+        numpy_add_at(region_state, self.regmap, self.node_values.transpose((1, 0, 2)))
+        region_state /= numpy.bincount(self.regmap).reshape((-1, 1, 1))
+        return region_state.transpose((1, 0, 2))
+
+    def test_expand(self):
+        for use_numba in (False, True):
+            region_map = RegionMap(self.regmap, self.n_region, use_numba=use_numba)
+            expanded = region_map.expand(self.region_values)
+            assert numpy.allclose(expanded, self.region_values[:, self.regmap])
+            # buffer is reused
+            assert region_map.expand(self.region_values) is expanded
+
+    def test_average(self):
+        reference = self._reference_average()
+        for use_numba in (False, True):
+            region_map = RegionMap(self.regmap, self.n_region, use_numba=use_numba)
+            assert numpy.allclose(region_map.average(self.node_values), reference)
+            region_map = RegionMap(self.regmap, self.n_region, use_numba=use_numba)
+            averaged = region_map.average(self.node_values, rows=numpy.array([0, 2]))
+            assert numpy.allclose(averaged[[0, 2]], reference[[0, 2]])
+            assert (averaged[[1, 3]] == 0.0).all()
+
+    def test_empty_region(self):
+        try:
+            RegionMap(self.regmap[self.regmap != 3], self.n_region)
+            raise AssertionError("Should have failed for a region without nodes.")
+        except ValueError:
+            pass